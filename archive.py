@@ -0,0 +1,183 @@
+"""
+archive.py — Capture et rejeu d'une exécution dans une archive zip indexée.
+
+En capture, tout ce que les collecteurs ont reçu est écrit dans une seule
+archive compressée : chaque réponse HTTP brute (cache compris, erreurs
+réseau comprises), chaque page rendue par Playwright et chaque JSON
+intercepté. En rejeu, transport.telecharger et navigateur.executer lisent
+l'archive au lieu du réseau : ni cache, ni planificateur, ni Chromium. Le
+pipeline d'un jour passé se relance en quelques secondes, pour rejouer un
+échec de generate_digest ou de send_email, ou comparer deux versions des
+consignes sur les mêmes entrées.
+
+Structure de l'archive :
+  manifeste.json      — début de l'exécution capturée et index des entrées
+  http/<sha1>         — corps bruts des réponses HTTP
+  navigateur/<sha1>   — résultats JSON des tâches Playwright (DOM, liens, JSON intercepté)
+
+En rejeu, maintenant() retourne l'heure de début de l'exécution capturée :
+les collecteurs l'utilisent pour leurs filtres de fraîcheur et leurs URL
+datées, et main.py pour la date du digest et l'historique à exclure.
+
+Variables d'environnement :
+  ARCHIVE_MODE     — « capture » ou « rejeu » (défaut : désactivé)
+  ARCHIVE_FICHIER  — archive à écrire ou à relire (défaut en capture :
+                     archives/execution-AAAAMMJJ-HHMMSS.zip ; requis en rejeu)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+MODE = os.environ.get("ARCHIVE_MODE", "").strip().lower()
+FICHIER = os.environ.get("ARCHIVE_FICHIER", "").strip()
+ARCHIVES_DIR = Path(__file__).parent / "archives"
+
+# En-têtes conservés : ceux dont dépendent le décodage et l'analyse des réponses
+EN_TETES_CONSERVES = ("Content-Type", "Content-Language", "Last-Modified", "ETag", "Date")
+
+
+class AbsentDeLArchive(requests.ConnectionError):
+    """La réponse ou la tâche demandée n'a pas été capturée."""
+
+
+class EchecCapture(requests.RequestException):
+    """La requête ou la tâche avait échoué pendant la capture : l'échec est rejoué."""
+
+
+def _nom(prefixe: str, cle: str) -> str:
+    return f"{prefixe}/{hashlib.sha1(cle.encode('utf-8')).hexdigest()}"
+
+
+class Archive:
+    """Archive zip d'une exécution, en écriture (capture) ou en lecture (rejeu)."""
+
+    def __init__(self, mode: str = MODE, fichier: str = FICHIER):
+        self.mode = mode if mode in ("capture", "rejeu") else ""
+        self.verrou = threading.Lock()
+        self.entrees = {}
+        self.debut = datetime.now()
+        self.zip = None
+        self.fichier = None
+        if not self.mode:
+            return
+        if self.mode == "rejeu":
+            if not fichier:
+                raise EnvironmentError("ARCHIVE_MODE=rejeu : ARCHIVE_FICHIER est requis.")
+            self.fichier = Path(fichier)
+            self.zip = zipfile.ZipFile(self.fichier)
+            manifeste = json.loads(self.zip.read("manifeste.json"))
+            self.entrees = manifeste["entrees"]
+            self.debut = datetime.fromisoformat(manifeste["debut"])
+        else:
+            self.fichier = Path(fichier or ARCHIVES_DIR / f"execution-{self.debut:%Y%m%d-%H%M%S}.zip")
+            self.fichier.parent.mkdir(parents=True, exist_ok=True)
+            self.zip = zipfile.ZipFile(self.fichier, "w", compression=zipfile.ZIP_DEFLATED,
+                                       compresslevel=6)
+
+    @property
+    def capture(self) -> bool:
+        return self.mode == "capture"
+
+    @property
+    def rejeu(self) -> bool:
+        return self.mode == "rejeu"
+
+    def maintenant(self, tz=None) -> datetime:
+        """Heure courante, ou début de l'exécution capturée en rejeu."""
+        if not self.rejeu:
+            return datetime.now(tz)
+        return self.debut.astimezone(tz) if tz else self.debut
+
+    # -- écriture -------------------------------------------------------------
+    def _ecrire(self, cle: str, nom: str, donnees: bytes, meta: dict) -> None:
+        with self.verrou:
+            # Une URL lue plusieurs fois dans l'exécution : la première réponse fait foi
+            if not self.capture or self.zip is None or cle in self.entrees:
+                return
+            if donnees is not None:
+                self.zip.writestr(nom, donnees)
+            self.entrees[cle] = meta
+
+    def noter_reponse(self, url: str, r: requests.Response) -> None:
+        nom = _nom("http", url)
+        self._ecrire(f"http|{url}", nom, r.content, {
+            "fichier": nom,
+            "statut": r.status_code,
+            "en_tetes": {k: r.headers[k] for k in EN_TETES_CONSERVES if k in r.headers},
+        })
+
+    def noter_erreur(self, prefixe: str, cle: str, erreur: Exception) -> None:
+        detail = (str(erreur).splitlines() or [""])[0]
+        self._ecrire(f"{prefixe}|{cle}", None, None, {"erreur": f"{type(erreur).__name__}: {detail}"})
+
+    def noter_rendu(self, cle: str, resultat) -> None:
+        nom = _nom("navigateur", cle)
+        self._ecrire(f"navigateur|{cle}", nom,
+                     json.dumps(resultat, ensure_ascii=False).encode("utf-8"), {"fichier": nom})
+
+    # -- lecture --------------------------------------------------------------
+    def _entree(self, cle: str) -> dict:
+        entree = self.entrees.get(cle)
+        if entree is None:
+            raise AbsentDeLArchive(f"absent de l'archive {self.fichier.name} : {cle.split('|', 1)[1]}")
+        if "erreur" in entree:
+            raise EchecCapture(f"échec capturé — {entree['erreur']}")
+        return entree
+
+    def _lire(self, nom: str) -> bytes:
+        with self.verrou:
+            return self.zip.read(nom)
+
+    def reponse(self, url: str) -> requests.Response:
+        """Réponse HTTP capturée pour `url` ; lève AbsentDeLArchive ou EchecCapture sinon."""
+        entree = self._entree(f"http|{url}")
+        r = requests.Response()
+        r.status_code = entree["statut"]
+        r.headers = CaseInsensitiveDict(entree["en_tetes"])
+        r.encoding = get_encoding_from_headers(r.headers)
+        r._content = self._lire(entree["fichier"])
+        r.url = url
+        r.depuis_archive = True
+        return r
+
+    def rendu(self, cle: str):
+        """Résultat capturé d'une tâche Playwright ; lève AbsentDeLArchive ou EchecCapture sinon."""
+        return json.loads(self._lire(self._entree(f"navigateur|{cle}")["fichier"]))
+
+    # -- fin ------------------------------------------------------------------
+    def fermer(self) -> None:
+        """Écrit le manifeste (en capture) et ferme l'archive ; affiche son contenu."""
+        with self.verrou:
+            if self.zip is None:
+                return
+            if self.capture:
+                self.zip.writestr("manifeste.json", json.dumps({
+                    "version": 1,
+                    "debut": self.debut.isoformat(timespec="seconds"),
+                    "fin": datetime.now().isoformat(timespec="seconds"),
+                    "entrees": self.entrees,
+                }, ensure_ascii=False))
+            self.zip.close()
+            self.zip = None
+        if self.capture:
+            http = sum(1 for c in self.entrees if c.startswith("http|"))
+            print(f"🗄️ Exécution capturée dans {self.fichier} : {http} réponse(s) HTTP, "
+                  f"{len(self.entrees) - http} tâche(s) Playwright "
+                  f"({self.fichier.stat().st_size / 1e6:.1f} Mo)")
+
+
+ARCHIVE = Archive()
+
+
+def maintenant(tz=None) -> datetime:
+    """Heure de référence des collecteurs (voir Archive.maintenant)."""
+    return ARCHIVE.maintenant(tz)
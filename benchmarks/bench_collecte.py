@@ -0,0 +1,291 @@
+"""
+bench_collecte.py — Banc d'essai hors ligne de la collecte (fetch_all + fetch_interprovincial).
+
+La collecte est rejouée contre un serveur local (stubs/sites_stub.py) branché
+par HTTP_REDIRECTION : réponses enregistrées (fixtures), ou pages synthétiques
+pour les URL qui n'en ont pas. Aucun accès réseau n'est nécessaire ; le cache
+HTTP, le disjoncteur et Playwright sont désactivés pour que chaque itération
+fasse le même travail (les pages JS passent par leur repli HTTP).
+
+Mesures, tirées du rapport de traçage (telemetrie.py) de chaque itération :
+  - durée totale, requêtes et octets par seconde ;
+  - par source : durée, requêtes, octets, temps d'analyse HTML/RSS ;
+  - pic de mémoire Python (tracemalloc, itération distincte : le traçage
+    mémoire ralentit l'exécution) et pic de mémoire résidente du processus,
+    qui compte aussi les arbres lxml et les tampons réseau.
+
+Usage :
+  python benchmarks/bench_collecte.py enregistrer                 # collecte réelle → fixtures
+  python benchmarks/bench_collecte.py mesurer                     # fixtures, sinon synthétique
+  python benchmarks/bench_collecte.py mesurer -n 10 --latence 0.05 --gigue 0.02 \\
+                                              --taux-erreur 0.02 --taux-coupure 0.01
+  python benchmarks/bench_collecte.py mesurer --json apres.json --reference avant.json
+
+Avec --reference, les sources dont la durée médiane dépasse celle de la
+référence de plus de --tolerance (défaut : 15 %) sont signalées, et le code de
+sortie vaut 1 : de quoi servir de test de non-régression.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RACINE))
+
+FIXTURES_DEFAUT = RACINE / "benchmarks" / "fixtures"
+SERVEUR = RACINE / "stubs" / "sites_stub.py"
+
+# Réglages du serveur de rejeu : deux mesures ne se comparent qu'à réglages égaux
+REGLAGES = ("latence", "gigue", "taux_erreur", "taux_coupure", "graine", "paragraphes", "taux")
+
+EXTENSIONS = (("json", ".json"), ("xml", ".xml"), ("rss", ".xml"), ("atom", ".xml"), ("html", ".html"))
+
+
+def _configurer(env: dict) -> None:
+    """Variables lues à l'import des modules du pipeline : à fixer avant de les importer."""
+    os.environ.update(env)
+
+
+def _collecter():
+    """Collecte complète, comme main.py (sources ontariennes et interprovinciales en parallèle)."""
+    from fetchers import fetch_all
+    from interprovincial import fetch_interprovincial
+    from parallel import executer_en_parallele
+
+    return executer_en_parallele(
+        [("Sources ontariennes", fetch_all), ("Sources interprovinciales", fetch_interprovincial)],
+        max_workers=2,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Enregistrement des fixtures
+# ---------------------------------------------------------------------------
+def enregistrer(dossier: Path) -> None:
+    """Collecte réelle ; chaque réponse du réseau est écrite dans `dossier` (index.json + corps/)."""
+    _configurer({"HTTP_CACHE": "0", "DISJONCTEUR": "0", "RAPPORT_EXECUTION": "0"})
+    import transport
+
+    (dossier / "corps").mkdir(parents=True, exist_ok=True)
+    index_chemin = dossier / "index.json"
+    try:
+        index = json.loads(index_chemin.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        index = {}
+    verrou = threading.Lock()
+
+    def observer(url, r):
+        type_contenu = r.headers.get("Content-Type", "text/html")
+        extension = next((ext for motif, ext in EXTENSIONS if motif in type_contenu), ".bin")
+        nom = f"corps/{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}{extension}"
+        (dossier / nom).write_bytes(r.content)
+        with verrou:
+            index[url] = {"corps": nom, "statut": r.status_code, "type": type_contenu}
+
+    transport.OBSERVATEURS.append(observer)
+    debut = time.perf_counter()
+    _collecter()
+    index_chemin.write_text(json.dumps(index, ensure_ascii=False, indent=1, sort_keys=True),
+                            encoding="utf-8")
+    print(f"\n💾 {len(index)} réponse(s) enregistrée(s) dans {dossier} "
+          f"({time.perf_counter() - debut:.1f} s)")
+
+
+# ---------------------------------------------------------------------------
+# Mesure
+# ---------------------------------------------------------------------------
+def _port_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def serveur_de_rejeu(args):
+    port = _port_libre()
+    commande = [sys.executable, str(SERVEUR), "--port", str(port), "--fixtures", str(args.fixtures),
+                "--latence", str(args.latence), "--gigue", str(args.gigue),
+                "--taux-erreur", str(args.taux_erreur), "--taux-coupure", str(args.taux_coupure),
+                "--graine", str(args.graine), "--paragraphes", str(args.paragraphes)]
+    if args.synthetique or not (Path(args.fixtures) / "index.json").exists():
+        commande.append("--synthetique")
+    processus = subprocess.Popen(commande, stdout=subprocess.PIPE, text=True)
+    try:
+        print(f"  {processus.stdout.readline().strip()}")
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        processus.terminate()
+        processus.wait(timeout=10)
+
+
+def _iteration(afficher: bool) -> dict:
+    """Une collecte tracée : durée, totaux et bilans par source tirés du rapport."""
+    import fetchers
+    import telemetrie
+
+    fetchers._flux_resolus = None
+    telemetrie.demarrer_execution()
+    sortie = contextlib.nullcontext() if afficher else contextlib.redirect_stdout(io.StringIO())
+    debut = time.perf_counter()
+    with sortie:
+        resultats = _collecter()
+    duree = time.perf_counter() - debut
+    rapport = telemetrie.rapport()
+    fetch = rapport["totaux"].get("fetch", {})
+    sources = {
+        nom: bilan for nom, bilan in rapport["taches"].items()
+        if nom not in ("Sources ontariennes", "Sources interprovinciales")
+    }
+    caracteres = sum(len(r.valeur if isinstance(r.valeur, str) else "".join(r.valeur.values()))
+                     for r in resultats if r.valeur)
+    return {"duree_s": duree, "requetes": fetch.get("nombre", 0), "octets": fetch.get("octets", 0),
+            "erreurs": rapport["erreurs"], "caracteres_produits": caracteres, "sources": sources}
+
+
+def mesurer(args) -> int:
+    with tempfile.TemporaryDirectory() as temporaire, serveur_de_rejeu(args) as base:
+        _configurer({
+            "HTTP_REDIRECTION": base, "HTTP_CACHE": "0", "PLAYWRIGHT": "0",
+            "DISJONCTEUR": "0", "DISJONCTEUR_FICHIER": str(Path(temporaire) / "sante.json"),
+            "HTTP_TAUX_PAR_HOTE": str(args.taux), "HTTP_RAFALE": str(max(1.0, args.taux)),
+            "RAPPORT_EXECUTION": "0",
+        })
+        import fetchers
+        fetchers.FLUX_RESOLUS_FICHIER = Path(temporaire) / "flux_resolus.json"
+
+        for _ in range(args.echauffement):
+            _iteration(args.verbeux)
+        iterations = [_iteration(args.verbeux) for _ in range(args.n)]
+
+        tracemalloc.start()
+        _iteration(False)
+        pic = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    resultat = _resumer(iterations, pic)
+    resultat["reglages"] = {cle: getattr(args, cle) for cle in REGLAGES}
+    _afficher(resultat, args)
+    if args.json:
+        Path(args.json).write_text(json.dumps(resultat, ensure_ascii=False, indent=1), encoding="utf-8")
+        print(f"\n💾 Résultats écrits dans {args.json}")
+    if args.reference:
+        return _comparer(resultat, json.loads(Path(args.reference).read_text(encoding="utf-8")),
+                         args.tolerance)
+    return 0
+
+
+def _resumer(iterations: list, pic: int) -> dict:
+    def mediane(cle, liste):
+        return statistics.median(it.get(cle, 0) for it in liste)
+
+    noms = list(dict.fromkeys(n for it in iterations for n in it["sources"]))
+    sources = {}
+    for nom in noms:
+        bilans = [it["sources"].get(nom, {}) for it in iterations]
+        sources[nom] = {
+            "duree_s": round(mediane("duree_s", bilans), 4),
+            "analyse_s": round(mediane("duree_analyse_s", bilans), 4),
+            "requetes": mediane("requetes", bilans),
+            "octets": mediane("octets", bilans),
+        }
+    duree = mediane("duree_s", iterations)
+    return {
+        "iterations": len(iterations),
+        "duree_s": round(duree, 4),
+        "duree_min_s": round(min(it["duree_s"] for it in iterations), 4),
+        "requetes": mediane("requetes", iterations),
+        "octets": mediane("octets", iterations),
+        "requetes_par_s": round(mediane("requetes", iterations) / duree, 1) if duree else 0,
+        "mo_par_s": round(mediane("octets", iterations) / duree / 1e6, 2) if duree else 0,
+        "caracteres_produits": mediane("caracteres_produits", iterations),
+        "pic_memoire_mo": round(pic / 1e6, 1),
+        "rss_max_mo": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3, 1),
+        "erreurs": iterations[-1]["erreurs"],
+        "sources": sources,
+    }
+
+
+def _afficher(r: dict, args) -> None:
+    print(f"\n⏱ Collecte rejouée — médiane sur {r['iterations']} itération(s) "
+          f"(latence {args.latence} s ± {args.gigue}, 503 : {args.taux_erreur:.0%}, "
+          f"coupures : {args.taux_coupure:.0%})")
+    print(f"    durée {r['duree_s']:.2f} s (min {r['duree_min_s']:.2f}), {r['requetes']:.0f} requêtes, "
+          f"{r['octets'] / 1e6:.1f} Mo → {r['requetes_par_s']} req/s, {r['mo_par_s']} Mo/s")
+    print(f"    pic mémoire Python : {r['pic_memoire_mo']} Mo (résidente : {r['rss_max_mo']} Mo) ; "
+          f"texte produit : {r['caracteres_produits']:.0f} caractères")
+    if r["erreurs"]:
+        print(f"    erreurs (dernière itération) : {r['erreurs']}")
+    print(f"\n    {'source':<50} {'durée':>8} {'analyse':>9} {'req.':>5} {'Ko':>8}")
+    for nom, s in sorted(r["sources"].items(), key=lambda e: -e[1]["duree_s"]):
+        print(f"    {nom[:50]:<50} {s['duree_s']:>7.3f}s {s['analyse_s']:>8.4f}s "
+              f"{s['requetes']:>5.0f} {s['octets'] / 1e3:>8.0f}")
+
+
+def _comparer(r: dict, reference: dict, tolerance: float) -> int:
+    if reference.get("reglages", r["reglages"]) != r["reglages"]:
+        print(f"\n⚠ Réglages différents de la référence : {reference.get('reglages')}")
+    regressions = []
+    paires = [("collecte complète", r["duree_s"], reference.get("duree_s"))]
+    paires += [(nom, s["duree_s"], reference.get("sources", {}).get(nom, {}).get("duree_s"))
+               for nom, s in r["sources"].items()]
+    for nom, actuelle, ancienne in paires:
+        if ancienne and actuelle > ancienne * (1 + tolerance):
+            regressions.append(f"    ⚠ {nom} : {ancienne:.3f} s → {actuelle:.3f} s "
+                               f"(+{actuelle / ancienne - 1:.0%})")
+    if not regressions:
+        print(f"\n✓ Aucune régression au-delà de {tolerance:.0%} par rapport à la référence.")
+        return 0
+    print(f"\n⚠ {len(regressions)} régression(s) au-delà de {tolerance:.0%} :")
+    print("\n".join(regressions))
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p_enr = sous.add_parser("enregistrer", help="collecte réelle → fixtures")
+    p_enr.add_argument("--fixtures", type=Path, default=FIXTURES_DEFAUT)
+    p_mes = sous.add_parser("mesurer", help="collecte rejouée sur le serveur local")
+    p_mes.add_argument("--fixtures", type=Path, default=FIXTURES_DEFAUT)
+    p_mes.add_argument("--synthetique", action="store_true",
+                       help="pages synthétiques pour les URL sans fixture")
+    p_mes.add_argument("-n", type=int, default=5, help="itérations mesurées")
+    p_mes.add_argument("--echauffement", type=int, default=1, help="itérations non mesurées")
+    p_mes.add_argument("--latence", type=float, default=0.0)
+    p_mes.add_argument("--gigue", type=float, default=0.0)
+    p_mes.add_argument("--taux-erreur", type=float, default=0.0)
+    p_mes.add_argument("--taux-coupure", type=float, default=0.0)
+    p_mes.add_argument("--graine", type=int, default=1)
+    p_mes.add_argument("--paragraphes", type=int, default=60,
+                       help="taille des pages synthétiques")
+    p_mes.add_argument("--taux", type=float, default=1000.0,
+                       help="requêtes/s par hôte (HTTP_TAUX_PAR_HOTE ; défaut : sans limite "
+                            "pratique, pour mesurer le coût propre de la collecte)")
+    p_mes.add_argument("--json", help="écrire les résultats dans ce fichier")
+    p_mes.add_argument("--reference", help="résultats JSON d'une exécution précédente")
+    p_mes.add_argument("--tolerance", type=float, default=0.15)
+    p_mes.add_argument("-v", "--verbeux", action="store_true", help="afficher la sortie des collecteurs")
+    args = parser.parse_args()
+
+    if args.commande == "enregistrer":
+        enregistrer(args.fixtures)
+    else:
+        sys.exit(mesurer(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+bench_diffusion.py — Test de charge hors ligne de l'envoi groupé (diffusion.py).
+
+Un serveur Resend simulé (stubs/resend_stub.py) est lancé sur un port libre,
+avec sa limite de débit et, au besoin, des défauts injectés ; mailer.send_email
+y envoie un digest synthétique (benchmarks/bench_rendu.py) à une liste de
+destinataires générée. Le banc affiche la durée, le débit en courriels par
+seconde et les compteurs du serveur : 429 reçues, réponses rejouées par clé
+d'idempotence, courriels reçus en double.
+
+Le code de sortie vaut 1 si un destinataire valide n'a rien reçu ou si
+quelqu'un a reçu le digest deux fois.
+
+Usage :
+  python benchmarks/bench_diffusion.py                              # 500 destinataires
+  python benchmarks/bench_diffusion.py -d 2000 --taux 2 --parallele 4
+  python benchmarks/bench_diffusion.py --taux-erreur 0.1 --taux-coupure 0.1 --invalides 5
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RACINE))
+sys.path.insert(0, str(RACINE / "benchmarks"))
+
+from bench_collecte import _port_libre  # noqa: E402
+
+SERVEUR = RACINE / "stubs" / "resend_stub.py"
+
+
+@contextlib.contextmanager
+def serveur_resend(args):
+    port = _port_libre()
+    commande = [sys.executable, str(SERVEUR), "--port", str(port), "--taux", str(args.taux),
+                "--latence", str(args.latence), "--taux-erreur", str(args.taux_erreur),
+                "--taux-coupure", str(args.taux_coupure), "--graine", str(args.graine)]
+    processus = subprocess.Popen(commande, stdout=subprocess.PIPE, text=True)
+    try:
+        print(f"  {processus.stdout.readline().strip()}")
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        processus.terminate()
+        processus.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-d", "--destinataires", type=int, default=500)
+    parser.add_argument("--invalides", type=int, default=0, help="adresses invalides ajoutées à la liste")
+    parser.add_argument("--taille-lot", type=int, default=100)
+    parser.add_argument("--parallele", type=int, default=4)
+    parser.add_argument("--taux", type=float, default=2.0, help="limite de débit du serveur (req/s)")
+    parser.add_argument("--latence", type=float, default=0.2, help="délai (s) de chaque réponse")
+    parser.add_argument("--taux-erreur", type=float, default=0.0)
+    parser.add_argument("--taux-coupure", type=float, default=0.0)
+    parser.add_argument("--graine", type=int, default=1)
+    args = parser.parse_args()
+
+    adresses = [f"lecteur{i:05d}@redaction.exemple.ca" for i in range(args.destinataires)]
+    adresses += [f"invalide{i}@" for i in range(args.invalides)]
+
+    with serveur_resend(args) as base:
+        # Variables lues à l'import de resend et de diffusion (bench_rendu importe mailer) :
+        # à fixer avant de les importer
+        os.environ.update({
+            "RESEND_API_URL": base, "RESEND_API_KEY": "stub", "RECIPIENT_EMAIL": ",".join(adresses),
+            "DESTINATAIRES_FICHIER": "", "DIFFUSION_TAILLE_LOT": str(args.taille_lot),
+            "DIFFUSION_PARALLELE": str(args.parallele), "DIFFUSION_TAUX": str(args.taux),
+            "DIFFUSION_BILAN": "0",
+        })
+        from bench_rendu import digest_synthetique
+        from diffusion import EchecDiffusion
+        from mailer import send_email
+
+        debut = time.perf_counter()
+        try:
+            resultats = send_email(digest_synthetique(1, 120))
+        except EchecDiffusion as e:
+            print(f"⚠ {e}")
+            resultats = {}
+        duree = time.perf_counter() - debut
+        with urllib.request.urlopen(f"{base}/__compteurs") as r:
+            compteurs = json.load(r)
+
+    envoyes = sum(1 for r in resultats.values() if r["statut"] == "envoye")
+    lots = -(-len(adresses) // args.taille_lot)
+    print(f"\n{envoyes} courriel(s) en {duree:.2f} s — {envoyes / duree:.0f} courriels/s "
+          f"({lots} lot(s) ; plancher imposé par la limite de débit : {(lots - 1) / args.taux:.1f} s)")
+    print("Serveur : " + ", ".join(f"{cle} {n}" for cle, n in sorted(compteurs.items())))
+    manquants = args.destinataires - envoyes
+    if manquants or compteurs.get("doublons"):
+        print(f"⚠ {manquants} destinataire(s) valide(s) sans courriel, "
+              f"{compteurs.get('doublons', 0)} doublon(s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
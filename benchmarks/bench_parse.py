@@ -0,0 +1,129 @@
+"""
+bench_parse.py — Coût d'analyse HTML : ancien pipeline html.parser vs document.Document.
+
+L'ancien pipeline réanalysait la même page pour chaque extracteur (texte
+propre, liens, noms en gras, blocs de paragraphes) avec l'analyseur Python
+pur de BeautifulSoup. Le nouveau construit un seul Document lxml et y
+applique les mêmes extracteurs.
+
+Usage :
+  python benchmarks/bench_parse.py                      # pages Hansard et décrets réelles
+  python benchmarks/bench_parse.py page1.html https://…  # fichiers locaux ou URLs
+  python benchmarks/bench_parse.py -n 20 …               # nombre de répétitions
+
+La comparaison « avant » nécessite beautifulsoup4 (pip install beautifulsoup4).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from document import Document  # noqa: E402
+
+PAGES_PAR_DEFAUT = [
+    # Hansard de l'Assemblée législative de l'Ontario (long document de débats)
+    "https://www.ola.org/en/legislative-business/house-documents/parliament-43/session-1/hansard",
+    # Décrets du Conseil (index de recherche)
+    "https://www.ontario.ca/search/orders-in-council",
+    # Hansard interprovinciaux lus par texte_pertinent
+    "https://nslegislature.ca/legislative-business/hansard",
+    "https://www.leg.bc.ca/parliamentary-business/hansard-blues/house",
+]
+
+
+def charger(source: str) -> str:
+    if source.startswith(("http://", "https://")):
+        import requests
+        r = requests.get(source, timeout=30, headers={"User-Agent": "Mozilla/5.0"})
+        r.raise_for_status()
+        return r.text
+    return Path(source).read_text(encoding="utf-8", errors="replace")
+
+
+# ---------------------------------------------------------------------------
+# Ancien pipeline : une analyse html.parser par extracteur
+# ---------------------------------------------------------------------------
+def _avant(html: str) -> None:
+    from bs4 import BeautifulSoup
+
+    # soup_text / _oic_soup_text_with_names
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        tag.decompose()
+    [l.strip() for l in soup.get_text(separator="\n").splitlines() if len(l.strip()) > 25]
+
+    # Liens (fetch_hansard, _oic_links_from_html, Hansard provinciaux)
+    soup = BeautifulSoup(html, "html.parser")
+    [(a.get_text(strip=True), a["href"]) for a in soup.find_all("a", href=True)]
+
+    # _oic_extract_bold_names
+    soup = BeautifulSoup(html, "html.parser")
+    [t.get_text(strip=True) for t in soup.find_all(["strong", "b"])]
+
+    # texte_pertinent
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "nav", "footer"]):
+        tag.decompose()
+    [b.get_text(" ", strip=True) for b in soup.find_all(["p", "li", "td", "div"])]
+
+
+def _apres(html: str) -> None:
+    doc = Document(html)
+    doc.texte()
+    doc.liens()
+    doc.noms_en_gras()
+    doc.blocs()
+
+
+def chronometrer(fn, html: str, repetitions: int) -> float:
+    """Durée médiane (ms) de fn(html) sur `repetitions` exécutions."""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fn(html)
+        durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return durees[len(durees) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("sources", nargs="*", help="fichiers HTML ou URLs")
+    parser.add_argument("-n", "--repetitions", type=int, default=10)
+    args = parser.parse_args()
+
+    try:
+        import bs4  # noqa: F401
+        comparer = True
+    except ImportError:
+        print("ℹ beautifulsoup4 absent : seul le nouveau pipeline est mesuré.")
+        comparer = False
+
+    print(f"{'page':<60} {'Ko':>7} {'avant ms':>9} {'après ms':>9} {'gain':>6}")
+    total_avant = total_apres = 0.0
+    for source in args.sources or PAGES_PAR_DEFAUT:
+        try:
+            html = charger(source)
+        except Exception as e:
+            print(f"{source[-60:]:<60} ⚠ {e}")
+            continue
+        apres = chronometrer(_apres, html, args.repetitions)
+        total_apres += apres
+        if comparer:
+            avant = chronometrer(_avant, html, args.repetitions)
+            total_avant += avant
+            print(f"{source[-60:]:<60} {len(html) / 1024:7.0f} {avant:9.1f} {apres:9.1f} "
+                  f"{avant / apres:5.1f}×")
+        else:
+            print(f"{source[-60:]:<60} {len(html) / 1024:7.0f} {'—':>9} {apres:9.1f}")
+
+    if comparer and total_apres:
+        print(f"\nTotal : {total_avant:.1f} ms → {total_apres:.1f} ms "
+              f"({total_avant / total_apres:.1f}× plus rapide)")
+
+
+if __name__ == "__main__":
+    main()
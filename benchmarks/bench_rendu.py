@@ -0,0 +1,188 @@
+"""
+bench_rendu.py — Coût du rendu Markdown → HTML du courriel : ancien convertisseur vs mailer.markdown_to_html.
+
+L'ancien convertisseur testait chaque ligne contre une chaîne de préfixes
+et reconstruisait toute la ligne à chaque paire de ** : coût quadratique sur
+les longs paragraphes. Le nouveau échappe le texte, reconnaît gras,
+italique et liens en une passe d'expression compilée, puis classe chaque
+ligne par une seule expression. Il fait davantage (échappement, italique,
+liens, listes imbriquées) : à taille habituelle, l'écart mesuré reflète ce
+travail en plus ; sur les longs paragraphes (--mots 3000), l'ancien décroche.
+
+Les digests sont synthétiques et déterministes : les six sections du
+digest, des paragraphes avec noms en gras, liens et URL, des listes
+imbriquées et la note de fin en italique. Chaque taille multiplie le
+nombre d'éléments par section ; --mots règle la longueur des paragraphes.
+
+Usage :
+  python benchmarks/bench_rendu.py                   # tailles 1, 10 et 100
+  python benchmarks/bench_rendu.py -t 1 50 -n 20     # tailles et répétitions
+  python benchmarks/bench_rendu.py --mots 2000       # paragraphes très longs
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mailer import construire_html, markdown_to_html  # noqa: E402
+
+SECTIONS = ["🗣️ Ce qui s'est dit", "✅ Ce qui s'est passé", "🔍 Ce qui se trame",
+            "⚡ Ce qui fait réagir", "📅 Ce qui s'en vient", "🍁 Ontario ailleurs au Canada"]
+MOTS = (
+    "budget santé éducation infrastructure logement énergie transport emploi "
+    "agriculture environnement justice finances municipalités programme fonds "
+    "annonce investissement consultation règlement projet communauté région"
+).split()
+NOMS = ["Jean Tremblay", "Marie Gagnon", "Sarah Chen", "David Singh", "Amélie Roy"]
+
+
+# ---------------------------------------------------------------------------
+# Digest synthétique
+# ---------------------------------------------------------------------------
+def digest_synthetique(taille: int, mots: int, graine: int = 1) -> str:
+    alea = random.Random(graine)
+
+    def phrase(n: int) -> str:
+        morceaux = []
+        for _ in range(n):
+            tirage = alea.random()
+            if tirage < 0.04:
+                morceaux.append(f"**{alea.choice(NOMS)}**")
+            elif tirage < 0.06:
+                morceaux.append(f"*{alea.choice(MOTS)}*")
+            elif tirage < 0.07:
+                morceaux.append(f"[{alea.choice(MOTS)}](https://news.ontario.ca/fr/{alea.randrange(10**6)})")
+            elif tirage < 0.075:
+                morceaux.append(f"https://www.ola.org/fr/hansard/{alea.randrange(10**6)}")
+            else:
+                morceaux.append(alea.choice(MOTS))
+        return " ".join(morceaux).capitalize() + "."
+
+    lignes = ["# Digest politique ontarien", ""]
+    for section in SECTIONS:
+        lignes += [f"## {section}", ""]
+        for _ in range(taille):
+            lignes += [f"**{alea.choice(NOMS)}** — {phrase(mots)} **Potentiel journalistique : moyen** "
+                       f"— {phrase(15)}", ""]
+            for _ in range(3):
+                lignes.append(f"- {phrase(25)}")
+                for _ in range(2):
+                    lignes.append(f"  - {phrase(12)}")
+            lignes.append("")
+        lignes += ["---", ""]
+    lignes.append("*Digest généré automatiquement le 17 octobre 2026 à partir de sources officielles.*")
+    return "\n".join(lignes)
+
+
+# ---------------------------------------------------------------------------
+# Ancien convertisseur (mailer.markdown_to_html avant la réécriture)
+# ---------------------------------------------------------------------------
+def _avant(texte: str) -> str:
+    lignes = texte.split("\n")
+    html_lignes = []
+    in_list = False
+
+    for ligne in lignes:
+        if ligne.startswith("## "):
+            if in_list:
+                html_lignes.append("</ul>")
+                in_list = False
+            contenu = ligne[3:].strip()
+            html_lignes.append(
+                f'<h2 style="color:#1a3a5c;border-bottom:2px solid #c8102e;'
+                f'padding-bottom:6px;margin-top:30px;">{contenu}</h2>'
+            )
+        elif ligne.startswith("# "):
+            contenu = ligne[2:].strip()
+            html_lignes.append(f'<h1 style="color:#1a3a5c;">{contenu}</h1>')
+        elif ligne.startswith("- ") or ligne.startswith("* "):
+            if not in_list:
+                html_lignes.append("<ul>")
+                in_list = True
+            html_lignes.append(f"<li>{ligne[2:].strip()}</li>")
+        elif ligne.startswith("**") and ligne.endswith("**") and len(ligne) > 4:
+            if in_list:
+                html_lignes.append("</ul>")
+                in_list = False
+            contenu = ligne[2:-2]
+            html_lignes.append(f"<p><strong>{contenu}</strong></p>")
+        elif ligne.strip().startswith("*") and ligne.strip().endswith("*") and len(ligne.strip()) > 2:
+            if in_list:
+                html_lignes.append("</ul>")
+                in_list = False
+            contenu = ligne.strip()[1:-1]
+            html_lignes.append(
+                f'<p style="color:#888;font-style:italic;font-size:13px;">{contenu}</p>'
+            )
+        elif ligne.strip() == "---":
+            if in_list:
+                html_lignes.append("</ul>")
+                in_list = False
+            html_lignes.append("<hr>")
+        elif ligne.strip() == "":
+            if in_list:
+                html_lignes.append("</ul>")
+                in_list = False
+            html_lignes.append("")
+        else:
+            processed = ligne.strip()
+            while "**" in processed:
+                start = processed.find("**")
+                end = processed.find("**", start + 2)
+                if end == -1:
+                    break
+                processed = (
+                    processed[:start]
+                    + "<strong>"
+                    + processed[start + 2:end]
+                    + "</strong>"
+                    + processed[end + 2:]
+                )
+            if processed:
+                if in_list:
+                    html_lignes.append("</ul>")
+                    in_list = False
+                html_lignes.append(f"<p>{processed}</p>")
+
+    if in_list:
+        html_lignes.append("</ul>")
+
+    return "\n".join(html_lignes)
+
+
+def chronometrer(fn, texte: str, repetitions: int) -> float:
+    """Durée médiane (ms) de fn(texte) sur `repetitions` exécutions."""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fn(texte)
+        durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return durees[len(durees) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-t", "--tailles", type=int, nargs="+", default=[1, 10, 100],
+                        help="éléments par section")
+    parser.add_argument("--mots", type=int, default=120, help="mots par paragraphe")
+    parser.add_argument("-n", "--repetitions", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'taille':>6} {'Ko':>7} {'avant ms':>9} {'après ms':>9} {'gain':>6} {'courriel ms':>12}")
+    for taille in args.tailles:
+        texte = digest_synthetique(taille, args.mots)
+        avant = chronometrer(_avant, texte, args.repetitions)
+        apres = chronometrer(markdown_to_html, texte, args.repetitions)
+        courriel = chronometrer(lambda t: construire_html(t, "samedi 17 octobre 2026"),
+                                texte, args.repetitions)
+        print(f"{taille:>6} {len(texte.encode('utf-8')) / 1024:7.0f} {avant:9.2f} {apres:9.2f} "
+              f"{avant / apres:5.1f}× {courriel:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
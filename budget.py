@@ -0,0 +1,228 @@
+"""
+budget.py — Budget de jetons du prompt et répartition entre les sources.
+
+Chaque source reçoit une part d'un budget total de jetons, proportionnelle à
+son poids (remplissage par niveaux : une source qui demande moins que sa part
+cède le surplus aux autres). Dans chaque source, les éléments de moindre
+valeur sont retirés les premiers (les derniers de la liste, les suivis déjà
+couverts, les décrets sans nom) ; une source d'un seul tenant, comme le
+Hansard, est tronquée en fin de texte, sur une limite de ligne.
+
+Les jetons sont estimés localement (caractères par jeton), ratio recalibré
+à chaque exécution sur le point d'accès de comptage de jetons de l'API et
+mémorisé pour les exécutions où ce point d'accès ne répond pas.
+
+Variables d'environnement :
+  DIGEST_BUDGET_TOKENS — budget de jetons des sources dans le prompt (défaut : 30000)
+  DIGEST_CALIBRAGE     — « 0 » pour ne pas recalibrer l'estimateur via l'API
+"""
+
+import json
+import math
+import os
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+from empreintes import SOURCE_INTERPROV, SOURCE_NEWS, SOURCE_OIC, decouper
+from extraits import CARACTERES_PAR_JETON
+
+BUDGET_TOTAL = int(os.environ.get("DIGEST_BUDGET_TOKENS", "30000"))
+CALIBRAGE = os.environ.get("DIGEST_CALIBRAGE", "1").strip() != "0"
+CALIBRAGE_FICHIER = Path(__file__).parent / ".cache" / "calibrage_jetons.json"
+# Au-delà, l'échantillon envoyé au comptage de jetons est tronqué
+CALIBRAGE_MAX_CHARS = 200_000
+
+# Poids relatifs des sources dans le partage du budget
+POIDS_SOURCES = {
+    SOURCE_NEWS: 3,
+    "Hansard — Assemblée législative de l'Ontario": 3,
+    SOURCE_OIC: 3,
+    "Registre de la réglementation de l'Ontario": 2,
+    "Registre des lobbyistes": 2,
+    SOURCE_INTERPROV: 2,
+    "Gazette de l'Ontario": 1,
+}
+POIDS_DEFAUT = 1
+
+# Enveloppe ajoutée par generate_digest autour de chaque source
+_ENVELOPPE = "\n\n{s}\nSOURCE : {nom}\n{s}\n"
+# En deçà, il ne vaut pas la peine de tronquer un élément pour le garder
+TRONCATURE_MIN = 120
+
+Allocation = namedtuple("Allocation", "source poids demande allouee utilisee omis")
+
+
+class EstimateurJetons:
+    """Estimation locale du nombre de jetons, calibrée sur le comptage de l'API."""
+
+    def __init__(self, caracteres_par_jeton: float = CARACTERES_PAR_JETON):
+        self.caracteres_par_jeton = caracteres_par_jeton
+        self.calibre = False
+        try:
+            with open(CALIBRAGE_FICHIER, encoding="utf-8") as f:
+                self.caracteres_par_jeton = float(json.load(f)["caracteres_par_jeton"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def estimer(self, texte: str) -> int:
+        return math.ceil(len(texte or "") / self.caracteres_par_jeton)
+
+    def caracteres(self, jetons: int) -> int:
+        """Nombre de caractères tenant dans `jetons` jetons."""
+        return int(jetons * self.caracteres_par_jeton)
+
+    def calibrer(self, client, modele: str, textes: list) -> None:
+        """
+        Recalcule le ratio caractères/jeton sur `textes` avec
+        client.messages.count_tokens ; en cas d'échec, garde le ratio mémorisé.
+        """
+        echantillon = "\n\n".join(t for t in textes if t)[:CALIBRAGE_MAX_CHARS]
+        if not CALIBRAGE or len(echantillon) < 1000:
+            return
+        try:
+            vide = client.messages.count_tokens(
+                model=modele, messages=[{"role": "user", "content": "."}]
+            ).input_tokens
+            plein = client.messages.count_tokens(
+                model=modele, messages=[{"role": "user", "content": echantillon}]
+            ).input_tokens
+        except Exception as e:
+            print(f"    ⚠ Calibrage des jetons impossible ({type(e).__name__}) — "
+                  f"ratio conservé : {self.caracteres_par_jeton:.2f} car./jeton")
+            return
+        if plein <= vide:
+            return
+        self.caracteres_par_jeton = len(echantillon) / (plein - vide)
+        self.calibre = True
+        try:
+            CALIBRAGE_FICHIER.parent.mkdir(parents=True, exist_ok=True)
+            with open(CALIBRAGE_FICHIER, "w", encoding="utf-8") as f:
+                json.dump({
+                    "caracteres_par_jeton": round(self.caracteres_par_jeton, 4),
+                    "modele": modele,
+                    "date": datetime.now().isoformat(timespec="seconds"),
+                }, f)
+        except OSError:
+            pass
+
+
+def _rang(source: str, index: int, texte: str) -> tuple:
+    """Clé de priorité d'un élément : les plus petites clés sont gardées d'abord."""
+    suivi = texte.startswith("[SUIVI")
+    sans_nom = source == SOURCE_OIC and "PERSONNES/ENTITÉS EN GRAS" not in texte
+    return (suivi, sans_nom, index)
+
+
+_MARQUE_TRONCATURE = "\n[… tronqué — budget de jetons]"
+_MARQUE_OMIS = "[… {n} élément(s) de moindre priorité omis — budget de jetons]"
+
+
+def _tronquer(texte: str, max_chars: int) -> str:
+    """Coupe `texte` à `max_chars` caractères (marque comprise), sur la dernière fin de ligne."""
+    if len(texte) <= max_chars:
+        return texte
+    max_chars = max(max_chars - len(_MARQUE_TRONCATURE), 0)
+    coupe = texte.rfind("\n", 0, max_chars)
+    if coupe < max_chars // 2:
+        coupe = texte.rfind(" ", 0, max_chars)
+    return texte[:max(coupe, 0)].rstrip() + _MARQUE_TRONCATURE
+
+
+def _niveaux(demandes: dict, poids: dict, total: int) -> dict:
+    """Remplissage par niveaux : parts proportionnelles aux poids, surplus redistribué."""
+    parts = {}
+    restants = dict(demandes)
+    budget = total
+    while restants:
+        somme = sum(poids[nom] for nom in restants)
+        satisfaits = {
+            nom: demande for nom, demande in restants.items()
+            if demande <= budget * poids[nom] / somme
+        }
+        if not satisfaits:
+            for nom in restants:
+                parts[nom] = int(budget * poids[nom] / somme)
+            break
+        for nom, demande in satisfaits.items():
+            parts[nom] = demande
+            budget -= demande
+            del restants[nom]
+    return parts
+
+
+def _ajuster(nom: str, contenu: str, part: int, estimateur: EstimateurJetons) -> tuple:
+    """Contenu de `nom` ramené à `part` jetons : (contenu, jetons, éléments omis)."""
+    entete, textes, separateur = decouper(nom, contenu)
+    enveloppe = estimateur.estimer(_ENVELOPPE.format(s="=" * 60, nom=nom))
+    fixe = enveloppe + estimateur.estimer(entete)
+    if fixe >= part or not textes:
+        texte = _tronquer(contenu, estimateur.caracteres(max(part - enveloppe, 0)))
+        return texte, enveloppe + estimateur.estimer(texte), len(textes)
+
+    # Place réservée à la mention des éléments omis
+    reste = part - fixe - estimateur.estimer(separateur + _MARQUE_OMIS.format(n=999))
+    gardes = {}
+    ordre = sorted(range(len(textes)), key=lambda i: _rang(nom, i, textes[i]))
+    for i in ordre:
+        cout = estimateur.estimer(textes[i] + separateur)
+        if cout <= reste:
+            gardes[i] = textes[i]
+            reste -= cout
+            continue
+        if reste >= TRONCATURE_MIN:
+            gardes[i] = _tronquer(textes[i], estimateur.caracteres(reste - estimateur.estimer(separateur)))
+            reste = 0
+        break
+    omis = len(textes) - len(gardes)
+    texte = entete + separateur.join(gardes[i] for i in sorted(gardes))
+    if omis:
+        texte += separateur + _MARQUE_OMIS.format(n=omis)
+    return texte, fixe + estimateur.estimer(texte[len(entete):]), omis
+
+
+def repartir(sources: dict, total: int = None, estimateur: EstimateurJetons = None) -> tuple:
+    """
+    Répartit `total` jetons (défaut : DIGEST_BUDGET_TOKENS) entre les sources.
+    Retourne (sources_ajustées, [Allocation]) ; les sources qui tiennent dans
+    leur part sont rendues telles quelles.
+    """
+    total = BUDGET_TOTAL if total is None else total
+    estimateur = estimateur or ESTIMATEUR
+    demandes = {
+        nom: estimateur.estimer(_ENVELOPPE.format(s="=" * 60, nom=nom) + (contenu or ""))
+        for nom, contenu in sources.items()
+    }
+    poids = {nom: POIDS_SOURCES.get(nom, POIDS_DEFAUT) for nom in sources}
+    parts = _niveaux(demandes, poids, total)
+
+    ajustees = {}
+    rapport = []
+    for nom, contenu in sources.items():
+        if demandes[nom] <= parts[nom]:
+            ajustees[nom] = contenu
+            utilisee, omis = demandes[nom], 0
+        else:
+            ajustees[nom], utilisee, omis = _ajuster(nom, contenu or "", parts[nom], estimateur)
+        rapport.append(Allocation(nom, poids[nom], demandes[nom], parts[nom], utilisee, omis))
+    return ajustees, rapport
+
+
+def afficher_repartition(rapport: list, total: int = None,
+                         estimateur: EstimateurJetons = None) -> None:
+    """Affiche la répartition finale du budget de jetons."""
+    total = BUDGET_TOTAL if total is None else total
+    estimateur = estimateur or ESTIMATEUR
+    demande = sum(a.demande for a in rapport)
+    utilisee = sum(a.utilisee for a in rapport)
+    origine = "calibré via l'API" if estimateur.calibre else "estimation locale"
+    print(f"🧮 Budget de jetons : {utilisee} / {total} utilisés "
+          f"(demande brute : {demande} ; {estimateur.caracteres_par_jeton:.2f} car./jeton, {origine})")
+    for a in rapport:
+        marque = "✂" if a.utilisee < a.demande else "✓"
+        omis = f", {a.omis} élément(s) omis" if a.omis else ""
+        print(f"    {marque} {a.source[:50]:<50} {a.utilisee:>6} / {a.demande:<6} jetons "
+              f"(part {a.allouee}, poids {a.poids}{omis})")
+
+
+ESTIMATEUR = EstimateurJetons()
@@ -0,0 +1,217 @@
+"""
+diffusion.py — Envoi du digest à une liste de diffusion par l'API d'envoi groupé de Resend.
+
+Le HTML est rendu une seule fois par l'appelant ; les destinataires sont
+répartis en lots (POST /emails/batch, 100 courriels au plus par appel, un
+courriel par destinataire pour que personne ne voie les autres adresses),
+envoyés en parallèle (parallel.executer_en_parallele) et espacés par un
+seau à jetons (scheduler.SeauJetons) réglé sur la limite de débit de
+Resend.
+
+Une réponse 429, une erreur 5xx ou une coupure réseau fait patienter le
+lot — durée indiquée par retry-after ou ratelimit-reset, sinon délai
+exponentiel avec gigue — puis le relance. Chaque lot porte une clé
+d'idempotence dérivée de son contenu : une tentative répétée, ou une
+exécution relancée le même jour avec le même digest, n'envoie rien deux
+fois. Les quotas journalier et mensuel épuisés ne sont pas retentés.
+
+Les lots sont validés en mode « permissive » : une adresse refusée par
+Resend n'empêche pas l'envoi aux autres. Le sort de chaque destinataire
+(envoyé avec son identifiant Resend, rejeté avec le motif, en échec avec
+l'erreur du lot) est inscrit dans un bilan JSON.
+
+Variables d'environnement :
+  RECIPIENT_EMAIL        — destinataire(s), séparés par des virgules
+  DESTINATAIRES_FICHIER  — liste de diffusion, une adresse par ligne (« # » pour commenter)
+  DIFFUSION_TAILLE_LOT   — courriels par appel (défaut et maximum : 100)
+  DIFFUSION_PARALLELE    — appels simultanés (défaut : 4)
+  DIFFUSION_TAUX         — appels par seconde (défaut : 2, la limite par défaut de Resend)
+  DIFFUSION_TENTATIVES   — tentatives par lot (défaut : 5)
+  DIFFUSION_BILAN        — chemin du bilan JSON (défaut :
+                           .cache/diffusion/envoi-AAAAMMJJ-HHMMSS.json ; « 0 » pour ne pas l'écrire)
+  RESEND_API_URL         — http://127.0.0.1:8791 pour le serveur local
+                           stubs/resend_stub.py (tests de charge hors ligne)
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+import resend
+from resend.exceptions import ResendError
+
+from parallel import executer_en_parallele
+from profils import normaliser
+from scheduler import SeauJetons
+from telemetrie import portee
+
+TAILLE_LOT_MAX = 100
+TAILLE_LOT = max(1, min(TAILLE_LOT_MAX, int(os.environ.get("DIFFUSION_TAILLE_LOT", "100") or 100)))
+PARALLELE = max(1, int(os.environ.get("DIFFUSION_PARALLELE", "4") or 4))
+TAUX = float(os.environ.get("DIFFUSION_TAUX", "2") or 2)
+TENTATIVES = max(1, int(os.environ.get("DIFFUSION_TENTATIVES", "5") or 5))
+BILAN = os.environ.get("DIFFUSION_BILAN", "").strip()
+BILANS_DIR = Path(__file__).parent / ".cache" / "diffusion"
+
+DELAI_BASE = 1.0
+DELAI_MAX = 60.0
+# Types d'erreur 429 qu'une nouvelle tentative ne résoudra pas aujourd'hui
+QUOTAS_EPUISES = ("daily_quota_exceeded", "monthly_quota_exceeded")
+REJETS_AFFICHES = 10
+
+
+class EchecDiffusion(RuntimeError):
+    """Aucun destinataire n'a reçu le digest."""
+
+
+def destinataires() -> list:
+    """Adresses de RECIPIENT_EMAIL et de DESTINATAIRES_FICHIER, sans doublons, dans l'ordre."""
+    adresses = re.split(r"[,;\s]+", os.environ.get("RECIPIENT_EMAIL", ""))
+    fichier = os.environ.get("DESTINATAIRES_FICHIER", "").strip()
+    if fichier:
+        with open(fichier, encoding="utf-8") as f:
+            for ligne in f:
+                adresses += re.split(r"[,;\s]+", ligne.split("#", 1)[0])
+    vues = set()
+    uniques = []
+    for adresse in adresses:
+        cle = adresse.strip().lower()
+        if cle and cle not in vues:
+            vues.add(cle)
+            uniques.append(adresse.strip())
+    return uniques
+
+
+def _attente(erreur: ResendError, tentative: int) -> float:
+    """Délai avant une nouvelle tentative : celui qu'indique Resend, sinon exponentiel avec gigue."""
+    en_tetes = {k.lower(): v for k, v in (erreur.headers or {}).items()}
+    for cle in ("retry-after", "ratelimit-reset"):
+        try:
+            return min(DELAI_MAX, max(0.0, float(en_tetes[cle])))
+        except (KeyError, ValueError):
+            pass
+    return min(DELAI_MAX, DELAI_BASE * 2 ** tentative) * random.uniform(0.5, 1.0)
+
+
+def _retentable(erreur: ResendError) -> bool:
+    code = str(erreur.code)
+    if code == "429":
+        return erreur.error_type not in QUOTAS_EPUISES
+    return code.startswith("5")
+
+
+def _cle_idempotence(message: dict, adresses: list) -> str:
+    empreinte = hashlib.sha1()
+    for morceau in (message["from"], message["subject"], message["html"], *adresses):
+        empreinte.update(morceau.encode("utf-8"))
+        empreinte.update(b"\0")
+    return f"digest-{empreinte.hexdigest()[:32]}"
+
+
+def _envoyer_lot(message: dict, adresses: list, seau: SeauJetons, numero: int) -> dict:
+    """Envoie un lot, avec relances ; retourne {adresse: résultat}."""
+    courriels = [{**message, "to": [adresse]} for adresse in adresses]
+    options = {"idempotency_key": _cle_idempotence(message, adresses),
+               "batch_validation": "permissive"}
+    with portee("envoi groupé", "email", destinataires=len(adresses)) as p:
+        for tentative in range(TENTATIVES):
+            time.sleep(seau.reserver())
+            try:
+                reponse = resend.Batch.send(courriels, options)
+                break
+            except ResendError as e:
+                if not _retentable(e) or tentative == TENTATIVES - 1:
+                    p.noter(tentatives=tentative + 1)
+                    raise
+                attente = _attente(e, tentative)
+                p.ajouter(attente_s=attente)
+                print(f"    ⏳ Lot {numero} : {e.code} {e.error_type} — nouvelle tentative dans {attente:.1f} s")
+                time.sleep(attente)
+        p.noter(tentatives=tentative + 1)
+
+    rejets = {e.get("index"): e.get("message", "") for e in reponse.get("errors") or []}
+    identifiants = iter(reponse.get("data") or [])
+    resultats = {}
+    for i, adresse in enumerate(adresses):
+        if i in rejets:
+            resultats[adresse] = {"statut": "rejete", "lot": numero, "erreur": rejets[i]}
+        else:
+            envoi = next(identifiants, None) or {}
+            resultats[adresse] = {"statut": "envoye", "lot": numero, "id": envoi.get("id"),
+                                  "tentatives": tentative + 1}
+    return resultats
+
+
+def _ecrire_bilan(bilan: dict, debut: datetime, edition: str = None):
+    if BILAN == "0":
+        return None
+    suffixe = f"-{re.sub(r'[^a-z0-9]+', '-', normaliser(edition)).strip('-')}" if edition else ""
+    chemin = Path(BILAN.replace(".json", f"{suffixe}.json") if BILAN
+                  else BILANS_DIR / f"envoi-{debut:%Y%m%d-%H%M%S}{suffixe}.json")
+    try:
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(bilan, f, ensure_ascii=False, indent=1)
+    except OSError as e:
+        print(f"  ⚠ Bilan d'envoi non écrit : {e}")
+        return None
+    return chemin
+
+
+def diffuser(message: dict, adresses: list, edition: str = None) -> dict:
+    """
+    Envoie `message` (from, subject, html, text — déjà rendu) à chaque adresse ;
+    `edition` nomme l'édition ciblée (profils.py) dans l'affichage et le bilan.
+
+    Retourne {adresse: {"statut": "envoye" | "rejete" | "echec", ...}} ;
+    lève EchecDiffusion si personne n'a reçu le digest.
+    """
+    debut = datetime.now()
+    chrono = time.perf_counter()
+    lots = [adresses[i:i + TAILLE_LOT] for i in range(0, len(adresses), TAILLE_LOT)]
+    seau = SeauJetons(TAUX, max(1.0, TAUX))
+    nom = f" « {edition} »" if edition else ""
+    print(f"📧 Envoi du digest{nom} à {len(adresses)} destinataire(s) via Resend "
+          f"({len(lots)} lot(s), {min(PARALLELE, len(lots))} en parallèle)...")
+
+    taches = [(f"lot {n}/{len(lots)}", lambda lot=lot, n=n: _envoyer_lot(message, lot, seau, n))
+              for n, lot in enumerate(lots, 1)]
+    resultats = {}
+    for n, (res, lot) in enumerate(zip(executer_en_parallele(taches, max_workers=PARALLELE), lots), 1):
+        if res.erreur is None:
+            resultats.update(res.valeur)
+            continue
+        erreur = (f"{res.erreur.code} {res.erreur.error_type} : {res.erreur.message}"
+                  if isinstance(res.erreur, ResendError) else f"{type(res.erreur).__name__} : {res.erreur}")
+        print(f"    ⚠ Lot {n} non envoyé — {erreur}")
+        resultats.update({a: {"statut": "echec", "lot": n, "erreur": erreur} for a in lot})
+
+    comptes = {s: sum(1 for r in resultats.values() if r["statut"] == s)
+               for s in ("envoye", "rejete", "echec")}
+    duree = time.perf_counter() - chrono
+    chemin = _ecrire_bilan({
+        "debut": debut.isoformat(timespec="seconds"),
+        "duree_s": round(duree, 3),
+        "sujet": message["subject"],
+        "edition": edition,
+        "lots": len(lots),
+        "comptes": comptes,
+        "destinataires": resultats,
+    }, debut, edition)
+    rejets = [(a, r["erreur"]) for a, r in resultats.items() if r["statut"] == "rejete"]
+    for adresse, motif in rejets[:REJETS_AFFICHES]:
+        print(f"    ⚠ {adresse} rejeté : {motif}")
+    if len(rejets) > REJETS_AFFICHES:
+        print(f"    … et {len(rejets) - REJETS_AFFICHES} autre(s) (voir le bilan)")
+    print(f"{'✅' if comptes['envoye'] == len(adresses) else '⚠'} {comptes['envoye']}/{len(adresses)} "
+          f"courriel(s) envoyé(s) en {duree:.1f} s ({comptes['rejete']} rejeté(s), "
+          f"{comptes['echec']} en échec)" + (f" — bilan : {chemin}" if chemin else ""))
+    if adresses and not comptes["envoye"]:
+        raise EchecDiffusion(f"Aucun courriel envoyé ({comptes['rejete']} rejeté(s), "
+                             f"{comptes['echec']} en échec).")
+    return resultats
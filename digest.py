@@ -1,9 +1,64 @@
 """
 digest.py — Génération du digest quotidien avec l'API Claude.
+
+Deux modes de génération :
+  unique    — un seul appel (MODELE, réflexion adaptative) produit les six sections ;
+  mapreduce — des appels d'extraction parallèles, un par groupe de sources, sur un
+              modèle plus rapide, puis un court appel de synthèse qui assemble le
+              digest au même format à partir des notes extraites.
+Une édition de mise à jour (nouveautes.py) passe par generer_mise_a_jour() :
+un seul appel, sur une consigne courte, ne couvrant que ce qui a paru depuis
+la collecte précédente.
+Dans tous les cas, la durée et l'usage de jetons de chaque appel sont affichés
+et notés dans le rapport d'exécution (telemetrie.py).
+
+Les réponses sont lues en flux : le texte du digest peut s'afficher (ou s'écrire
+dans un fichier) au fil de sa production, et chaque appel mesure le délai du
+premier jeton, celui de la première section « ## » et le débit en jetons par
+seconde. Un flux muet pendant DIGEST_DELAI_BLOCAGE secondes est abandonné et
+l'appel est relancé une fois sur le modèle de secours.
+
+Variables d'environnement :
+  DIGEST_MODE         — « unique » (défaut), « mapreduce » ou « lot » (main.py délègue
+                        alors à lots.py : génération différée par l'API Message Batches)
+  DIGEST_MODELE_MAP   — modèle des appels d'extraction (défaut : claude-haiku-4-5)
+  DIGEST_FLUX         — « 1 » pour afficher le digest dans la console au fil de l'eau
+  DIGEST_FLUX_FICHIER — fichier où écrire le digest au fil de l'eau
+  DIGEST_DELAI_BLOCAGE — secondes sans aucun événement avant d'abandonner le flux (défaut : 90)
+  DIGEST_MODELE_SECOURS — modèle de relance après un blocage (défaut : claude-sonnet-4-5 ;
+                        vide pour désactiver la relance)
 """
 
+import os
+import sys
+import time
+
 import anthropic
-from datetime import datetime
+
+import budget
+from archive import maintenant
+from empreintes import SOURCE_INTERPROV, SOURCE_NEWS, SOURCE_OIC
+from parallel import executer_en_parallele
+from telemetrie import portee
+
+MODELE = "claude-opus-4-6"
+MODE = os.environ.get("DIGEST_MODE", "unique").strip().lower()
+MODELE_MAP = os.environ.get("DIGEST_MODELE_MAP", "claude-haiku-4-5")
+MODELE_SECOURS = os.environ.get("DIGEST_MODELE_SECOURS", "claude-sonnet-4-5").strip()
+FLUX_CONSOLE = os.environ.get("DIGEST_FLUX", "").strip() == "1"
+FLUX_FICHIER = os.environ.get("DIGEST_FLUX_FICHIER", "").strip()
+DELAI_BLOCAGE = float(os.environ.get("DIGEST_DELAI_BLOCAGE", "90"))
+
+# Groupes de sources du mode mapreduce : (nom, sources, sections visées)
+GROUPES_MAP = [
+    ("Assemblée législative", ["Hansard — Assemblée législative de l'Ontario"],
+     "🗣️ Ce qui s'est dit, ⚡ Ce qui fait réagir, 📅 Ce qui s'en vient"),
+    ("Gouvernement", [SOURCE_NEWS, SOURCE_OIC, "Gazette de l'Ontario"],
+     "✅ Ce qui s'est passé, ⚡ Ce qui fait réagir, 📅 Ce qui s'en vient"),
+    ("Registres", ["Registre des lobbyistes", "Registre de la réglementation de l'Ontario"],
+     "🔍 Ce qui se trame, 📅 Ce qui s'en vient"),
+    ("Interprovincial", [SOURCE_INTERPROV], "🍁 Ontario ailleurs au Canada"),
+]
 
 
 SYSTEM_PROMPT = """Tu es un analyste politique senior spécialisé dans la politique provinciale ontarienne.
@@ -17,48 +72,11 @@ ontarienne. N'y mentionne jamais d'événements survenus dans d'autres provinces
 canadiens, sauf s'ils affectent directement l'Ontario ou font l'objet d'une action du gouvernement
 ontarien. La section 6 (Ontario ailleurs au Canada) est la seule destinée au contenu interprovincial."""
 
-
-def generate_digest(sources: dict, seen_items: list = None) -> str:
-    """
-    Prend un dictionnaire {nom_source: contenu} et retourne
-    le digest quotidien en 5 sections, en français.
-
-    seen_items : liste d'éléments déjà couverts dans les digests précédents
-                 (décrets, communiqués) à ne pas répéter.
-    """
-    client = anthropic.Anthropic()  # Lit ANTHROPIC_API_KEY automatiquement
-
-    today = datetime.now().strftime("%A %d %B %Y")
-
-    # Assembler le contenu de toutes les sources
-    bloc_sources = ""
-    for nom, contenu in sources.items():
-        separateur = "=" * 60
-        bloc_sources += f"\n\n{separateur}\nSOURCE : {nom}\n{separateur}\n{contenu}"
-
-    # Bloc d'historique : éléments déjà couverts à ne pas répéter
-    bloc_historique = ""
-    if seen_items:
-        liste = "\n".join(f"- {item}" for item in seen_items)
-        bloc_historique = f"""
----
-
-ÉLÉMENTS DÉJÀ COUVERTS DANS LES DIGESTS RÉCENTS (14 derniers jours) — À NE PAS RÉPÉTER :
-{liste}
-
-Pour chacun de ces éléments : ne l'inclus dans aucune section du digest d'aujourd'hui,
-SAUF s'il y a une avancée significative et nouvelle (ex : nomination confirmée par l'assemblée,
-décret amendé, annonce d'une enquête). Dans ce cas, signale explicitement que c'est un suivi.
-
-"""
-
-    user_prompt = f"""Voici les contenus bruts récupérés ce matin ({today}) depuis les sources officielles
-de la politique provinciale ontarienne et des autres provinces canadiennes :
-{bloc_sources}
-{bloc_historique}
----
-
-Génère le digest quotidien structuré en EXACTEMENT 6 sections avec ce format :
+# Consignes de format et règles : identiques d'un appel à l'autre. Placées avec
+# SYSTEM_PROMPT avant tout contenu variable, elles forment un préfixe mis en
+# cache par l'API (cache_control) ; les sources puis la date viennent après.
+# Un préfixe plus court que le minimum du modèle n'est simplement pas mis en cache.
+CONSIGNES = """Génère le digest quotidien structuré en EXACTEMENT 6 sections avec ce format :
 
 ## 🗣️ Ce qui s'est dit
 [Débats parlementaires, déclarations d'élus, prises de position. Cite des noms et des partis.]
@@ -107,28 +125,411 @@ RÈGLES STRICTES :
 - Pour les Décrets du Conseil : si la source indique « PERSONNES/ENTITÉS EN GRAS DANS LE DÉCRET »,
   nomme chaque personne dans le digest. Pour les communiqués d'Ontario Newsroom, résume chaque
   communiqué pertinent en 2 phrases maximum.
+- Les éléments marqués « [SUIVI — déjà couvert le …] » ont figuré dans un digest récent et ont
+  changé depuis : ne les reprends que si l'avancée est significative et nouvelle (ex : nomination
+  confirmée par l'assemblée, décret amendé, annonce d'une enquête), en signalant que c'est un suivi.
+- Une ligne « AUSSI PUBLIÉ PAR » signale que le même texte a été publié par d'autres sources :
+  traite-le une seule fois, en citant au besoin ces autres sources.
 - Utilise le français canadien (ex : « courriel », « gouvernement », « première ministre »).
-- Termine le digest par : *Digest généré automatiquement le {today} à partir de sources officielles.*"""
+- Termine le digest par : *Digest généré automatiquement le [date du jour indiquée avec les sources] à partir de sources officielles.*"""
+
+
+def blocs_systeme() -> list:
+    """Blocs système : rôle puis consignes, avec un point de cache après les consignes."""
+    return [
+        {"type": "text", "text": SYSTEM_PROMPT},
+        {"type": "text", "text": CONSIGNES, "cache_control": {"type": "ephemeral"}},
+    ]
+
+
+def afficher_usage(usage) -> None:
+    """Affiche les jetons consommés, dont les écritures et lectures du cache de prompt."""
+    ecrits = getattr(usage, "cache_creation_input_tokens", None) or 0
+    lus = getattr(usage, "cache_read_input_tokens", None) or 0
+    print(f"    🧾 Jetons : {usage.input_tokens} en entrée (hors cache), "
+          f"{ecrits} écrits en cache, {lus} lus depuis le cache, {usage.output_tokens} en sortie")
+
+
+CONSIGNES_MAP = """Tu prépares des notes pour un digest rédigé ensuite par un autre analyste.
+À partir des sources fournies, extrais tous les faits utiles aux sections indiquées :
+qui, quoi, quel ministère ou organisme, numéros de projets de loi, dates, liens. Pour chaque
+décret contenant une ligne « PERSONNES/ENTITÉS EN GRAS DANS LE DÉCRET », reprends tous les noms.
+Conserve les marques « [SUIVI — …] » et « AUSSI PUBLIÉ PAR ». Notes en français, en puces
+concises, sans mise en forme de digest ni introduction. N'invente rien ; si les sources ne
+contiennent rien d'utile, écris seulement « Rien à signaler »."""
+
+
+CONSIGNES_MISE_A_JOUR = """Tu rédiges une MISE À JOUR du digest quotidien, pour des lecteurs qui ont déjà
+reçu l'édition précédente. Les sources ci-dessous ne contiennent QUE ce qui a paru depuis : nouveaux
+communiqués, décrets et extraits, et lignes nouvelles des pages suivies (« […] » marque du texte omis
+car déjà lu ; la ligne qui suit « […] » est un rappel de contexte, déjà connu).
+
+Reprends uniquement les sections du digest quotidien où il y a du nouveau, avec les mêmes titres :
+## 🗣️ Ce qui s'est dit, ## ✅ Ce qui s'est passé, ## 🔍 Ce qui se trame, ## ⚡ Ce qui fait réagir,
+## 📅 Ce qui s'en vient, ## 🍁 Ontario ailleurs au Canada (même format « **[Province]** — … »).
+Dans chaque section, des puces brèves (une ou deux phrases), avec noms, ministères et numéros de
+projets de loi. Pas de minimum par section ; n'écris rien sur les sections sans nouveauté.
+
+Ignore ce qui n'a pas de portée : mises en page, menus, dates de mise à jour, reformulations de ce
+qui était déjà publié. Les règles du digest quotidien s'appliquent (décrets : nomme chaque personne ;
+« [SUIVI — …] » : seulement une avancée significative ; « AUSSI PUBLIÉ PAR » : une seule fois ;
+français canadien ; rien d'inventé).
+
+Si rien ne mérite d'être signalé, réponds exactement RIEN_DE_NOUVEAU, sans autre texte.
+Sinon, termine par : *Mise à jour générée automatiquement le [date et heure indiquées avec les sources] à partir de sources officielles.*"""
+
+# Réponse du modèle quand les nouveautés ne justifient pas de courriel
+RIEN_DE_NOUVEAU = "RIEN_DE_NOUVEAU"
+
+
+def _assembler_sources(sources: dict) -> str:
+    separateur = "=" * 60
+    return "".join(
+        f"\n\n{separateur}\nSOURCE : {nom}\n{separateur}\n{contenu}"
+        for nom, contenu in sources.items()
+    )
+
+
+def texte_message(message) -> str:
+    """Texte d'une réponse de l'API, sans les blocs de réflexion."""
+    return "".join(bloc.text for bloc in message.content if bloc.type == "text")
+
+
+def requete_digest(sources: dict, today: str, bloc_historique: str = "",
+                   consigne: str = "Génère le digest selon les consignes.") -> dict:
+    """
+    Paramètres d'un appel messages.create / messages.stream produisant le
+    digest à partir de `sources` (déjà ramenées au budget de jetons).
+    Également utilisé tel quel pour les requêtes de lots (lots.py).
+    """
+    # Sources d'abord, date ensuite : une relance sur les mêmes sources (nouvel essai,
+    # variante du digest) relit du cache tout le préfixe jusqu'au second point de cache.
+    contenu_utilisateur = [
+        {
+            "type": "text",
+            "text": f"""Voici les contenus bruts récupérés depuis les sources officielles
+de la politique provinciale ontarienne et des autres provinces canadiennes :
+{_assembler_sources(sources)}
+{bloc_historique}""",
+            "cache_control": {"type": "ephemeral"},
+        },
+        {"type": "text", "text": f"Date du jour : {today}. {consigne}"},
+    ]
+    return {
+        "model": MODELE,
+        "max_tokens": 4000,
+        "thinking": {"type": "adaptive"},
+        "system": blocs_systeme(),
+        "messages": [{"role": "user", "content": contenu_utilisateur}],
+    }
+
+
+class MesuresFlux:
+    """Repères temporels d'une réponse en flux (secondes depuis l'envoi)."""
+
+    __slots__ = ("debut", "premier_jeton", "premier_texte", "premiere_section", "fin", "jetons",
+                 "reflexion")
 
-    print("🤖 Génération du digest avec Claude (claude-opus-4-6)...")
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.premier_jeton = self.premier_texte = self.premiere_section = self.fin = None
+        self.jetons = 0
+        self.reflexion = 0  # caractères de réflexion reçus (l'usage ne les distingue pas)
 
-    with client.messages.stream(
-        model="claude-opus-4-6",
-        max_tokens=4000,
-        thinking={"type": "adaptive"},
-        system=SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": user_prompt}],
-    ) as stream:
+    def ecoule(self) -> float:
+        return time.perf_counter() - self.debut
+
+    def debit(self) -> float:
+        """Jetons de sortie par seconde, depuis le premier jeton."""
+        if self.premier_jeton is None or self.fin is None or self.fin <= self.premier_jeton:
+            return 0.0
+        return self.jetons / (self.fin - self.premier_jeton)
+
+    def resume(self) -> str:
+        def repere(valeur):
+            return f"{valeur:.1f} s" if valeur is not None else "—"
+        return (f"premier jeton {repere(self.premier_jeton)}, premier texte {repere(self.premier_texte)}, "
+                f"première section {repere(self.premiere_section)}, total {repere(self.fin)}, "
+                f"{self.debit():.0f} jetons/s")
+
+
+class _SortieFlux:
+    """Destinations du texte au fil de l'eau : console et/ou fichier, vidées à chaque écriture."""
+
+    def __init__(self, actif: bool):
+        self.console = actif and FLUX_CONSOLE
+        self.fichier = open(FLUX_FICHIER, "w", encoding="utf-8") if actif and FLUX_FICHIER else None
+
+    def ecrire(self, texte: str) -> None:
+        if self.console:
+            sys.stdout.write(texte)
+            sys.stdout.flush()
+        if self.fichier:
+            self.fichier.write(texte)
+            self.fichier.flush()
+
+    def fermer(self) -> None:
+        if self.console:
+            sys.stdout.write("\n")
+        if self.fichier:
+            self.fichier.close()
+
+
+def _lire_flux(client, parametres: dict, sortie: _SortieFlux) -> tuple:
+    """Lit la réponse événement par événement : (message final, MesuresFlux)."""
+    mesures = MesuresFlux()
+    texte_recu = ""
+    # Le délai s'applique entre deux lectures : l'API envoie des « ping » pendant la
+    # réflexion, si bien qu'un flux muet aussi longtemps est effectivement bloqué.
+    with client.messages.stream(**parametres, timeout=DELAI_BLOCAGE) as stream:
+        for evenement in stream:
+            if evenement.type != "content_block_delta":
+                continue
+            if mesures.premier_jeton is None:
+                mesures.premier_jeton = mesures.ecoule()
+            if evenement.delta.type == "thinking_delta":
+                mesures.reflexion += len(evenement.delta.thinking)
+            if evenement.delta.type != "text_delta":
+                continue
+            if mesures.premier_texte is None:
+                mesures.premier_texte = mesures.ecoule()
+            texte_recu += evenement.delta.text
+            if mesures.premiere_section is None and (
+                texte_recu.startswith("## ") or "\n## " in texte_recu
+            ):
+                mesures.premiere_section = mesures.ecoule()
+            sortie.ecrire(evenement.delta.text)
         final = stream.get_final_message()
+    mesures.fin = mesures.ecoule()
+    mesures.jetons = final.usage.output_tokens
+    return final, mesures
+
+
+def _est_interruption(erreur: Exception) -> bool:
+    """
+    Vrai pour un flux bloqué ou coupé : erreurs de délai et de connexion du SDK,
+    erreur serveur (dont surcharge), et erreurs de transport levées en cours de
+    lecture du flux, que le SDK ne réemballe pas.
+    """
+    if isinstance(erreur, (anthropic.APITimeoutError, anthropic.APIConnectionError,
+                           anthropic.InternalServerError, TimeoutError)):
+        return True
+    return type(erreur).__module__.split(".")[0] in ("httpx", "httpcore", "httpx2")
+
+
+def _appeler(client, nom: str, parametres: dict, afficher: bool = False) -> tuple:
+    """
+    Un appel en flux : retourne (texte, usage, durée en secondes).
+    Avec `afficher`, le texte est écrit au fil de l'eau (DIGEST_FLUX, DIGEST_FLUX_FICHIER).
+    Un flux bloqué ou coupé est relancé une fois sur MODELE_SECOURS.
+    """
+    debut = time.perf_counter()
+    sortie = _SortieFlux(afficher)
+    with portee(nom, "llm", modele=parametres["model"]) as p:
+        try:
+            try:
+                final, mesures = _lire_flux(client, parametres, sortie)
+            except Exception as e:
+                if (not _est_interruption(e) or not MODELE_SECOURS
+                        or parametres["model"] == MODELE_SECOURS):
+                    raise
+                print(f"\n    ⚠ {nom} : flux bloqué ou coupé après {time.perf_counter() - debut:.1f} s "
+                      f"({type(e).__name__}) — relance sur {MODELE_SECOURS}")
+                sortie.ecrire(f"\n\n[… flux interrompu, relance sur {MODELE_SECOURS} …]\n\n")
+                p.noter(interruption=type(e).__name__, modele=MODELE_SECOURS)
+                # Le modèle de secours ne reçoit pas forcément les mêmes options de réflexion
+                secours = {k: v for k, v in parametres.items() if k != "thinking"}
+                secours["model"] = MODELE_SECOURS
+                final, mesures = _lire_flux(client, secours, sortie)
+        finally:
+            sortie.fermer()
+        p.noter(
+            premier_jeton_s=mesures.premier_jeton, premier_texte_s=mesures.premier_texte,
+            jetons_reflexion_estimes=round(mesures.reflexion / budget.ESTIMATEUR.caracteres_par_jeton),
+            **{champ: getattr(final.usage, champ, None) or 0
+               for champ in ("input_tokens", "cache_creation_input_tokens",
+                             "cache_read_input_tokens", "output_tokens")},
+        )
+    duree = time.perf_counter() - debut
+    print(f"    ⏱ {nom} ({final.model}) : {duree:.1f} s — {mesures.resume()}")
+    afficher_usage(final.usage)
+    return texte_message(final), final.usage, duree
+
+
+def _generer_unique(client, sources: dict, bloc_historique: str, today: str) -> tuple:
+    print(f"🤖 Génération du digest avec Claude ({MODELE})...")
+    texte, usage, _ = _appeler(client, "Digest", requete_digest(sources, today, bloc_historique),
+                               afficher=True)
+    return texte, [usage]
+
+
+def _generer_mapreduce(client, sources: dict, bloc_historique: str, today: str) -> tuple:
+    # Les sources hors groupe forment un groupe « Autres sources »
+    groupes = [(nom, [s for s in noms if s in sources], sections)
+               for nom, noms, sections in GROUPES_MAP]
+    couvertes = {s for _, noms, _ in groupes for s in noms}
+    autres = [s for s in sources if s not in couvertes]
+    if autres:
+        groupes.append(("Autres sources", autres, "toutes les sections pertinentes"))
+    groupes = [g for g in groupes if g[1]]
+
+    system_map = [
+        {"type": "text", "text": SYSTEM_PROMPT},
+        {"type": "text", "text": CONSIGNES_MAP, "cache_control": {"type": "ephemeral"}},
+    ]
+
+    def extraction(nom, noms, sections):
+        contenu = [{
+            "type": "text",
+            "text": f"Sections visées : {sections}.\n"
+                    f"{_assembler_sources({s: sources[s] for s in noms})}\n{bloc_historique}",
+        }]
+        return _appeler(client, f"Extraction — {nom}", {
+            "model": MODELE_MAP,
+            "max_tokens": 2000,
+            "system": system_map,
+            "messages": [{"role": "user", "content": contenu}],
+        })
+
+    print(f"🤖 Génération du digest en mode mapreduce : {len(groupes)} extraction(s) "
+          f"parallèle(s) ({MODELE_MAP}), puis synthèse ({MODELE})...")
+    resultats = executer_en_parallele(
+        [(nom, lambda g=(nom, noms, sections): extraction(*g)) for nom, noms, sections in groupes],
+        max_workers=len(groupes),
+    )
+    notes = []
+    usages = []
+    echecs = []
+    for res in resultats:
+        if res.erreur:
+            echecs.append(res.nom)
+            print(f"    ⚠ Extraction « {res.nom} » impossible : {type(res.erreur).__name__} : {res.erreur}")
+            notes.append(f"### {res.nom}\n(Extraction impossible : {type(res.erreur).__name__})")
+        else:
+            usages.append(res.valeur[1])
+            notes.append(f"### {res.nom}\n{res.valeur[0].strip()}")
+
+    if len(echecs) == len(groupes):
+        # Aucune note : une synthèse ne produirait qu'un digest d'échecs
+        print("    ⚠ Aucune extraction réussie — génération en un seul appel sur les sources.")
+        return _generer_unique(client, sources, bloc_historique, today)
+
+    contenu_synthese = [
+        {
+            "type": "text",
+            "text": "Voici les notes extraites ce matin des sources officielles, "
+                    "groupées par type de source :\n\n" + "\n\n".join(notes),
+        },
+        {"type": "text", "text": f"Date du jour : {today}. Génère le digest selon les consignes, "
+                                 "à partir de ces notes uniquement."},
+    ]
+    texte, usage, _ = _appeler(client, "Synthèse", {
+        "model": MODELE,
+        "max_tokens": 4000,
+        "system": blocs_systeme(),
+        "messages": [{"role": "user", "content": contenu_synthese}],
+    }, afficher=True)
+    return texte, usages + [usage]
 
-    # Extraire uniquement le texte (ignorer les blocs de réflexion)
-    texte = ""
-    for bloc in final.content:
-        if bloc.type == "text":
-            texte += bloc.text
+
+def preparer_sources(client, sources: dict) -> dict:
+    """Sources ramenées au budget de jetons (budget.py), répartition affichée."""
+    with portee("assemblage du prompt", "prompt", sources=len(sources)) as p:
+        budget.ESTIMATEUR.calibrer(client, MODELE, list(sources.values()))
+        sources, repartition = budget.repartir(sources)
+        p.noter(jetons_demandes=sum(a.demande for a in repartition),
+                jetons_estimes=sum(a.utilisee for a in repartition),
+                elements_omis=sum(a.omis for a in repartition))
+    budget.afficher_repartition(repartition)
+    return sources
+
+
+def bloc_historique(seen_items: list = None) -> str:
+    """
+    Liste d'éléments à ne pas répéter. Les éléments déjà couverts sont retirés
+    des sources en amont (empreintes.py) et les suivis sont marqués « [SUIVI — …] »
+    (voir CONSIGNES) : ce bloc reste vide dans le pipeline quotidien.
+    """
+    if not seen_items:
+        return ""
+    liste = "\n".join(f"- {item}" for item in seen_items)
+    return f"""
+ÉLÉMENTS DÉJÀ COUVERTS DANS LES DIGESTS RÉCENTS — À NE PAS RÉPÉTER :
+{liste}
+"""
+
+
+def generate_digest(sources: dict, seen_items: list = None) -> str:
+    """
+    Prend un dictionnaire {nom_source: contenu} et retourne
+    le digest quotidien en 6 sections, en français (mode DIGEST_MODE).
+
+    seen_items : liste facultative d'éléments déjà couverts à ne pas répéter.
+                 Les doublons sont normalement retirés des sources en amont
+                 (empreintes.dedupliquer_sources) ; cette liste n'est utile
+                 que pour des éléments qui n'ont pas pu être retirés ainsi.
+    """
+    client = anthropic.Anthropic()  # Lit ANTHROPIC_API_KEY automatiquement
+
+    today = maintenant().strftime("%A %d %B %Y")
+
+    sources = preparer_sources(client, sources)
+    historique = bloc_historique(seen_items)
+
+    debut = time.perf_counter()
+    if MODE == "mapreduce":
+        texte, usages = _generer_mapreduce(client, sources, historique, today)
+    else:
+        texte, usages = _generer_unique(client, sources, historique, today)
+    total = {
+        champ: sum(getattr(u, champ, None) or 0 for u in usages)
+        for champ in ("input_tokens", "cache_creation_input_tokens",
+                      "cache_read_input_tokens", "output_tokens")
+    }
+    print(f"⏱ Génération ({MODE}, {len(usages)} appel(s)) : {time.perf_counter() - debut:.1f} s — "
+          f"{total['input_tokens']} jetons en entrée, {total['cache_creation_input_tokens']} écrits "
+          f"et {total['cache_read_input_tokens']} lus en cache, {total['output_tokens']} en sortie")
 
     if not texte.strip():
         return "Erreur : Claude n'a pas pu générer de digest. Vérifiez votre clé API."
 
     print("✅ Digest généré avec succès.")
     return texte
+
+
+def generer_mise_a_jour(sources: dict, depuis) -> str | None:
+    """
+    Édition de mise à jour : `sources` ne contient que ce qui a paru depuis
+    la collecte précédente (nouveautes.extraire_nouveautes), faite à `depuis`.
+    Retourne le Markdown de la mise à jour, ou None si le modèle juge que
+    rien ne mérite d'être signalé.
+    """
+    client = anthropic.Anthropic()
+
+    heure = maintenant()
+    sources = preparer_sources(client, sources)
+    print(f"🤖 Génération de la mise à jour avec Claude ({MODELE})...")
+    contenu = [
+        {
+            "type": "text",
+            "text": f"Voici ce qui a paru dans les sources officielles depuis la collecte précédente "
+                    f"({depuis:%A %d %B %Y à %H h %M}) :\n{_assembler_sources(sources)}",
+        },
+        {"type": "text", "text": f"Date et heure : {heure:%A %d %B %Y, %H h %M}. "
+                                 "Rédige la mise à jour selon les consignes."},
+    ]
+    texte, _, _ = _appeler(client, "Mise à jour", {
+        "model": MODELE,
+        "max_tokens": 2000,
+        "system": [
+            {"type": "text", "text": SYSTEM_PROMPT},
+            {"type": "text", "text": CONSIGNES_MISE_A_JOUR, "cache_control": {"type": "ephemeral"}},
+        ],
+        "messages": [{"role": "user", "content": contenu}],
+    }, afficher=True)
+
+    texte = texte.strip()
+    if not texte or texte.startswith(RIEN_DE_NOUVEAU):
+        return None
+    print("✅ Mise à jour générée avec succès.")
+    return texte
@@ -0,0 +1,261 @@
+"""
+disjoncteur.py — Disjoncteurs persistants pour les points d'accès défaillants.
+
+Certains points d'accès (portails JSF, flux RSS .cfm…) échouent ou expirent
+jour après jour ; sans mémoire d'une exécution à l'autre, chaque exécution
+attendait leur délai complet. On conserve donc, par URL et par hôte, un
+bilan de santé : taux de réussite récent, latence moyenne (moyenne mobile
+exponentielle), dernière erreur.
+
+États d'un point d'accès :
+  fermé      — normal, délai demandé par l'appelant ;
+  dégradé    — échecs récents : délai court (DISJONCTEUR_DELAI_COURT) ;
+  ouvert     — SEUIL échecs consécutifs : ignoré sans requête jusqu'à la fin
+               de la pause (20 h, doublée à chaque réouverture, 7 jours au plus) ;
+  semi-ouvert — pause écoulée : un seul essai, avec délai court ; une réussite
+               referme le disjoncteur, un échec le rouvre.
+Un hôte injoignable (délais dépassés, erreurs de connexion, réponses 5xx)
+s'ouvre de la même façon (seuil SEUIL_HOTE) ; une réponse 4xx (flux RSS
+candidat disparu…) ne compte que pour son URL et montre l'hôte joignable.
+En rejeu d'archive (archive.py), le disjoncteur laisse tout passer et ne
+modifie pas le bilan : le rejeu reproduit les décisions prises à la capture.
+
+Variables d'environnement :
+  DISJONCTEUR             — « 0 » pour désactiver (le bilan est tout de même tenu)
+  DISJONCTEUR_FICHIER     — bilan persistant (défaut : .cache/sante_endpoints.json)
+  DISJONCTEUR_SEUIL       — échecs consécutifs avant ouverture d'une URL (défaut : 3)
+  DISJONCTEUR_DELAI_COURT — délai (s) des essais et des points d'accès dégradés (défaut : 8)
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import requests
+
+from archive import ARCHIVE
+from scheduler import hote_de
+
+ACTIF = os.environ.get("DISJONCTEUR", "1").strip() != "0"
+FICHIER = Path(os.environ.get("DISJONCTEUR_FICHIER",
+                              Path(__file__).parent / ".cache" / "sante_endpoints.json"))
+SEUIL = int(os.environ.get("DISJONCTEUR_SEUIL", "3") or 3)
+SEUIL_HOTE = 2 * SEUIL
+DELAI_COURT = float(os.environ.get("DISJONCTEUR_DELAI_COURT", "8") or 8)
+
+PAUSE_BASE = timedelta(hours=20)
+PAUSE_MAX = timedelta(days=7)
+HISTORIQUE = 20          # derniers résultats conservés pour le taux de réussite
+LISSAGE = 0.3            # poids de la dernière mesure dans la latence moyenne
+OUBLI = timedelta(days=30)
+AFFICHES_MAX = 15        # points d'accès détaillés dans le résumé de fin d'exécution
+
+
+class DisjoncteurOuvert(requests.RequestException):
+    """Point d'accès ignoré : son disjoncteur (ou celui de son hôte) est ouvert."""
+
+
+def _maintenant() -> datetime:
+    return datetime.now().replace(microsecond=0)
+
+
+def _bilan_vide() -> dict:
+    return {
+        "succes": 0, "echecs": 0, "consecutifs": 0, "ouvertures": 0,
+        "latence_ms": None, "resultats": "",
+        "derniere_erreur": None, "derniere_erreur_le": None,
+        "dernier_succes_le": None, "vu_le": None, "ouvert_jusqu": None,
+    }
+
+
+def taux_reussite(bilan: dict) -> float:
+    resultats = bilan["resultats"]
+    return resultats.count("1") / len(resultats) if resultats else 1.0
+
+
+class Disjoncteur:
+    """Bilans de santé par URL et par hôte, partagés entre threads et persistés."""
+
+    def __init__(self, fichier: Path = FICHIER):
+        self.fichier = fichier
+        self.verrou = threading.Lock()
+        self.urls = {}
+        self.hotes = {}
+        self.essais_en_cours = set()
+        self.ignores = {}  # url → motif, pour l'exécution en cours
+        try:
+            with open(fichier, encoding="utf-8") as f:
+                donnees = json.load(f)
+            self.urls = {u: {**_bilan_vide(), **b} for u, b in donnees.get("urls", {}).items()}
+            self.hotes = {h: {**_bilan_vide(), **b} for h, b in donnees.get("hotes", {}).items()}
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    # -- décision -------------------------------------------------------------
+    def _etat(self, bilan: dict, seuil: int) -> str:
+        if bilan["ouvert_jusqu"]:
+            if _maintenant() < datetime.fromisoformat(bilan["ouvert_jusqu"]):
+                return "ouvert"
+            return "semi-ouvert"
+        if bilan["consecutifs"] and bilan["consecutifs"] < seuil:
+            return "dégradé"
+        return "fermé"
+
+    def etat(self, url: str) -> str:
+        with self.verrou:
+            return self._etat(self.urls.get(url) or _bilan_vide(), SEUIL)
+
+    def autoriser(self, url: str, timeout: float) -> float:
+        """
+        Délai à utiliser pour `url` (le délai demandé, ou un délai court).
+        Lève DisjoncteurOuvert si l'URL ou son hôte doit être ignoré.
+        """
+        hote = hote_de(url)
+        with self.verrou:
+            bilan_url = self.urls.get(url) or _bilan_vide()
+            bilan_hote = self.hotes.get(hote) or _bilan_vide()
+            etats = (self._etat(bilan_url, SEUIL), self._etat(bilan_hote, SEUIL_HOTE))
+            if not ACTIF or ARCHIVE.rejeu:
+                return timeout
+            if "ouvert" in etats:
+                bilan = bilan_url if etats[0] == "ouvert" else bilan_hote
+                cible = "URL" if etats[0] == "ouvert" else f"hôte {hote}"
+                motif = (f"disjoncteur ouvert ({cible}) jusqu'au {bilan['ouvert_jusqu']} — "
+                         f"dernière erreur : {bilan['derniere_erreur']}")
+                self.ignores[url] = motif
+                raise DisjoncteurOuvert(motif)
+            if "semi-ouvert" in etats:
+                # Un seul essai par exécution pour une URL (ou un hôte) en semi-ouverture
+                cle = url if etats[0] == "semi-ouvert" else hote
+                if cle in self.essais_en_cours:
+                    motif = "disjoncteur semi-ouvert — essai déjà en cours"
+                    self.ignores[url] = motif
+                    raise DisjoncteurOuvert(motif)
+                self.essais_en_cours.add(cle)
+                return min(timeout, DELAI_COURT)
+            if "dégradé" in etats:
+                latence = bilan_url["latence_ms"]
+                court = max(DELAI_COURT, 3 * latence / 1000) if latence else DELAI_COURT
+                return min(timeout, court)
+            return timeout
+
+    # -- enregistrement -------------------------------------------------------
+    def _noter(self, bilan: dict, reussi: bool, duree: float, erreur: str, seuil: int) -> None:
+        maintenant = _maintenant()
+        bilan["vu_le"] = maintenant.isoformat()
+        bilan["resultats"] = (bilan["resultats"] + ("1" if reussi else "0"))[-HISTORIQUE:]
+        if reussi:
+            bilan["succes"] += 1
+            bilan["consecutifs"] = 0
+            bilan["ouvertures"] = 0
+            bilan["ouvert_jusqu"] = None
+            bilan["dernier_succes_le"] = maintenant.isoformat()
+            mesure = duree * 1000
+            precedente = bilan["latence_ms"]
+            bilan["latence_ms"] = round(mesure if precedente is None
+                                        else LISSAGE * mesure + (1 - LISSAGE) * precedente)
+            return
+        bilan["echecs"] += 1
+        bilan["consecutifs"] += 1
+        bilan["derniere_erreur"] = erreur[:200]
+        bilan["derniere_erreur_le"] = maintenant.isoformat()
+        semi_ouvert = bilan["ouvert_jusqu"] is not None
+        if bilan["consecutifs"] >= seuil or semi_ouvert:
+            bilan["ouvertures"] += 1
+            pause = min(PAUSE_BASE * 2 ** (bilan["ouvertures"] - 1), PAUSE_MAX)
+            bilan["ouvert_jusqu"] = (maintenant + pause).isoformat()
+
+    def _enregistrer(self, url: str, reussi: bool, duree: float, erreur: str = "",
+                     hote_joignable: bool = False) -> None:
+        if ARCHIVE.rejeu:
+            return
+        hote = hote_de(url)
+        with self.verrou:
+            self._noter(self.urls.setdefault(url, _bilan_vide()), reussi, duree, erreur, SEUIL)
+            self._noter(self.hotes.setdefault(hote, _bilan_vide()), reussi or hote_joignable,
+                        duree, erreur, SEUIL_HOTE)
+
+    def succes(self, url: str, duree: float) -> None:
+        self._enregistrer(url, True, duree)
+
+    def echec(self, url: str, erreur, duree: float, hote_joignable: bool = False) -> None:
+        """
+        Note un échec de `url`. Avec `hote_joignable` (réponse 4xx : page
+        absente, accès refusé…), le serveur a répondu : l'échec ne compte que
+        pour l'URL, et l'hôte est noté joignable. Seuls les délais dépassés,
+        les erreurs de connexion et les 5xx pèsent sur le bilan de l'hôte.
+        """
+        motif = erreur if isinstance(erreur, str) else f"{type(erreur).__name__}: {erreur}"
+        self._enregistrer(url, False, duree, motif.splitlines()[0] if motif else "", hote_joignable)
+
+    @contextmanager
+    def surveiller(self, url: str, timeout: float, ignorer: tuple = ()):
+        """
+        Bloc surveillé : fournit le délai à utiliser, note une réussite à la
+        sortie normale et un échec sur exception (sauf types `ignorer`,
+        ex. navigateur absent, qui ne disent rien de la santé du site).
+        """
+        delai = self.autoriser(url, timeout)
+        debut = datetime.now()
+        try:
+            yield delai
+        except ignorer:
+            raise
+        except Exception as e:
+            self.echec(url, e, (datetime.now() - debut).total_seconds())
+            raise
+        self.succes(url, (datetime.now() - debut).total_seconds())
+
+    # -- persistance et affichage ---------------------------------------------
+    def sauvegarder(self) -> None:
+        """Écrit le bilan (écriture atomique), en oubliant les points d'accès inutilisés."""
+        if ARCHIVE.rejeu:
+            return
+        limite = (_maintenant() - OUBLI).isoformat()
+        with self.verrou:
+            donnees = {
+                "urls": {u: b for u, b in self.urls.items() if (b["vu_le"] or "") >= limite},
+                "hotes": {h: b for h, b in self.hotes.items() if (b["vu_le"] or "") >= limite},
+            }
+        try:
+            self.fichier.parent.mkdir(parents=True, exist_ok=True)
+            temporaire = self.fichier.with_suffix(".tmp")
+            with open(temporaire, "w", encoding="utf-8") as f:
+                json.dump(donnees, f, ensure_ascii=False, indent=1)
+            temporaire.replace(self.fichier)
+        except OSError as e:
+            print(f"  ⚠ Bilan des disjoncteurs non enregistré : {e}")
+
+    def afficher_etat(self) -> None:
+        """Résumé de fin d'exécution : points d'accès ouverts, dégradés ou ignorés."""
+        with self.verrou:
+            lignes = []
+            for url, bilan in sorted(self.urls.items()):
+                etat = self._etat(bilan, SEUIL)
+                if etat == "fermé" and url not in self.ignores:
+                    continue
+                latence = f"{bilan['latence_ms']} ms" if bilan["latence_ms"] is not None else "—"
+                detail = (f" jusqu'au {bilan['ouvert_jusqu']}" if etat == "ouvert" else "")
+                lignes.append(
+                    f"    {'⛔' if etat == 'ouvert' else '⚠'} {etat}{detail} — {url[:70]}\n"
+                    f"       réussite {taux_reussite(bilan):.0%}, latence {latence}, "
+                    f"{bilan['consecutifs']} échec(s) consécutif(s) ; {(bilan['derniere_erreur'] or '—')[:100]}"
+                )
+            hotes_ouverts = [h for h, b in self.hotes.items() if self._etat(b, SEUIL_HOTE) == "ouvert"]
+            nb_ignores = len(self.ignores)
+        print(f"🔌 Disjoncteurs : {len(self.urls)} URL(s) suivie(s), {len(lignes)} à surveiller, "
+              f"{nb_ignores} ignorée(s) cette fois"
+              + (f", hôte(s) ouvert(s) : {', '.join(sorted(hotes_ouverts))}" if hotes_ouverts else "")
+              + ("" if ACTIF else " (désactivés : bilan seulement)"))
+        # Ouverts d'abord ; la liste complète reste dans le fichier de bilan
+        lignes.sort(key=lambda ligne: "⛔" not in ligne)
+        for ligne in lignes[:AFFICHES_MAX]:
+            print(ligne)
+        if len(lignes) > AFFICHES_MAX:
+            print(f"    … et {len(lignes) - AFFICHES_MAX} autre(s) (voir {self.fichier})")
+
+
+DISJONCTEUR = Disjoncteur()
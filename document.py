@@ -0,0 +1,172 @@
+"""
+document.py — Modèle de document HTML analysé une seule fois (lxml).
+
+Un Document est construit une fois par réponse HTTP avec l'analyseur C de
+lxml, puis partagé par tous les extracteurs : texte propre, liens, noms en
+gras, blocs de paragraphes. Document.de_reponse() mémorise le document sur
+la réponse elle-même, si bien qu'un second extracteur appliqué à la même
+réponse ne réanalyse rien.
+
+Les balises <script>, <style> et <noscript> sont retirées à la construction ;
+les zones de navigation (nav, footer, header, aside) restent dans l'arbre et
+chaque extracteur choisit de les ignorer ou non via `exclure`.
+"""
+
+import lxml.etree
+import lxml.html
+
+from telemetrie import portee
+
+# Zones de page qui ne contiennent jamais de contenu éditorial
+BRUIT = frozenset({"nav", "footer", "header", "aside"})
+
+_ANALYSEUR = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True,
+                                  remove_pis=True, recover=True)
+
+# Candidats « contenu principal », par ordre de priorité (comme soup_text)
+_XPATH_PRINCIPAL = [
+    "//main",
+    "//*[@id='content']",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' content ')]",
+    "//*[@role='main']",
+]
+
+
+def _textes(element, exclure):
+    """Parcourt les nœuds texte de `element` sans descendre dans les balises exclues."""
+    if element.text:
+        yield element.text
+    for enfant in element:
+        if isinstance(enfant.tag, str) and enfant.tag not in exclure:
+            yield from _textes(enfant, exclure)
+        if enfant.tail:
+            yield enfant.tail
+
+
+def texte_element(element, separateur: str = " ", exclure=frozenset()) -> str:
+    """Texte d'un élément, fragments nettoyés et joints par `separateur`."""
+    return separateur.join(
+        t for t in (s.strip() for s in _textes(element, exclure)) if t
+    )
+
+
+def _est_exclu(element, exclure) -> bool:
+    return any(ancetre.tag in exclure for ancetre in element.iterancestors())
+
+
+class Document:
+    """Arbre lxml d'une page HTML et extracteurs associés."""
+
+    __slots__ = ("racine", "_liens")
+
+    def __init__(self, html: str):
+        octets = (html or "").encode("utf-8", "replace")
+        with portee("html", "parse", octets=len(octets)):
+            try:
+                self.racine = lxml.html.document_fromstring(octets, parser=_ANALYSEUR)
+            except (lxml.etree.ParserError, ValueError):
+                self.racine = lxml.html.document_fromstring("<html><body></body></html>")
+            lxml.etree.strip_elements(self.racine, "script", "style", "noscript", with_tail=False)
+        self._liens = {}
+
+    @classmethod
+    def de_reponse(cls, r) -> "Document":
+        """Retourne le Document de la réponse `r`, en l'analysant au premier appel seulement."""
+        doc = getattr(r, "_document", None)
+        if doc is None:
+            doc = cls(r.text)
+            try:
+                r._document = doc
+            except AttributeError:
+                pass
+        return doc
+
+    def principal(self):
+        """Élément de contenu principal (main, #content, .content, [role=main]) ou None."""
+        for xpath in _XPATH_PRINCIPAL:
+            trouves = self.racine.xpath(xpath)
+            if trouves:
+                return trouves[0]
+        return None
+
+    def texte(self, max_chars: int = 5000, main_only: bool = False, min_len: int = 25,
+              max_lignes: int = 200, exclure=BRUIT) -> str:
+        """
+        Texte brut ligne par ligne, en ne gardant que les lignes de plus de
+        `min_len` caractères (équivalent de l'ancien soup_text).
+        """
+        racine = (self.principal() if main_only else None)
+        if racine is None:
+            racine = self.racine
+        lignes = []
+        for fragment in _textes(racine, exclure):
+            for ligne in fragment.splitlines():
+                ligne = ligne.strip()
+                if len(ligne) > min_len:
+                    lignes.append(ligne)
+            if len(lignes) >= max_lignes:
+                break
+        return "\n".join(lignes[:max_lignes])[:max_chars]
+
+    def elements(self, *balises, exclure=frozenset()):
+        """Éléments des balises données, hors des zones exclues, dans l'ordre du document."""
+        for element in self.racine.iter(*balises):
+            if not exclure or not _est_exclu(element, exclure):
+                yield element
+
+    def liens(self, exclure=frozenset()) -> list:
+        """Liste [(texte, href)] des liens <a href>, texte normalisé (espaces simples)."""
+        cle = frozenset(exclure)
+        if cle not in self._liens:
+            liens = []
+            for a in self.elements("a", exclure=cle):
+                href = a.get("href")
+                if href:
+                    liens.append((" ".join(a.text_content().split()), href.strip()))
+            self._liens[cle] = liens
+        return self._liens[cle]
+
+    def noms_en_gras(self, max_mots: int = 6, max_chars: int = 100) -> list:
+        """
+        Textes en gras (<strong>, <b>) ressemblant à des noms propres :
+        1 à `max_mots` mots, ni en majuscules (titres de section), ni trop courts.
+        Liste dédupliquée, dans l'ordre du document.
+        """
+        noms = []
+        vus = set()
+        for element in self.racine.iter("strong", "b"):
+            nom = " ".join(element.text_content().split())
+            if not nom or nom in vus or len(nom) > max_chars:
+                continue
+            if len(nom.split()) > max_mots:
+                continue
+            if nom.isupper() or len(nom) < 3:
+                continue
+            vus.add(nom)
+            noms.append(nom)
+        return noms
+
+    def blocs(self, balises=("p", "li", "td", "div"), exclure=frozenset({"nav", "footer"})) -> list:
+        """
+        Texte de chaque bloc des balises données, dans l'ordre du document.
+        Chaque fragment de texte n'est attribué qu'à son bloc le plus proche :
+        un <div> qui contient des <p> ne répète pas leur texte.
+        """
+        balises = frozenset(balises)
+        blocs = []
+
+        def visiter(element, courant):
+            if element.tag in balises:
+                courant = []
+                blocs.append(courant)
+            if element.text and courant is not None:
+                courant.append(element.text)
+            for enfant in element:
+                if isinstance(enfant.tag, str) and enfant.tag not in exclure:
+                    visiter(enfant, courant)
+                if enfant.tail and courant is not None:
+                    courant.append(enfant.tail)
+
+        visiter(self.racine, None)
+        textes = (" ".join(t for t in (f.strip() for f in bloc) if t) for bloc in blocs)
+        return [t for t in textes if t]
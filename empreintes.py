@@ -0,0 +1,396 @@
+"""
+empreintes.py — Découpage des sources en éléments et empreintes de contenu.
+
+Chaque bloc de texte produit par les collecteurs est découpé en éléments
+(un communiqué, un décret, un extrait interprovincial, ou la page entière
+pour les sources d'un seul tenant). Chaque élément reçoit :
+  - une empreinte exacte : SHA-1 de l'URL, du titre et du corps normalisés ;
+  - une empreinte de similarité (simhash 64 bits sur des triplets de mots),
+    pour reconnaître un même texte légèrement reformulé ou remis en page.
+
+dedupliquer_sources() retire, avant la construction du prompt, les éléments
+déjà couverts dans les digests récents et signale comme suivis ceux dont
+l'URL est connue mais dont le contenu a changé. Les quasi-doublons ne sont
+retirés que parmi les éléments découpés ; une page d'un seul tenant
+(Gazette, registres) proche d'une page déjà couverte est gardée et signalée
+comme suivi. Les simhash de l'historique sont indexés par bandes : seuls les
+éléments partageant une bande sont comparés.
+
+regrouper_quasi_doublons() réunit, au sein d'une même exécution, les copies
+d'un même texte publiées par plusieurs sources (annonce fédérale-provinciale
+reprise par plusieurs gouvernements, communiqué repris dans la Gazette…) :
+un seul représentant est gardé, suivi de la liste des autres sources. Les
+candidats sont trouvés par hachage sensible à la localité (MinHash à une
+permutation, découpé en bandes), puis confirmés par le taux d'inclusion des
+triplets de mots, ce qui reconnaît aussi un extrait tiré d'un texte plus long :
+temps à peu près linéaire dans le nombre d'extraits.
+"""
+
+import hashlib
+import re
+from collections import namedtuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from mentions import plier
+
+SOURCE_NEWS = "Communiqués du gouvernement (news.ontario.ca)"
+SOURCE_OIC = "Décrets du Conseil"
+SOURCE_INTERPROV = "Ontario ailleurs au Canada (sources interprovinciales)"
+
+# Marqueurs de début d'élément (essayés dans l'ordre) et séparateur de réassemblage
+REGLES_DECOUPAGE = {
+    SOURCE_NEWS: ([r"^\[\d{4}-\d{2}-\d{2}\] ", r"^[^\n]{20,}\nhttps?://"], "\n\n"),
+    SOURCE_OIC: ([r"^Décret : "], "\n\n---\n\n"),
+    SOURCE_INTERPROV: ([r"^PROVINCE : "], "\n" + "-" * 50 + "\n"),
+}
+
+# Distance de Hamming maximale entre deux simhash « presque identiques »
+DISTANCE_MAX = 3
+# En deçà, et sans URL, un élément est un message d'état (« non disponible »…)
+LONGUEUR_MIN = 200
+# MinHash du regroupement : SEGMENTS minima, comparés par bandes de LIGNES_PAR_BANDE
+SEGMENTS = 32
+LIGNES_PAR_BANDE = 2
+# Part minimale des triplets du plus court texte présents dans l'autre
+INCLUSION_MIN = 0.6
+# En deçà, un texte est trop court pour être comparé de façon fiable
+MOTS_MIN_REGROUPEMENT = 15
+
+_URL_RE = re.compile(r"https?://\S+")
+_MOT_RE = re.compile(r"\w+")
+_NOMS_RE = re.compile(r"^PERSONNES/ENTITÉS EN GRAS DANS LE DÉCRET : (.+)$", re.M)
+# Lignes de métadonnées propres à chaque source, ignorées par le simhash
+_ETIQUETTES_RE = re.compile(r"^(?:PROVINCE|SOURCE|URL|EXTRAIT|Décret|Lien)\s*:.*$", re.M)
+_CHAMP_RE = re.compile(r"^(PROVINCE|SOURCE)\s*: (.+)$", re.M)
+# Décompte en tête de la source interprovinciale : « [12 référence(s) à l'Ontario …] »
+_COMPTE_RE = re.compile(r"^\[\d+ (référence\(s\)[^\]\n]*)\]", re.M)
+
+
+class Element(namedtuple("Element", "source titre url texte empreinte simhash")):
+    """Un élément de source, avec ses empreintes exacte et de similarité."""
+
+    __slots__ = ()
+
+    @property
+    def description(self) -> str:
+        """Libellé lisible conservé dans l'historique."""
+        if self.source == SOURCE_OIC:
+            noms = _NOMS_RE.search(self.texte)
+            if noms:
+                return f"Décret — nomination : {noms.group(1).strip()}"
+            return f"Décret : {self.titre[:150]}"
+        if self.source == SOURCE_NEWS:
+            return f"Communiqué : {self.titre[:150]}"
+        return f"{self.source} : {self.titre[:150]}"
+
+
+def normaliser_url(url: str) -> str:
+    """Minuscules pour schéma et hôte, sans fragment, paramètres de suivi ni « / » final."""
+    if not url:
+        return ""
+    parties = urlsplit(url.strip().rstrip(".,;)"))
+    requete = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parties.query) if not k.lower().startswith("utm_")
+    ))
+    chemin = parties.path.rstrip("/") or "/"
+    return urlunsplit((parties.scheme.lower(), parties.netloc.lower(), chemin, requete, ""))
+
+
+def normaliser_texte(texte: str) -> str:
+    """Texte plié (minuscules, sans accents), URLs retirées, espaces réduits."""
+    return " ".join(_URL_RE.sub(" ", plier(texte)).split())
+
+
+def _triplets(texte: str) -> list:
+    """Triplets de mots consécutifs du texte plié (le texte entier s'il est plus court)."""
+    mots = _MOT_RE.findall(plier(texte))
+    if len(mots) < 3:
+        return [" ".join(mots)] if mots else []
+    return [" ".join(mots[i:i + 3]) for i in range(len(mots) - 2)]
+
+
+def simhash(texte: str) -> int:
+    """Simhash 64 bits des triplets de mots de `texte` (déjà normalisé ou non)."""
+    # Une chaîne binaire par triplet ; zip(*…) en donne les colonnes de bits
+    # (bit 63 en tête), que str.count dénombre sans boucle Python par bit.
+    binaires = [
+        format(int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for t in _triplets(texte)
+    ]
+    if not binaires:
+        return 0
+    moitie = len(binaires) / 2
+    resultat = 0
+    for colonne in zip(*binaires):
+        resultat = resultat << 1 | (colonne.count("1") > moitie)
+    return resultat
+
+
+def distance(a: int, b: int) -> int:
+    """Distance de Hamming entre deux simhash."""
+    return (a ^ b).bit_count()
+
+
+def _bandes_simhash(valeur: int) -> list:
+    """
+    Clés de bandes d'un simhash : ses 64 bits coupés en DISTANCE_MAX + 1
+    tranches. Deux simhash à DISTANCE_MAX bits ou moins l'un de l'autre ont au
+    moins une tranche identique : seuls les éléments partageant une clé sont
+    comparés.
+    """
+    bandes = DISTANCE_MAX + 1
+    cles = []
+    debut = 0
+    for i in range(bandes):
+        largeur = (64 - debut) // (bandes - i)
+        cles.append((i, (valeur >> debut) & ((1 << largeur) - 1)))
+        debut += largeur
+    return cles
+
+
+def _recompter(entete: str, elements: int) -> str:
+    """Entête dont le décompte « [N référence(s) …] » suit les éléments restants."""
+    return _COMPTE_RE.sub(lambda m: f"[{elements} {m.group(1)}]", entete, count=1)
+
+
+def _element(source: str, texte: str) -> Element:
+    lignes = [l.strip() for l in texte.strip().splitlines() if l.strip()]
+    titre = lignes[0] if lignes else ""
+    for prefixe in ("Décret : ", "PROVINCE : "):
+        if titre.startswith(prefixe):
+            titre = titre[len(prefixe):]
+    url_trouvee = _URL_RE.search(texte)
+    url = normaliser_url(url_trouvee.group()) if url_trouvee else ""
+    corps = normaliser_texte(texte)
+    empreinte = hashlib.sha1(
+        f"{url}|{normaliser_texte(titre)}|{corps}".encode("utf-8")
+    ).hexdigest()
+    return Element(source, titre, url, texte, empreinte,
+                   simhash(normaliser_texte(_ETIQUETTES_RE.sub(" ", texte))))
+
+
+def decouper(source: str, contenu: str) -> tuple:
+    """
+    Découpe le contenu d'une source en (entête, [textes d'éléments], séparateur).
+    Les sources sans règle de découpage forment un seul élément.
+    """
+    marqueurs, separateur = REGLES_DECOUPAGE.get(source, (None, "\n\n"))
+    if marqueurs is None:
+        return "", [contenu], separateur
+    for marqueur in marqueurs:
+        debuts = [m.start() for m in re.finditer(marqueur, contenu, re.M)]
+        if debuts:
+            break
+    else:
+        return contenu, [], separateur
+    entete = contenu[:debuts[0]]
+    bornes = debuts[1:] + [len(contenu)]
+    textes = [contenu[d:f].rstrip().removesuffix(separateur.strip()).rstrip()
+              for d, f in zip(debuts, bornes)]
+    return entete, textes, separateur
+
+
+def tracable(element: Element) -> bool:
+    """Vrai si l'élément mérite d'être suivi d'un digest à l'autre."""
+    return bool(element.url) or len(element.texte) >= LONGUEUR_MIN
+
+
+def elements_de(sources: dict) -> list:
+    """Tous les éléments traçables des sources, dans l'ordre."""
+    elements = []
+    for nom, contenu in sources.items():
+        _, textes, _ = decouper(nom, contenu or "")
+        elements.extend(e for e in (_element(nom, t) for t in textes) if tracable(e))
+    return elements
+
+
+def dedupliquer_sources(sources: dict, historique: list) -> tuple:
+    """
+    Retire des sources les éléments déjà couverts.
+
+    `historique` : liste de dicts {empreinte, simhash, url, date} (history.py).
+    Retourne (sources_filtrées, éléments_nouveaux, stats) où stats compte les
+    doublons exacts, les quasi-doublons et les suivis.
+    """
+    exactes = {h["empreinte"]: h for h in historique}
+    # Historique du plus récent au plus ancien : garder la couverture la plus récente de chaque URL
+    par_url = {}
+    for h in historique:
+        if h.get("url"):
+            par_url.setdefault(h["url"], h)
+    # Index par bandes du simhash (rang dans l'historique : le plus petit est le plus récent)
+    seaux = {}
+    for rang, h in enumerate(historique):
+        if h.get("simhash") is not None:
+            for cle in _bandes_simhash(h["simhash"]):
+                seaux.setdefault(cle, []).append(rang)
+
+    def plus_proche(valeur: int):
+        rangs = {r for cle in _bandes_simhash(valeur) for r in seaux.get(cle, ())}
+        return next((historique[r] for r in sorted(rangs)
+                     if distance(historique[r]["simhash"], valeur) <= DISTANCE_MAX), None)
+
+    filtrees = {}
+    nouveaux = []
+    stats = {"exacts": 0, "quasi": 0, "suivis": 0, "conserves": 0}
+    for nom, contenu in sources.items():
+        entete, textes, separateur = decouper(nom, contenu or "")
+        if not textes:
+            filtrees[nom] = contenu
+            continue
+        # Une page d'un seul tenant (sans règle de découpage) n'est jamais retirée pour
+        # sa seule ressemblance : quelques inscriptions nouvelles dans un registre
+        # changent à peine son simhash
+        decoupee = nom in REGLES_DECOUPAGE
+        gardes = []
+        retires = 0
+        for texte in textes:
+            e = _element(nom, texte)
+            if not tracable(e):
+                gardes.append(texte)
+                continue
+            if e.empreinte in exactes:
+                stats["exacts"] += 1
+                retires += 1
+                continue
+            connu = par_url.get(e.url) if e.url else None
+            proche = plus_proche(e.simhash)
+            if proche and (connu is None or proche.get("url") == e.url):
+                if decoupee:
+                    stats["quasi"] += 1
+                    retires += 1
+                    continue
+                connu = connu or proche
+            nouveaux.append(e)
+            if connu:
+                stats["suivis"] += 1
+                texte = f"[SUIVI — déjà couvert le {connu['date']}, contenu modifié depuis]\n{texte}"
+            else:
+                stats["conserves"] += 1
+            gardes.append(texte)
+
+        if retires:
+            entete = _recompter(entete, len(gardes))
+        if gardes:
+            filtrees[nom] = entete + separateur.join(gardes)
+        else:
+            filtrees[nom] = (
+                f"{entete.strip()}\n\n" if entete.strip() else ""
+            ) + f"(Aucun nouvel élément : {retires} élément(s) déjà couvert(s) dans un digest récent.)"
+    return filtrees, nouveaux, stats
+
+
+def _bandes_minhash(ensemble: set) -> list:
+    """
+    Clés de bandes MinHash à une permutation : chaque triplet haché tombe dans
+    l'un des SEGMENTS segments, dont on garde le minimum ; les segments sont
+    regroupés par bandes de LIGNES_PAR_BANDE. Une bande dont un segment est vide
+    ne produit pas de clé (elle rapprocherait des textes sans rapport).
+    """
+    minima = [None] * SEGMENTS
+    for h in ensemble:
+        h &= (1 << 64) - 1
+        segment, valeur = h % SEGMENTS, h // SEGMENTS
+        if minima[segment] is None or valeur < minima[segment]:
+            minima[segment] = valeur
+    cles = []
+    for bande in range(0, SEGMENTS, LIGNES_PAR_BANDE):
+        lignes = tuple(minima[bande:bande + LIGNES_PAR_BANDE])
+        if None not in lignes:
+            cles.append((bande, lignes))
+    return cles
+
+
+def _inclusion(a: set, b: set) -> float:
+    """Part des triplets du plus petit ensemble présents dans l'autre."""
+    if not a or not b:
+        return 0.0
+    petit, grand = (a, b) if len(a) <= len(b) else (b, a)
+    return len(petit & grand) / len(petit)
+
+
+def _provenance(element: Element) -> str:
+    """« Québec — Gouvernement du Québec (https://…) » ou « Gazette de l'Ontario »."""
+    champs = dict(_CHAMP_RE.findall(element.texte))
+    libelle = " — ".join(v.strip() for v in (champs.get("PROVINCE"), champs.get("SOURCE")) if v)
+    libelle = libelle or element.source
+    return f"{libelle} ({element.url})" if element.url else libelle
+
+
+def regrouper_quasi_doublons(sources: dict) -> tuple:
+    """
+    Réunit les quasi-doublons de toutes les sources en un seul représentant
+    (la première occurrence, dans l'ordre des sources), suivi d'une ligne
+    « AUSSI PUBLIÉ PAR : … ». Retourne (sources_regroupées, stats).
+    """
+    decoupes = {nom: decouper(nom, contenu or "") for nom, contenu in sources.items()}
+    candidats = []  # (nom, index dans la source, Element)
+    for nom, (_, textes, _) in decoupes.items():
+        for i, texte in enumerate(textes):
+            e = _element(nom, texte)
+            if tracable(e) and len(_MOT_RE.findall(_ETIQUETTES_RE.sub(" ", texte))) >= MOTS_MIN_REGROUPEMENT:
+                candidats.append((nom, i, e))
+
+    # Triplets hachés (la fonction hash() suffit : comparaison interne à l'exécution)
+    ensembles = [
+        {hash(t) for t in _triplets(_ETIQUETTES_RE.sub(" ", e.texte))} for _, _, e in candidats
+    ]
+
+    # Deux éléments d'une même origine (source, et province pour l'interprovincial)
+    # ne sont jamais réunis : des décrets rédigés sur le même modèle restent distincts.
+    origines = [(nom, dict(_CHAMP_RE.findall(e.texte)).get("PROVINCE")) for nom, _, e in candidats]
+
+    # Union-find : la racine d'un groupe est toujours son premier membre
+    parent = list(range(len(candidats)))
+
+    def racine(k):
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    seaux = {}
+    for k, ensemble in enumerate(ensembles):
+        for cle in _bandes_minhash(ensemble):
+            for j in seaux.get(cle, ()):
+                a, b = racine(j), racine(k)
+                if (a != b and origines[j] != origines[k]
+                        and _inclusion(ensembles[j], ensemble) >= INCLUSION_MIN):
+                    parent[max(a, b)] = min(a, b)
+            seaux.setdefault(cle, []).append(k)
+
+    groupes = {}
+    for k in range(len(candidats)):
+        groupes.setdefault(racine(k), []).append(k)
+
+    remplaces = {}   # (nom, index) → nouveau texte
+    retires = set()  # (nom, index)
+    for tete, membres in groupes.items():
+        if len(membres) < 2:
+            continue
+        nom, i, representant = candidats[tete]
+        autres = [candidats[k] for k in membres[1:]]
+        provenances = list(dict.fromkeys(_provenance(e) for _, _, e in autres))
+        remplaces[(nom, i)] = f"{representant.texte}\nAUSSI PUBLIÉ PAR : {' ; '.join(provenances)}"
+        retires.update((n, j) for n, j, _ in autres)
+
+    regroupees = {}
+    for nom, contenu in sources.items():
+        entete, textes, separateur = decoupes[nom]
+        if not any((nom, i) in retires or (nom, i) in remplaces for i in range(len(textes))):
+            regroupees[nom] = contenu
+            continue
+        gardes = [remplaces.get((nom, i), t) for i, t in enumerate(textes) if (nom, i) not in retires]
+        entete = _recompter(entete, len(gardes))
+        if gardes:
+            regroupees[nom] = entete + separateur.join(gardes)
+        else:
+            regroupees[nom] = (
+                f"{entete.strip()}\n\n" if entete.strip() else ""
+            ) + "(Contenu identique à celui d'une autre source : voir « AUSSI PUBLIÉ PAR ».)"
+
+    stats = {
+        "groupes": sum(1 for m in groupes.values() if len(m) > 1),
+        "retires": len(retires),
+    }
+    return regroupees, stats
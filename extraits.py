@@ -0,0 +1,153 @@
+"""
+extraits.py — Extraits centrés sur les mentions, bornés aux phrases.
+
+Plutôt que de garder des paragraphes entiers (un seul long paragraphe
+pouvant alors évincer toutes les autres mentions), on découpe autour de
+chaque mention une fenêtre alignée sur les limites de phrases :
+  1. une seule passe du détecteur sur le texte de tous les paragraphes ;
+  2. pour chaque mention, la phrase qui la contient, élargie aux phrases
+     voisines tant que la fenêtre reste courte ;
+  3. fusion des fenêtres qui se chevauchent ou se touchent ;
+  4. sélection des fenêtres les mieux notées jusqu'à épuisement du budget,
+     restituées dans l'ordre du document.
+"""
+
+import re
+from bisect import bisect_right
+from collections import namedtuple
+
+Extrait = namedtuple("Extrait", "score paragraphe debut fin texte")
+
+# Fin de phrase : ponctuation finale suivie d'espace(s)
+_FIN_PHRASE = re.compile(r"(?<=[.!?…;])\s+")
+
+FENETRE_MIN = 160     # en deçà, on ajoute les phrases voisines
+FENETRE_MAX = 420     # au-delà, on coupe autour de la mention
+CARACTERES_PAR_JETON = 3.5  # estimation pour du texte administratif fr/en
+
+
+def _phrases(texte: str) -> list:
+    """Bornes (debut, fin) de chaque phrase de `texte`."""
+    bornes = []
+    debut = 0
+    for m in _FIN_PHRASE.finditer(texte):
+        bornes.append((debut, m.start()))
+        debut = m.end()
+    if debut < len(texte):
+        bornes.append((debut, len(texte)))
+    return bornes
+
+
+def _fenetre(phrases: list, i: int) -> tuple:
+    """Indices [premiere, derniere] de la fenêtre autour de la phrase i."""
+    premiere = derniere = i
+    longueur = phrases[i][1] - phrases[i][0]
+    while longueur < FENETRE_MIN:
+        if derniere + 1 < len(phrases):
+            derniere += 1
+        elif premiere > 0:
+            premiere -= 1
+        else:
+            break
+        longueur = phrases[derniere][1] - phrases[premiere][0]
+    return premiere, derniere
+
+
+def _fenetres_paragraphe(para: str, mentions: list, index: int) -> list:
+    """Fenêtres fusionnées d'un paragraphe : [Extrait], dans l'ordre du texte."""
+    phrases = _phrases(para)
+    departs = [d for d, _ in phrases]
+    fenetres = []  # [premiere, derniere, score, mots_vus, debut_mention, fin_mention]
+    for m in mentions:
+        i = max(0, bisect_right(departs, m.debut) - 1)
+        premiere, derniere = _fenetre(phrases, i)
+        if fenetres and premiere <= fenetres[-1][1] + 1:
+            f = fenetres[-1]
+            f[1] = max(f[1], derniere)
+            if m.mot not in f[3]:
+                f[2] += m.poids
+                f[3].add(m.mot)
+            f[5] = m.fin
+        else:
+            fenetres.append([premiere, derniere, m.poids, {m.mot}, m.debut, m.fin])
+
+    extraits = []
+    for premiere, derniere, score, _, debut_m, fin_m in fenetres:
+        debut, fin = phrases[premiere][0], phrases[derniere][1]
+        if fin - debut > FENETRE_MAX:
+            # Phrase démesurée : recentrer sur les mentions, puis aligner sur les mots
+            centre = (debut_m + fin_m) // 2
+            debut = max(debut, min(centre - FENETRE_MAX // 2, fin - FENETRE_MAX))
+            fin = debut + FENETRE_MAX
+            if debut > 0 and not para[debut - 1].isspace():
+                espace = para.find(" ", debut, fin)
+                debut = espace + 1 if espace != -1 else debut
+            if fin < len(para):
+                espace = para.rfind(" ", debut, fin)
+                fin = espace if espace > debut else fin
+        texte = para[debut:fin].strip()
+        if debut > 0:
+            texte = "… " + texte
+        if fin < len(para):
+            texte = texte + " …"
+        extraits.append(Extrait(score, index, debut, fin, texte))
+    return extraits
+
+
+def extraire(paragraphes: list, detecteur, max_chars: int = 800, max_jetons: int = None,
+             min_len: int = 30) -> list:
+    """
+    Sélectionne les meilleurs extraits de `paragraphes` pour `detecteur`
+    (un mentions.DetecteurMentions), dans un budget de `max_chars` caractères
+    ou de `max_jetons` jetons estimés. Retourne des Extrait dans l'ordre du document.
+    """
+    budget = int(max_jetons * CARACTERES_PAR_JETON) if max_jetons else max_chars
+    candidats = [p.strip() for p in paragraphes if len(p.strip()) >= min_len]
+    if not candidats:
+        return []
+
+    # Une seule passe du détecteur sur l'ensemble des paragraphes
+    departs = []
+    position = 0
+    for para in candidats:
+        departs.append(position)
+        position += len(para) + 1
+    par_paragraphe = {}
+    for m in detecteur.trouver("\n".join(candidats)):
+        i = bisect_right(departs, m.debut) - 1
+        decalage = departs[i]
+        par_paragraphe.setdefault(i, []).append(
+            m._replace(debut=m.debut - decalage, fin=m.fin - decalage)
+        )
+
+    fenetres = []
+    for i, mentions in par_paragraphe.items():
+        fenetres.extend(
+            e for e in _fenetres_paragraphe(candidats[i], mentions, i)
+            if e.score >= detecteur.seuil
+        )
+
+    # Les mieux notées d'abord (les plus courtes départagent), jusqu'au budget
+    retenues = []
+    utilise = 0
+    vus = set()
+    for e in sorted(fenetres, key=lambda e: (-e.score, len(e.texte))):
+        if e.texte in vus:
+            continue
+        cout = len(e.texte) + (2 if retenues else 0)
+        if utilise + cout > budget:
+            continue
+        vus.add(e.texte)
+        retenues.append(e)
+        utilise += cout
+    if not retenues and fenetres:
+        # Même la meilleure fenêtre dépasse le budget : la tronquer
+        meilleure = min(fenetres, key=lambda e: (-e.score, len(e.texte)))
+        retenues.append(meilleure._replace(texte=meilleure.texte[:budget]))
+
+    return sorted(retenues, key=lambda e: (e.paragraphe, e.debut))
+
+
+def joindre(extraits: list) -> str:
+    """Texte final des extraits, séparés par une ligne vide."""
+    return "\n\n".join(e.texte for e in extraits)
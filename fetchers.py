@@ -3,120 +3,211 @@ fetchers.py — Récupération des sources politiques ontariennes.
 Chaque fonction retourne du texte brut prêt à être analysé par Claude.
 """
 
+import contextvars
+import json
 import re
-import time
-import requests
+import threading
 import feedparser
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
-# Use a persistent session so cookies and keep-alive work across requests.
-SESSION = requests.Session()
-SESSION.headers.update({
-    "User-Agent": (
-        "Mozilla/5.0 (X11; Linux x86_64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/121.0.0.0 Safari/537.36"
-    ),
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-    "Accept-Language": "en-CA,en;q=0.9,fr-CA;q=0.8",
-    "Accept-Encoding": "gzip, deflate, br",
-    "Connection": "keep-alive",
-    "Upgrade-Insecure-Requests": "1",
-})
+from archive import maintenant
+from disjoncteur import DISJONCTEUR
+from document import Document, texte_element
+from parallel import executer_en_parallele, afficher_durees
+from navigateur import NAVIGATEUR, NavigateurIndisponible
+from scheduler import PLANIFICATEUR
+from telemetrie import portee
+import transport
+
+# Texte du Hansard transmis à budget.py, qui le ramène ensuite à sa part de jetons
+HANSARD_MAX_CHARS = 60_000
+
+# Session partagée (keep-alive, pools par hôte, reprises) — voir transport.py
+SESSION = transport.SESSION
+
+
+class _ReponseRendue:
+    """Réponse minimale imitant requests.Response pour du HTML rendu par Playwright."""
+
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
 
 
 def safe_get_js(url, timeout=30):
     """Charge une page via Playwright pour les sites qui nécessitent JavaScript."""
-    try:
-        from playwright.sync_api import sync_playwright
-    except ImportError:
-        print(f"  ⚠ Playwright non installé — fallback HTTP pour {url[:60]}")
+    if not NAVIGATEUR.disponible():
+        print(f"  ⚠ Playwright non disponible — fallback HTTP pour {url[:60]}")
         return safe_get(url)
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.set_extra_http_headers({"Accept-Language": "en-CA,en;q=0.9,fr-CA;q=0.8"})
-            page.goto(url, wait_until="networkidle", timeout=timeout * 1000)
-            content = page.content()
-            browser.close()
-        print(f"    ✓ JS {url[:80]} ({len(content):,} chars)")
 
-        class _R:
-            text = content
-            status_code = 200
+    # `delai` : délai accordé par le disjoncteur (court pour un point d'accès dégradé)
+    async def charger(page):
+        await page.goto(url, wait_until="networkidle", timeout=delai * 1000)
+        return await page.content()
 
-        return _R()
+    try:
+        with portee("rendu", "render", url=url) as p, \
+                DISJONCTEUR.surveiller(url, timeout, ignorer=(NavigateurIndisponible,)) as delai, \
+                PLANIFICATEUR.creneau(url):
+            content = NAVIGATEUR.executer(
+                charger, en_tetes={"Accept-Language": "en-CA,en;q=0.9,fr-CA;q=0.8"},
+                cle=f"rendu|{url}",
+            )
+            p.noter(octets=len(content.encode("utf-8")))
+        print(f"    ✓ JS {url[:80]} ({len(content):,} chars)")
+        return _ReponseRendue(content)
+    except NavigateurIndisponible as e:
+        print(f"  ⚠ {e} — fallback HTTP pour {url[:60]}")
+        return safe_get(url)
     except Exception as e:
         print(f"  ⚠ JS {url[:80]} : {e}")
         return None
 
 
-def safe_get(url, timeout=20, params=None):
-    """Fait une requête HTTP sécurisée avec sortie de débogage."""
+def safe_get(url, timeout=20, params=None, ttl=None):
+    """
+    Fait une requête HTTP sécurisée avec sortie de débogage.
+    Passe par le cache HTTP (requêtes conditionnelles) ; `ttl` remplace le
+    TTL par défaut de la source (voir httpcache.TTL_PAR_MOTIF).
+    """
     try:
-        r = SESSION.get(url, timeout=timeout, params=params, allow_redirects=True)
-        r.raise_for_status()
-        print(f"    ✓ {url[:80]} [{r.status_code}] ({len(r.text):,} chars)")
+        r = transport.telecharger(url, timeout=timeout, params=params, ttl=ttl)
+        origine = f" — cache {r.depuis_cache}" if getattr(r, "depuis_cache", None) else ""
+        print(f"    ✓ {url[:80]} [{r.status_code}] ({len(r.text):,} chars){origine}")
         return r
     except Exception as e:
         print(f"  ⚠ {url[:80]} : {e}")
         return None
 
 
-def soup_text(r, max_chars=5000, main_only=False):
-    """Extrait le texte propre d'une réponse HTTP."""
-    soup = BeautifulSoup(r.text, "html.parser")
-    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
-        tag.decompose()
-    if main_only:
-        main = (
-            soup.find("main")
-            or soup.find(id="content")
-            or soup.find(class_="content")
-            or soup.find(attrs={"role": "main"})
+def fetch_feed(url, timeout=20):
+    """
+    Télécharge un flux RSS/Atom via safe_get (cache, planificateur) puis
+    le parse. Retourne un flux vide si le téléchargement échoue.
+    """
+    r = safe_get(url, timeout=timeout)
+    if not r:
+        return feedparser.FeedParserDict(entries=[])
+    with portee("rss", "parse", url=url, octets=len(r.content)) as p:
+        flux = feedparser.parse(
+            r.content, response_headers={"content-type": r.headers.get("Content-Type", "")}
         )
-        if main:
-            soup = main
-    lines = [
-        l.strip()
-        for l in soup.get_text(separator="\n").splitlines()
-        if len(l.strip()) > 25
-    ]
-    return "\n".join(lines[:200])[:max_chars]
+        p.noter(entrees=len(flux.entries))
+    return flux
+
+
+def soup_text(r, max_chars=5000, main_only=False):
+    """Extrait le texte propre d'une réponse HTTP (document analysé une seule fois)."""
+    return Document.de_reponse(r).texte(max_chars=max_chars, main_only=main_only)
+
+
+# Dernier flux valide connu pour chaque liste de candidats, conservé d'un passage à l'autre
+FLUX_RESOLUS_FICHIER = Path(__file__).parent / ".cache" / "flux_resolus.json"
+_flux_resolus = None
+_verrou_flux = threading.Lock()
+
+
+def _resolutions_flux() -> dict:
+    global _flux_resolus
+    with _verrou_flux:
+        if _flux_resolus is None:
+            try:
+                with open(FLUX_RESOLUS_FICHIER, encoding="utf-8") as f:
+                    _flux_resolus = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                _flux_resolus = {}
+        return _flux_resolus
+
+
+def _memoriser_flux(cle: str, url) -> None:
+    resolutions = _resolutions_flux()
+    with _verrou_flux:
+        if url is None:
+            if resolutions.pop(cle, None) is None:
+                return
+        elif resolutions.get(cle) == url:
+            return
+        else:
+            resolutions[cle] = url
+        try:
+            FLUX_RESOLUS_FICHIER.parent.mkdir(parents=True, exist_ok=True)
+            with open(FLUX_RESOLUS_FICHIER, "w", encoding="utf-8") as f:
+                json.dump(resolutions, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"    ⚠ Impossible d'enregistrer les flux résolus : {e}")
+
+
+def sonder_flux(urls):
+    """
+    Retourne (url, flux) pour le premier flux RSS non vide parmi `urls`,
+    ou (None, None) si aucun ne répond.
+
+    Le flux qui a fonctionné au passage précédent est essayé seul en premier ;
+    s'il échoue (ou s'il n'y en a pas), tous les autres candidats sont sondés
+    en parallèle et le premier flux valide l'emporte, sans attendre l'expiration
+    des candidats morts. Le gagnant est mémorisé pour les passages suivants.
+    """
+    cle = "|".join(urls)
+    connu = _resolutions_flux().get(cle)
+    if connu in urls:
+        feed = fetch_feed(connu)
+        if feed.entries:
+            return connu, feed
+        print(f"    ⚠ Flux mémorisé vide ou inaccessible, nouvelle sonde : {connu}")
+
+    candidats = [u for u in urls if u != connu]
+    gagnant, flux = None, None
+    if candidats:
+        pool = ThreadPoolExecutor(max_workers=len(candidats), thread_name_prefix="sonde-rss")
+        futures = {pool.submit(contextvars.copy_context().run, fetch_feed, url): url
+                   for url in candidats}
+        try:
+            for futur in as_completed(futures):
+                try:
+                    feed = futur.result()
+                except Exception as e:
+                    print(f"    ⚠ Erreur RSS {futures[futur]} : {e}")
+                    continue
+                if feed.entries:
+                    gagnant, flux = futures[futur], feed
+                    break
+        finally:
+            # Les sondes encore en vol se terminent en arrière-plan
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    _memoriser_flux(cle, gagnant)
+    return gagnant, flux
 
 
 def try_rss(urls, cutoff_hours=36, max_items=8):
     """
-    Essaie plusieurs URLs RSS dans l'ordre.
+    Sonde plusieurs URLs RSS candidates (voir sonder_flux).
     Retourne un texte formaté si des entrées sont trouvées, sinon None.
     """
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=cutoff_hours)
-    for url in urls:
+    cutoff = maintenant(timezone.utc) - timedelta(hours=cutoff_hours)
+    url, feed = sonder_flux(urls)
+    if not feed:
+        print(f"    ⚠ RSS vide ou inaccessible : {len(urls)} candidat(s) essayé(s)")
+        return None
+    print(f"    ✓ RSS OK : {url} ({len(feed.entries)} entrées)")
+    items = []
+    for entry in feed.entries[:20]:
         try:
-            feed = feedparser.parse(url)
-            if not feed.entries:
-                print(f"    ⚠ RSS vide ou inaccessible : {url}")
-                continue
-            print(f"    ✓ RSS OK : {url} ({len(feed.entries)} entrées)")
-            items = []
-            for entry in feed.entries[:20]:
-                try:
-                    pub = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
-                except Exception:
-                    pub = datetime.now(timezone.utc)
-                if pub >= cutoff or len(items) < 3:
-                    titre = entry.get("title", "(sans titre)")
-                    resume = entry.get("summary", "")[:400]
-                    lien = entry.get("link", "")
-                    items.append(
-                        f"[{pub.strftime('%Y-%m-%d')}] {titre}\n{resume}\n{lien}"
-                    )
-            if items:
-                return "\n\n".join(items[:max_items])
-        except Exception as e:
-            print(f"    ⚠ Erreur RSS {url} : {e}")
+            pub = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
+        except Exception:
+            pub = maintenant(timezone.utc)
+        if pub >= cutoff or len(items) < 3:
+            titre = entry.get("title", "(sans titre)")
+            resume = entry.get("summary", "")[:400]
+            lien = entry.get("link", "")
+            items.append(
+                f"[{pub.strftime('%Y-%m-%d')}] {titre}\n{resume}\n{lien}"
+            )
+    if items:
+        return "\n\n".join(items[:max_items])
     return None
 
 
@@ -147,17 +238,14 @@ def fetch_news_ontario():
         if not r:
             continue
 
-        soup = BeautifulSoup(r.text, "html.parser")
-        for tag in soup(["script", "style", "nav", "footer"]):
-            tag.decompose()
+        doc = Document.de_reponse(r)
+        hors_navigation = ("nav", "footer")
 
         items = []
         seen = set()
 
         # Chercher d'abord les liens vers des communiqués individuels
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            titre = a.get_text(strip=True)
+        for titre, href in doc.liens(exclure=hors_navigation):
             if len(titre) < 20 or titre in seen:
                 continue
             if re.search(r"/release[s]?/", href):
@@ -170,13 +258,16 @@ def fetch_news_ontario():
 
         # Chercher aussi dans les balises <article> ou <h2>/<h3> si aucun lien trouvé
         if not items:
-            for container in soup.find_all(["article", "li"], class_=re.compile(r"release|news|story|item", re.I)):
-                titre_tag = container.find(["h2", "h3", "h4", "a"])
-                lien_tag = container.find("a", href=True)
-                if not titre_tag or not lien_tag:
+            classe_re = re.compile(r"release|news|story|item", re.I)
+            for container in doc.elements("article", "li", exclure=hors_navigation):
+                if not classe_re.search(container.get("class", "")):
+                    continue
+                titre_tag = next(container.iter("h2", "h3", "h4", "a"), None)
+                lien_tag = next((a for a in container.iter("a") if a.get("href")), None)
+                if titre_tag is None or lien_tag is None:
                     continue
-                titre = titre_tag.get_text(strip=True)
-                href = lien_tag["href"]
+                titre = texte_element(titre_tag)
+                href = lien_tag.get("href")
                 if len(titre) < 20 or titre in seen:
                     continue
                 if not href.startswith("http"):
@@ -204,11 +295,11 @@ def fetch_hansard():
     print("  → Hansard (ola.org)...")
 
     # L'Assemblée est en recès jusqu'au 23 mars 2026 — aucun suivi avant cette date.
-    if datetime.now() < datetime(2026, 3, 23):
+    if maintenant() < datetime(2026, 3, 23):
         print("  → Hansard suspendu (recès jusqu'au 23 mars 2026).")
         return "Hansard non suivi jusqu'au 23 mars 2026 (Assemblée en recès)."
 
-    year = datetime.now().year
+    year = maintenant().year
 
     index_urls = [
         "https://www.ola.org/en/legislative-business/house-documents/parliament-43/session-1/hansard",
@@ -217,22 +308,20 @@ def fetch_hansard():
         "https://www.ola.org/en/legislative-business",
     ]
 
-    soup = None
+    doc = None
     for url in index_urls:
         r = safe_get(url)
         if r and len(r.text) > 1000:
-            soup = BeautifulSoup(r.text, "html.parser")
-            if soup.find_all("a", href=True):
+            doc = Document.de_reponse(r)
+            if doc.liens():
                 break
 
-    if not soup:
+    if not doc:
         return "Hansard non disponible (site OLA inaccessible)."
 
     # Collect links that look like individual Hansard documents
     hansard_links = []
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        texte = a.get_text(strip=True)
+    for texte, href in doc.liens():
         if not texte or len(texte) < 5:
             continue
         if "hansard" in href.lower() or str(year) in href:
@@ -244,12 +333,12 @@ def fetch_hansard():
         return "Index OLA accessible, mais aucun Hansard récent identifié."
 
     titre, lien = hansard_links[0]
-    time.sleep(1)
     r2 = safe_get(lien)
     if not r2:
         return f"Hansard récent : {titre}\n{lien}\n(Contenu non accessible)"
 
-    texte = soup_text(r2, max_chars=5000)
+    # Texte complet : c'est budget.py qui le ramène à la part de jetons du Hansard
+    texte = Document.de_reponse(r2).texte(max_chars=HANSARD_MAX_CHARS, max_lignes=5000)
     return f"Hansard : {titre}\nLien : {lien}\n\n{texte}"
 
 
@@ -317,18 +406,15 @@ _OIC_HREF_RE = re.compile(r"order[s]?-in-council", re.IGNORECASE)
 
 def _oic_links_from_html(html: str, base: str = "https://www.ontario.ca") -> list:
     """Extrait les liens vers des décrets individuels depuis du HTML (singulier ou pluriel)."""
-    soup = BeautifulSoup(html, "html.parser")
     links = []
     seen = set()
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
+    for texte, href in Document(html).liens():
         if not href or href.startswith("#") or "javascript:" in href:
             continue
         full = href if href.startswith("http") else base + href
         if _OIC_HREF_RE.search(href) and "/search/" not in href and full not in seen:
             seen.add(full)
-            texte = a.get_text(strip=True) or full.rstrip("/").split("/")[-1]
-            links.append((texte, full))
+            links.append((texte or full.rstrip("/").split("/")[-1], full))
     return links
 
 
@@ -340,81 +426,79 @@ def _oic_playwright_search(url: str) -> tuple:
     - Retourne (captured_json, rendered_html, all_hrefs)
     all_hrefs = liste brute de tous les href (pour débogage en cas d'échec)
     """
-    try:
-        from playwright.sync_api import sync_playwright
-    except ImportError:
+    if not NAVIGATEUR.disponible():
         return [], None, []
 
     captured_json = []
-    rendered_html = None
-    all_hrefs = []
 
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                extra_http_headers={"Accept-Language": "en-CA,en;q=0.9"}
-            )
-            page = context.new_page()
-
-            def on_response(response):
-                ct = response.headers.get("content-type", "")
-                if response.status == 200 and "json" in ct:
-                    try:
-                        data = response.json()
-                        captured_json.append((response.url, data))
-                        print(f"    ✓ JSON intercepté : {response.url[:80]}")
-                    except Exception:
-                        pass
-
-            page.on("response", on_response)
-            page.goto(url, wait_until="networkidle", timeout=45_000)
-
-            # Attendre qu'au moins un sélecteur de résultat soit présent
-            for sel in [
-                "table tbody tr a",
-                "[class*='result'] a",
-                "[class*='Result'] a",
-                "main ul li a",
-                "main ol li a",
-                "article a",
-                "main a[href*='order']",
-                "main a[href*='council']",
-                ".search-results a",
-            ]:
+    async def rechercher(page):
+        async def on_response(response):
+            ct = response.headers.get("content-type", "")
+            if response.status == 200 and "json" in ct:
                 try:
-                    page.wait_for_selector(sel, timeout=4_000)
-                    print(f"    ✓ Sélecteur résultat détecté : {sel}")
-                    break
+                    data = await response.json()
+                    captured_json.append((response.url, data))
+                    print(f"    ✓ JSON intercepté : {response.url[:80]}")
                 except Exception:
                     pass
 
-            # Scroll pour déclencher le chargement paresseux
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            page.wait_for_timeout(2_000)
-
-            # Collecter TOUS les href de la page (débogage)
-            all_hrefs = page.evaluate(
-                "() => Array.from(document.querySelectorAll('a[href]'))"
-                ".map(a => a.getAttribute('href'))"
-            )
-
-            oic_count = sum(
-                1 for h in all_hrefs
-                if h and _OIC_HREF_RE.search(h) and "/search/" not in h
-            )
-            print(f"    ℹ {len(all_hrefs)} liens sur la page, "
-                  f"{oic_count} correspondent au pattern OIC")
+        page.on("response", on_response)
+        await page.goto(url, wait_until="networkidle", timeout=45_000)
+
+        # Attendre qu'au moins un sélecteur de résultat soit présent
+        for sel in [
+            "table tbody tr a",
+            "[class*='result'] a",
+            "[class*='Result'] a",
+            "main ul li a",
+            "main ol li a",
+            "article a",
+            "main a[href*='order']",
+            "main a[href*='council']",
+            ".search-results a",
+        ]:
+            try:
+                await page.wait_for_selector(sel, timeout=4_000)
+                print(f"    ✓ Sélecteur résultat détecté : {sel}")
+                break
+            except Exception:
+                pass
 
-            if oic_count == 0:
-                sample = [h for h in all_hrefs if h and h.startswith("/") and len(h) > 5][:15]
-                print(f"    ℹ Échantillon des liens trouvés : {sample}")
+        # Scroll pour déclencher le chargement paresseux
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        await page.wait_for_timeout(2_000)
 
-            rendered_html = page.content()
-            browser.close()
+        # Collecter TOUS les href de la page (débogage)
+        all_hrefs = await page.evaluate(
+            "() => Array.from(document.querySelectorAll('a[href]'))"
+            ".map(a => a.getAttribute('href'))"
+        )
+        return await page.content(), all_hrefs, captured_json
 
+    try:
+        with portee("rendu OIC", "render", url=url) as p, \
+                DISJONCTEUR.surveiller(url, 45, ignorer=(NavigateurIndisponible,)), \
+                PLANIFICATEUR.creneau(url):
+            # JSON intercepté retourné avec la page : il est archivé avec elle (archive.py)
+            rendered_html, all_hrefs, captured_json = NAVIGATEUR.executer(
+                rechercher, en_tetes={"Accept-Language": "en-CA,en;q=0.9"},
+                cle=f"recherche-oic|{url}",
+            )
+            p.noter(octets=len(rendered_html.encode("utf-8")), json_interceptes=len(captured_json))
     except Exception as e:
         print(f"  ⚠ Playwright OIC {url} : {e}")
+        return captured_json, None, []
+
+    oic_count = sum(
+        1 for h in all_hrefs
+        if h and _OIC_HREF_RE.search(h) and "/search/" not in h
+    )
+    print(f"    ℹ {len(all_hrefs)} liens sur la page, "
+          f"{oic_count} correspondent au pattern OIC")
+
+    if oic_count == 0:
+        sample = [h for h in all_hrefs if h and h.startswith("/") and len(h) > 5][:15]
+        print(f"    ℹ Échantillon des liens trouvés : {sample}")
 
     return captured_json, rendered_html, all_hrefs
 
@@ -448,55 +532,14 @@ def _oic_json_to_links(captured_json: list, base: str = "https://www.ontario.ca"
     return links
 
 
-def _oic_extract_bold_names(html: str) -> list:
-    """
-    Extrait les noms écrits en gras (<strong> ou <b>) dans un document de décret.
-    Les décrets ontariens indiquent toujours le nom de la personne nommée en gras.
-    Retourne une liste dédupliquée de chaînes (noms ou courtes expressions en gras).
-    """
-    soup = BeautifulSoup(html, "html.parser")
-    names = []
-    seen = set()
-    for tag in soup.find_all(["strong", "b"]):
-        name = tag.get_text(strip=True)
-        # Garder seulement des textes ressemblant à un nom propre (1-6 mots, pas trop long)
-        if not name or name in seen or len(name) > 100:
-            continue
-        words = name.split()
-        if len(words) < 1 or len(words) > 6:
-            continue
-        # Ignorer les chaînes entièrement en majuscules (titres de section) ou trop courtes
-        if name.isupper() or len(name) < 3:
-            continue
-        seen.add(name)
-        names.append(name)
-    return names
-
-
 def _oic_soup_text_with_names(r, max_chars=2000) -> str:
     """
     Variante de soup_text pour les décrets : extrait le texte ET préfixe
-    la liste des noms en gras trouvés dans le document.
+    la liste des noms en gras trouvés dans le document (une seule analyse HTML).
     """
-    soup = BeautifulSoup(r.text, "html.parser")
-
-    bold_names = _oic_extract_bold_names(r.text)
-
-    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
-        tag.decompose()
-    main = (
-        soup.find("main")
-        or soup.find(id="content")
-        or soup.find(class_="content")
-        or soup.find(attrs={"role": "main"})
-        or soup
-    )
-    lines = [
-        l.strip()
-        for l in main.get_text(separator="\n").splitlines()
-        if len(l.strip()) > 10
-    ]
-    texte = "\n".join(lines[:200])[:max_chars]
+    doc = Document.de_reponse(r)
+    bold_names = doc.noms_en_gras()
+    texte = doc.texte(max_chars=max_chars, main_only=True, min_len=10)
 
     if bold_names:
         prefix = "PERSONNES/ENTITÉS EN GRAS DANS LE DÉCRET : " + " | ".join(bold_names) + "\n\n"
@@ -505,25 +548,27 @@ def _oic_soup_text_with_names(r, max_chars=2000) -> str:
 
 
 def _oic_fetch_content_playwright(lien: str) -> str:
-    """Récupère le contenu d'un décret via Playwright (fallback JS)."""
+    """Récupère le contenu d'un décret via Playwright (fallback JS), noms en gras compris."""
+    if not NAVIGATEUR.disponible():
+        return ""
+
+    async def rendre(page):
+        await page.goto(lien, wait_until="networkidle", timeout=30_000)
+        for sel in ["main", "article", "[role='main']", "#content"]:
+            try:
+                await page.wait_for_selector(sel, timeout=3_000)
+                break
+            except Exception:
+                pass
+        return await page.content()
+
     try:
-        from playwright.sync_api import sync_playwright
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(lien, wait_until="networkidle", timeout=30_000)
-            for sel in ["main", "article", "[role='main']", "#content"]:
-                try:
-                    page.wait_for_selector(sel, timeout=3_000)
-                    break
-                except Exception:
-                    pass
-            html = page.content()
-            browser.close()
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup(["script", "style", "nav", "header", "footer"]):
-            tag.decompose()
-        return soup.get_text(" ", strip=True)[:2000]
+        with portee("rendu décret", "render", url=lien) as p, \
+                DISJONCTEUR.surveiller(lien, 30, ignorer=(NavigateurIndisponible,)), \
+                PLANIFICATEUR.creneau(lien):
+            html = NAVIGATEUR.executer(rendre, cle=f"decret|{lien}")
+            p.noter(octets=len(html.encode("utf-8")))
+        return _oic_soup_text_with_names(_ReponseRendue(html), max_chars=2000)
     except Exception as e:
         print(f"    ⚠ Playwright contenu décret : {e}")
         return ""
@@ -532,7 +577,7 @@ def _oic_fetch_content_playwright(lien: str) -> str:
 def fetch_orders_in_council():
     print("  → Décrets du Conseil...")
 
-    today = datetime.now()
+    today = maintenant()
     base = "https://www.ontario.ca"
     search_url = f"{base}/search/orders-in-council"
 
@@ -609,7 +654,6 @@ def fetch_orders_in_council():
     # --- Récupérer le contenu de chaque décret (max 5) ---
     resultats = []
     for titre, lien in order_links[:5]:
-        time.sleep(1)
         contenu = ""
         r_order = safe_get(lien)
         if r_order:
@@ -617,22 +661,7 @@ def fetch_orders_in_council():
             contenu = _oic_soup_text_with_names(r_order, max_chars=2000)
         if not contenu:
             # Fallback Playwright : extraire aussi les noms en gras du HTML rendu
-            try:
-                from playwright.sync_api import sync_playwright
-                with sync_playwright() as p:
-                    browser = p.chromium.launch(headless=True)
-                    page = browser.new_page()
-                    page.goto(lien, wait_until="networkidle", timeout=30_000)
-                    html = page.content()
-                    browser.close()
-
-                class _FakeR:
-                    text = html
-
-                contenu = _oic_soup_text_with_names(_FakeR(), max_chars=2000)
-            except Exception as e:
-                print(f"    ⚠ Playwright fallback décret : {e}")
-                contenu = _oic_fetch_content_playwright(lien)
+            contenu = _oic_fetch_content_playwright(lien)
         if contenu:
             resultats.append(f"Décret : {titre}\nLien : {lien}\n\n{contenu}")
             print(f"    ✓ Décret récupéré : {titre[:60]}")
@@ -650,17 +679,27 @@ def fetch_orders_in_council():
 # ---------------------------------------------------------------------------
 def fetch_all() -> dict:
     """
-    Récupère toutes les sources et retourne un dictionnaire
-    { nom_source: contenu_texte }.
+    Récupère toutes les sources en parallèle et retourne un dictionnaire
+    { nom_source: contenu_texte }, dans l'ordre de déclaration des sources.
     """
     print("📡 Récupération des sources politiques ontariennes...")
-    sources = {
-        "Communiqués du gouvernement (news.ontario.ca)": fetch_news_ontario(),
-        "Hansard — Assemblée législative de l'Ontario": fetch_hansard(),
-        "Gazette de l'Ontario": fetch_gazette(),
-        "Registre des lobbyistes": fetch_lobbyist_registry(),
-        "Registre de la réglementation de l'Ontario": fetch_regulatory_registry(),
-        "Décrets du Conseil": fetch_orders_in_council(),
-    }
+    taches = [
+        ("Communiqués du gouvernement (news.ontario.ca)", fetch_news_ontario),
+        ("Hansard — Assemblée législative de l'Ontario", fetch_hansard),
+        ("Gazette de l'Ontario", fetch_gazette),
+        ("Registre des lobbyistes", fetch_lobbyist_registry),
+        ("Registre de la réglementation de l'Ontario", fetch_regulatory_registry),
+        ("Décrets du Conseil", fetch_orders_in_council),
+    ]
+    resultats = executer_en_parallele(taches)
+
+    sources = {}
+    for res in resultats:
+        if res.erreur:
+            print(f"  ⚠ Erreur pour {res.nom} : {res.erreur}")
+            sources[res.nom] = f"{res.nom} non disponible (erreur : {res.erreur})."
+        else:
+            sources[res.nom] = res.valeur
+    afficher_durees(resultats, "sources ontariennes")
     print("✅ Sources récupérées.")
     return sources
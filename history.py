@@ -3,82 +3,200 @@ history.py — Mémorisation des éléments déjà couverts dans les digests pr
 
 Évite la répétition d'un digest à l'autre, notamment pour les décrets
 nommant des personnes à des conseils d'administration.
+
+L'historique est conservé dans une base SQLite (mode WAL) : insertions
+incrémentales, dédoublonnage par empreinte indexée et purge de rétention
+en SQL. Deux exécutions simultanées ne peuvent plus écraser leurs écritures.
+L'ancien fichier digest_history.json est importé au premier accès.
+
+Chaque élément porte l'empreinte de son contenu (URL, titre et corps
+normalisés, voir empreintes.py), son simhash et son URL : les éléments déjà
+couverts sont retirés des sources avant même la construction du prompt.
 """
 
+import hashlib
 import json
+import sqlite3
+from contextlib import closing
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from empreintes import elements_de
+
+HISTORY_DB = Path(__file__).parent / "digest_history.db"
+# Ancien format, importé automatiquement dans la base au premier accès
 HISTORY_FILE = Path(__file__).parent / "digest_history.json"
 RETENTION_DAYS = 14
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id          INTEGER PRIMARY KEY,
+    date        TEXT NOT NULL,          -- AAAA-MM-JJ
+    description TEXT NOT NULL,
+    empreinte   TEXT NOT NULL UNIQUE    -- SHA-1 du contenu normalisé
+);
+CREATE INDEX IF NOT EXISTS idx_items_date ON items(date);
+"""
 
-def _load() -> dict:
-    if not HISTORY_FILE.exists():
-        return {"items": []}
-    try:
-        with open(HISTORY_FILE, encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return {"items": []}
+# Migrations successives, indexées par PRAGMA user_version
+_MIGRATIONS = [
+    # 1 : empreintes de contenu (empreinte = SHA-1 du contenu normalisé désormais)
+    [
+        "ALTER TABLE items ADD COLUMN source TEXT",
+        "ALTER TABLE items ADD COLUMN url TEXT",
+        "ALTER TABLE items ADD COLUMN simhash INTEGER",
+        "CREATE INDEX IF NOT EXISTS idx_items_url ON items(url)",
+    ],
+]
+
+
+def _empreinte(description: str) -> str:
+    return hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+
+def _signe(simhash: int) -> int:
+    """Simhash 64 bits non signé → entier SQLite signé (et inversement avec _non_signe)."""
+    return simhash - (1 << 64) if simhash >= 1 << 63 else simhash
+
+
+def _non_signe(valeur: int) -> int:
+    return valeur + (1 << 64) if valeur < 0 else valeur
+
+
+def _cutoff(days: int, depuis: datetime = None) -> str:
+    # Comparaison de chaînes ISO : « 2026-03-02 » < « 2026-03-02T11:00:00 »,
+    # exactement comme la comparaison des datetime dans l'ancien format JSON.
+    return ((depuis or datetime.now()) - timedelta(days=days)).isoformat(timespec="seconds")
 
 
-def _save(data: dict) -> None:
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def _migrer_json(conn: sqlite3.Connection) -> None:
+    """
+    Importe digest_history.json dans la base, puis le renomme en .json.migre.
+    Sous verrou d'écriture : de deux exécutions simultanées, une seule migre,
+    l'autre trouve le fichier déjà renommé.
+    """
+    if not HISTORY_FILE.exists():
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        try:
+            with open(HISTORY_FILE, encoding="utf-8") as f:
+                items = json.load(f).get("items", [])
+        except FileNotFoundError:
+            conn.execute("ROLLBACK")
+            return
+        except (json.JSONDecodeError, OSError):
+            items = []
+        conn.executemany(
+            "INSERT OR IGNORE INTO items (date, description, empreinte) VALUES (?, ?, ?)",
+            [
+                (item["date"][:10], item["description"], _empreinte(item["description"]))
+                for item in items
+                if item.get("date") and item.get("description")
+            ],
+        )
+        try:
+            HISTORY_FILE.rename(HISTORY_FILE.with_name(HISTORY_FILE.name + ".migre"))
+        except FileNotFoundError:
+            pass
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    print(f"💾 Historique JSON migré vers SQLite ({len(items)} élément(s)).")
+
+
+def _migrer_schema(conn: sqlite3.Connection) -> None:
+    """Applique les migrations manquantes, sous verrou d'écriture (exécutions concurrentes)."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        for numero, instructions in enumerate(_MIGRATIONS[version:], start=version + 1):
+            for instruction in instructions:
+                conn.execute(instruction)
+            conn.execute(f"PRAGMA user_version = {numero}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _connexion() -> sqlite3.Connection:
+    conn = sqlite3.connect(HISTORY_DB, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    _migrer_schema(conn)
+    conn.isolation_level = "IMMEDIATE"  # une écriture à la fois entre exécutions concurrentes
+    _migrer_json(conn)
+    return conn
 
 
 def get_recent_items(days: int = RETENTION_DAYS) -> list:
     """Retourne les descriptions des éléments couverts dans les derniers `days` jours."""
-    data = _load()
-    cutoff = datetime.now() - timedelta(days=days)
+    with closing(_connexion()) as conn:
+        rows = conn.execute(
+            "SELECT description FROM items WHERE date > ? ORDER BY date, id",
+            (_cutoff(days),),
+        ).fetchall()
+    return [description for (description,) in rows]
+
+
+def get_recent_fingerprints(days: int = RETENTION_DAYS, avant: datetime = None) -> list:
+    """
+    Empreintes des éléments couverts dans les derniers `days` jours :
+    liste de dicts {empreinte, simhash, url, date}, du plus récent au plus ancien.
+
+    Avec `avant`, l'historique tel qu'il était ce jour-là : les `days` jours
+    précédant `avant`, sans les éléments enregistrés ce jour-là ou après
+    (rejeu d'une exécution archivée, voir archive.py).
+    """
+    fin = avant.date().isoformat() if avant else "9999"
+    with closing(_connexion()) as conn:
+        rows = conn.execute(
+            "SELECT empreinte, simhash, url, date FROM items WHERE date > ? AND date < ? "
+            "ORDER BY date DESC, id DESC",
+            (_cutoff(days, avant), fin),
+        ).fetchall()
     return [
-        item["description"]
-        for item in data.get("items", [])
-        if datetime.fromisoformat(item["date"]) > cutoff
+        {
+            "empreinte": empreinte,
+            "simhash": _non_signe(simhash) if simhash is not None else None,
+            "url": url,
+            "date": date,
+        }
+        for empreinte, simhash, url, date in rows
     ]
 
 
 def record_items(items: list) -> None:
-    """Enregistre de nouveaux éléments dans l'historique et purge les anciens."""
+    """
+    Enregistre de nouveaux éléments dans l'historique et purge les anciens.
+    Chaque élément est un empreintes.Element, ou une simple description (texte).
+    """
     if not items:
         return
-    data = _load()
-    cutoff = datetime.now() - timedelta(days=RETENTION_DAYS)
-    data["items"] = [
-        item for item in data.get("items", [])
-        if datetime.fromisoformat(item["date"]) > cutoff
-    ]
     today = datetime.now().date().isoformat()
-    existing = {item["description"] for item in data["items"]}
-    for desc in items:
-        if desc not in existing:
-            data["items"].append({"date": today, "description": desc})
-    _save(data)
+    lignes = []
+    for item in items:
+        if isinstance(item, str):
+            lignes.append((today, item, _empreinte(item), None, None, None))
+        else:
+            lignes.append((today, item.description, item.empreinte, item.source,
+                           item.url or None, _signe(item.simhash)))
+    with closing(_connexion()) as conn, conn:
+        conn.execute("DELETE FROM items WHERE date <= ?", (_cutoff(RETENTION_DAYS),))
+        conn.executemany(
+            "INSERT OR IGNORE INTO items (date, description, empreinte, source, url, simhash) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            lignes,
+        )
 
 
 def extract_tracked_items(sources: dict) -> list:
     """
-    Extrait les identifiants traçables depuis les sources brutes,
-    avant que Claude ne les traite.
+    Extrait les éléments traçables (avec leurs empreintes) depuis les sources
+    brutes, avant que Claude ne les traite : un élément par décret, communiqué
+    ou extrait interprovincial, et un par page pour les autres sources.
     """
-    items = []
-
-    # Décrets du Conseil : noms des personnes nommées
-    oic_content = sources.get("Décrets du Conseil (OIC)", "")
-    for line in oic_content.splitlines():
-        if line.startswith("PERSONNES/ENTITÉS EN GRAS DANS LE DÉCRET :"):
-            noms = line.split(":", 1)[1].strip()
-            if noms:
-                items.append(f"Décret — nomination : {noms}")
-
-    # Communiqués Ontario Newsroom : titres et URLs
-    news_content = sources.get("Communiqués Ontario Newsroom", "")
-    for line in news_content.splitlines():
-        line = line.strip()
-        if line.startswith("http"):
-            items.append(f"Communiqué : {line[:150]}")
-        elif len(line) > 30 and not line.startswith(("=", "[", "-")):
-            items.append(f"Communiqué : {line[:150]}")
-
-    return items
+    return elements_de(sources)
@@ -0,0 +1,254 @@
+"""
+httpcache.py — Cache HTTP sur disque avec requêtes conditionnelles.
+
+Les réponses sont conservées dans .cache/http/ avec leurs validateurs
+(ETag, Last-Modified). Au passage suivant :
+  - si l'entrée est plus jeune que le TTL de la source, elle est servie
+    sans aucune requête réseau ;
+  - sinon la requête part avec If-None-Match / If-Modified-Since, et une
+    réponse 304 est servie depuis le cache (seuls les en-têtes transitent).
+
+La taille totale du cache est bornée : au-delà, les entrées les moins
+récemment utilisées sont supprimées.
+
+Variables d'environnement :
+  HTTP_CACHE          — « 0 » pour désactiver le cache (défaut : activé)
+  HTTP_CACHE_DIR      — répertoire du cache (défaut : .cache/http à côté du code)
+  HTTP_CACHE_MAX_MO   — taille maximale du cache en Mo (défaut : 200)
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_ACTIF = os.environ.get("HTTP_CACHE", "1").strip() != "0"
+CACHE_DIR = Path(os.environ.get("HTTP_CACHE_DIR") or Path(__file__).parent / ".cache" / "http")
+CACHE_MAX_OCTETS = int(float(os.environ.get("HTTP_CACHE_MAX_MO", "200") or 200) * 1024 * 1024)
+
+HEURE = 3600
+
+# Durée pendant laquelle une entrée est servie sans revalidation, par motif d'URL.
+# Le premier motif qui correspond l'emporte ; par défaut (TTL 0) chaque passage
+# revalide auprès du serveur, ce qui reste économique grâce aux réponses 304.
+TTL_PAR_MOTIF = [
+    # Index des gazettes : mis à jour au plus une fois par semaine
+    (re.compile(r"gazette", re.I), 6 * HEURE),
+    # Index Hansard des territoires : sessions rares
+    (re.compile(r"yukonassembly\.ca|ntassembly\.ca|assembly\.nu\.ca"), 12 * HEURE),
+    # Pages descriptives des registres (le contenu dynamique passe par Playwright)
+    (re.compile(r"ontario\.ca/page/(lobbyist-registry|ontario-regulatory-registry)"), 12 * HEURE),
+]
+
+# En-têtes de la réponse d'origine conservés avec le corps
+_EN_TETES_CONSERVES = ("content-type", "etag", "last-modified")
+
+
+def ttl_pour(url: str) -> int:
+    """Retourne le TTL (secondes) applicable à une URL selon TTL_PAR_MOTIF."""
+    for motif, ttl in TTL_PAR_MOTIF:
+        if motif.search(url):
+            return ttl
+    return 0
+
+
+class CacheHTTP:
+    """Cache de réponses GET, une paire de fichiers (méta JSON + corps) par URL."""
+
+    def __init__(self, repertoire: Path = CACHE_DIR, max_octets: int = CACHE_MAX_OCTETS,
+                 actif: bool = CACHE_ACTIF):
+        self.repertoire = Path(repertoire)
+        self.max_octets = max_octets
+        self.actif = actif
+        self._verrou = threading.Lock()
+        self._taille = None
+        self.stats = {"frais": 0, "revalides": 0, "manques": 0, "octets_economises": 0}
+
+    # -- stockage -----------------------------------------------------------
+
+    def _chemins(self, url: str):
+        cle = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        sous_rep = self.repertoire / cle[:2]
+        return sous_rep / f"{cle}.json", sous_rep / f"{cle}.body"
+
+    def _lire(self, url: str):
+        chemin_meta, chemin_corps = self._chemins(url)
+        try:
+            with open(chemin_meta, encoding="utf-8") as f:
+                meta = json.load(f)
+            corps = chemin_corps.read_bytes()
+        except (OSError, json.JSONDecodeError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return meta, corps
+
+    def _ecrire(self, url: str, meta: dict, corps: bytes = None) -> None:
+        chemin_meta, chemin_corps = self._chemins(url)
+        chemin_meta.parent.mkdir(parents=True, exist_ok=True)
+        suffixe = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        if corps is not None:
+            tmp = chemin_corps.with_name(chemin_corps.name + suffixe)
+            tmp.write_bytes(corps)
+            os.replace(tmp, chemin_corps)
+        tmp = chemin_meta.with_name(chemin_meta.name + suffixe)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, chemin_meta)
+
+    def _toucher(self, url: str) -> None:
+        """Marque l'entrée comme récemment utilisée (pour l'éviction LRU)."""
+        try:
+            os.utime(self._chemins(url)[0])
+        except OSError:
+            pass
+
+    def _taille_entree(self, url: str) -> int:
+        """Octets occupés sur disque par l'entrée de `url` (méta et corps), 0 si absente."""
+        taille = 0
+        for chemin in self._chemins(url):
+            try:
+                taille += chemin.stat().st_size
+            except OSError:
+                pass
+        return taille
+
+    def _taille_actuelle(self) -> int:
+        if self._taille is None:
+            self._taille = sum(
+                p.stat().st_size for p in self.repertoire.glob("*/*") if p.is_file()
+            ) if self.repertoire.exists() else 0
+        return self._taille
+
+    def _evincer(self) -> None:
+        """Supprime les entrées les moins récemment utilisées jusqu'à 90 % de la limite."""
+        entrees = []
+        for meta in self.repertoire.glob("*/*.json"):
+            corps = meta.with_suffix(".body")
+            try:
+                taille = meta.stat().st_size + (corps.stat().st_size if corps.exists() else 0)
+                entrees.append((meta.stat().st_mtime, taille, meta, corps))
+            except OSError:
+                continue
+        total = sum(e[1] for e in entrees)
+        cible = int(self.max_octets * 0.9)
+        for _, taille, meta, corps in sorted(entrees, key=lambda e: e[0]):
+            if total <= cible:
+                break
+            for chemin in (meta, corps):
+                try:
+                    chemin.unlink()
+                except OSError:
+                    pass
+            total -= taille
+        self._taille = total
+
+    def _compter(self, cle: str, octets: int = 0) -> None:
+        with self._verrou:
+            self.stats[cle] += 1
+            self.stats["octets_economises"] += octets
+
+    # -- réponses -----------------------------------------------------------
+
+    @staticmethod
+    def _reponse(meta: dict, corps: bytes, origine: str) -> requests.Response:
+        r = requests.Response()
+        r.status_code = 200
+        r._content = corps
+        r.url = meta["url"]
+        r.encoding = meta.get("encoding")
+        r.headers = CaseInsensitiveDict(meta.get("en_tetes", {}))
+        r.reason = "OK"
+        r.depuis_cache = origine
+        return r
+
+    def _stocker(self, url: str, r: requests.Response, ttl: int) -> None:
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+        if not (etag or last_modified or ttl > 0):
+            return  # rien à revalider ni à servir : inutile de stocker
+        meta = {
+            "url": url,
+            "stocke_le": time.time(),
+            "encoding": r.encoding,
+            "en_tetes": {k.lower(): v for k, v in r.headers.items() if k.lower() in _EN_TETES_CONSERVES},
+        }
+        corps = r.content
+        with self._verrou:
+            taille = self._taille_actuelle()
+            # Une entrée remplacée libère sa place : seul l'écart compte
+            ancienne = self._taille_entree(url)
+            self._ecrire(url, meta, corps)
+            self._taille = taille - ancienne + self._taille_entree(url)
+            if self._taille > self.max_octets:
+                self._evincer()
+
+    def get(self, url: str, requeter, ttl: int = None) -> requests.Response:
+        """
+        Retourne la réponse pour `url`, depuis le cache si possible.
+
+        `requeter(en_tetes)` effectue la vraie requête GET en ajoutant les
+        en-têtes conditionnels fournis, et retourne une requests.Response.
+        Les réponses servies depuis le cache portent l'attribut
+        `depuis_cache` (« frais » ou « revalide »).
+        """
+        if not self.actif:
+            return requeter({})
+
+        ttl = ttl_pour(url) if ttl is None else ttl
+        entree = self._lire(url)
+        en_tetes = {}
+        if entree:
+            meta, corps = entree
+            if ttl > 0 and time.time() - meta.get("stocke_le", 0) < ttl:
+                self._toucher(url)
+                self._compter("frais", len(corps))
+                return self._reponse(meta, corps, "frais")
+            validateurs = meta.get("en_tetes", {})
+            if validateurs.get("etag"):
+                en_tetes["If-None-Match"] = validateurs["etag"]
+            if validateurs.get("last-modified"):
+                en_tetes["If-Modified-Since"] = validateurs["last-modified"]
+
+        r = requeter(en_tetes)
+
+        if r.status_code == 304 and entree:
+            meta, corps = entree
+            meta["stocke_le"] = time.time()
+            with self._verrou:
+                self._ecrire(url, meta)
+            self._compter("revalides", len(corps))
+            return self._reponse(meta, corps, "revalide")
+
+        self._compter("manques")
+        if r.status_code == 200:
+            try:
+                self._stocker(url, r, ttl)
+            except OSError as e:
+                print(f"    ⚠ Cache HTTP : écriture impossible pour {url[:60]} : {e}")
+        return r
+
+    def afficher_stats(self) -> None:
+        s = self.stats
+        if not any(s.values()):
+            return
+        print(f"🗄️ Cache HTTP : {s['frais']} servie(s) sans requête, "
+              f"{s['revalides']} revalidée(s) (304), {s['manques']} téléchargée(s) — "
+              f"{s['octets_economises'] / 1024:,.0f} Ko économisés")
+
+
+# Cache partagé par fetchers.py et interprovincial.py
+CACHE = CacheHTTP()
+
+
+def url_complete(url: str, params: dict = None) -> str:
+    """URL finale d'une requête GET, paramètres de requête inclus (clé de cache)."""
+    if not params:
+        return url
+    return requests.Request("GET", url, params=params).prepare().url
@@ -13,15 +13,16 @@ L'objectif : repérer des mentions peu médiatisées de l'Ontario qui pourraient
 signaler un conflit interprovincial, un accord en négociation, ou un scoop.
 """
 
-import time
-import re
 import requests
-import feedparser
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from urllib.parse import urljoin
-from fetchers import safe_get_js
+import extraits
+from document import Document
+from fetchers import safe_get_js, fetch_feed, sonder_flux
+from mentions import DetecteurMentions
+from parallel import executer_en_parallele, afficher_durees
+import transport
 
 HEADERS = {
     "User-Agent": (
@@ -31,25 +32,27 @@ HEADERS = {
     )
 }
 
-# Mots-clés pour détecter les références à l'Ontario dans des documents étrangers
-MOTS_CLES_ONTARIO = [
-    "ontario", "ontario's", "ontarian", "ontarien", "ontarienne",
-    "toronto", "ottawa", "hamilton", "london", "windsor", "brampton",
-    "doug ford", "ford government", "gouvernement ford",
-    "queen's park", "queen's park",
-]
+# Mots-clés pour détecter les références à l'Ontario dans des documents étrangers,
+# avec leur poids. Un passage n'est retenu que si la somme des poids atteint 1 :
+# « Ottawa » (souvent le fédéral), « London » (souvent le Royaume-Uni),
+# « Hamilton » ou « Windsor » (homonymes ailleurs au pays) ne suffisent pas seuls.
+MOTS_CLES_ONTARIO = {
+    "ontario": 3, "ontarian": 3, "ontarians": 3,
+    "ontarien": 3, "ontarienne": 3, "ontariens": 3, "ontariennes": 3,
+    "doug ford": 3, "ford government": 3, "gouvernement ford": 3,
+    "premier ford": 3, "queen's park": 3,
+    "toronto": 2, "brampton": 2,
+    "hamilton": 0.6, "windsor": 0.6,
+    "ottawa": 0.4, "london": 0.4,
+}
 
-PATTERN_ONTARIO = re.compile(
-    "|".join(re.escape(m) for m in MOTS_CLES_ONTARIO),
-    re.IGNORECASE
-)
+# Compilé une seule fois à l'import ; mots entiers, sans égard à la casse ni aux accents
+DETECTEUR_ONTARIO = DetecteurMentions(MOTS_CLES_ONTARIO, seuil=1.0)
 
 
-def safe_get(url: str, timeout: int = 15) -> Optional[requests.Response]:
+def safe_get(url: str, timeout: int = 15, ttl: int = None) -> Optional[requests.Response]:
     try:
-        r = requests.get(url, headers=HEADERS, timeout=timeout)
-        r.raise_for_status()
-        return r
+        return transport.telecharger(url, timeout=timeout, en_tetes=HEADERS, ttl=ttl)
     except Exception as e:
         print(f"    ⚠ {url} : {e}")
         return None
@@ -58,17 +61,17 @@ def safe_get(url: str, timeout: int = 15) -> Optional[requests.Response]:
 def fetch_gov_news(province: str, source_name: str, rss_urls: list, html_urls: list = None) -> list:
     """
     Cherche des mentions de l'Ontario dans les communiqués gouvernementaux d'une province.
-    Essaie les flux RSS en priorité, puis les pages HTML en fallback.
-    Retourne une liste de résultats formatés.
+    Sonde les flux RSS en priorité (en parallèle, voir fetchers.sonder_flux),
+    puis les pages HTML en fallback.
+    Retourne une liste de résultats formatés, les plus pertinents d'abord.
     """
     resultats = []
+    scores = []
 
-    # --- RSS ---
-    for url in rss_urls:
+    # --- RSS : candidats sondés en parallèle, flux gagnant mémorisé ---
+    url, feed = sonder_flux(rss_urls) if rss_urls else (None, None)
+    if feed:
         try:
-            feed = feedparser.parse(url)
-            if not feed.entries:
-                continue
             print(f"    ✓ RSS communiqués {province} : {url} ({len(feed.entries)} entrées)")
             for entry in feed.entries[:20]:
                 texte_brut = (
@@ -77,8 +80,9 @@ def fetch_gov_news(province: str, source_name: str, rss_urls: list, html_urls: l
                     entry.get("content", [{}])[0].get("value", "") if entry.get("content") else
                     entry.get("title", "") + " " + entry.get("summary", "")
                 )
-                ext = texte_pertinent(texte_brut)
-                if ext:
+                passages = extraits_pertinents(texte_brut)
+                if passages:
+                    ext = extraits.joindre(passages)
                     lien = entry.get("link", url)
                     try:
                         pub = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
@@ -88,8 +92,10 @@ def fetch_gov_news(province: str, source_name: str, rss_urls: list, html_urls: l
                     resultats.append(formater_resultat(
                         province, f"{source_name} — Communiqués ({date_str})", lien, ext
                     ))
+                    scores.append(sum(e.score for e in passages))
             if resultats:
-                return resultats  # RSS a fonctionné, inutile de scraper le HTML
+                # RSS a fonctionné, inutile de scraper le HTML
+                return _classer(resultats, scores)
         except Exception as e:
             print(f"    ⚠ RSS communiqués {province} {url} : {e}")
 
@@ -98,49 +104,55 @@ def fetch_gov_news(province: str, source_name: str, rss_urls: list, html_urls: l
         r = safe_get(url)
         if not r:
             continue
-        soup = BeautifulSoup(r.text, "html.parser")
-        for tag in soup(["script", "style", "nav", "footer"]):
-            tag.decompose()
         # Parcourir les titres/liens de communiqués
-        for a in soup.find_all("a", href=True):
-            titre = a.get_text(strip=True)
+        for titre, href in Document.de_reponse(r).liens(exclure=("nav", "footer")):
             if len(titre) < 15:
                 continue
-            if PATTERN_ONTARIO.search(titre):
-                href = a["href"]
+            score = DETECTEUR_ONTARIO.score(titre)
+            if score >= DETECTEUR_ONTARIO.seuil:
                 if not href.startswith("http"):
                     href = urljoin(url, href)
                 resultats.append(formater_resultat(
                     province, source_name, href, titre
                 ))
+                scores.append(score)
         # Si aucun lien ne contient "Ontario", chercher dans le texte de la page
         if not resultats:
-            ext = texte_pertinent(r.text)
+            ext = texte_pertinent(r)
             if ext:
                 resultats.append(formater_resultat(province, source_name, url, ext))
+                scores.append(0.0)
+
+    return _classer(resultats, scores)
 
-    return resultats
 
+def _classer(resultats: list, scores: list) -> list:
+    """Trie des résultats par score décroissant (tri stable : l'ordre d'origine départage)."""
+    ordre = sorted(range(len(resultats)), key=lambda i: -scores[i])
+    return [resultats[i] for i in ordre]
+
+
+def extraits_pertinents(source, max_chars: int = 800) -> list:
+    """
+    Retourne les extraits (extraits.Extrait) mentionnant l'Ontario, centrés sur
+    chaque mention et bornés aux phrases, dans un budget de `max_chars`.
 
-def texte_pertinent(html_ou_texte: str, max_chars: int = 800) -> str:
-    """Extrait les paragraphes contenant des mots-clés ontariens."""
-    if "<" in html_ou_texte:
-        soup = BeautifulSoup(html_ou_texte, "html.parser")
-        for tag in soup(["script", "style", "nav", "footer"]):
-            tag.decompose()
-        blocs = soup.find_all(["p", "li", "td", "div"])
-        paragraphes = [b.get_text(" ", strip=True) for b in blocs]
+    `source` est du texte brut, du HTML, ou une réponse HTTP : dans ce dernier
+    cas le document déjà analysé pour la réponse est réutilisé (voir document.py).
+    """
+    if isinstance(source, str):
+        if "<" in source:
+            paragraphes = Document(source).blocs()
+        else:
+            paragraphes = source.splitlines()
     else:
-        paragraphes = html_ou_texte.splitlines()
+        paragraphes = Document.de_reponse(source).blocs()
+    return extraits.extraire(paragraphes, DETECTEUR_ONTARIO, max_chars=max_chars)
 
-    pertinents = []
-    for para in paragraphes:
-        if len(para) < 30:
-            continue
-        if PATTERN_ONTARIO.search(para):
-            pertinents.append(para.strip())
 
-    return "\n\n".join(pertinents)[:max_chars] if pertinents else ""
+def texte_pertinent(source, max_chars: int = 800) -> str:
+    """Extrait les passages mentionnant l'Ontario (voir extraits_pertinents)."""
+    return extraits.joindre(extraits_pertinents(source, max_chars))
 
 
 def formater_resultat(province: str, source: str, url: str, extrait: str) -> str:
@@ -174,13 +186,13 @@ def fetch_quebec():
     # Gazette officielle du Québec — Index des publications récentes
     r = safe_get("https://www.publicationsduquebec.gouv.qc.ca/home.php")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Québec", "Gazette officielle du Québec",
                 "https://www.publicationsduquebec.gouv.qc.ca", ext))
 
     # Assemblée nationale — Journal des débats (flux RSS)
-    feed = feedparser.parse("https://www.assnat.qc.ca/fr/travaux-parlementaires/journaux-debats/rss.xml")
+    feed = fetch_feed("https://www.assnat.qc.ca/fr/travaux-parlementaires/journaux-debats/rss.xml")
     for entry in feed.entries[:5]:
         texte = entry.get("summary", "") + " " + entry.get("title", "")
         ext = texte_pertinent(texte)
@@ -192,7 +204,7 @@ def fetch_quebec():
     # SEAO — Appels d'offres (site ASP.NET JS-dépendant)
     r = safe_get_js("https://www.seao.ca/OpportunityPublication/rechercheOc.aspx?lang=fr")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Québec", "SEAO — Appels d'offres",
                 "https://www.seao.ca", ext))
@@ -219,7 +231,7 @@ def fetch_bc():
     # BC Gazette
     r = safe_get("https://www.bclaws.gov.bc.ca/civix/document/id/bcgaz1/bcgaz1/")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Colombie-Britannique", "BC Gazette",
                 "https://www.bclaws.gov.bc.ca", ext))
@@ -227,27 +239,24 @@ def fetch_bc():
     # BC Legislature — Hansard (Debates)
     r = safe_get("https://www.leg.bc.ca/parliamentary-business/hansard-blues/house")
     if r:
-        soup = BeautifulSoup(r.text, "html.parser")
         # Trouver le lien le plus récent
-        for a in soup.find_all("a", href=True):
-            if "hansard" in a["href"].lower() or "debate" in a["href"].lower():
-                lien = a["href"]
+        for texte_lien, lien in Document.de_reponse(r).liens():
+            if "hansard" in lien.lower() or "debate" in lien.lower():
                 if not lien.startswith("http"):
                     lien = "https://www.leg.bc.ca" + lien
-                time.sleep(1)
                 r2 = safe_get(lien)
                 if r2:
-                    ext = texte_pertinent(r2.text)
+                    ext = texte_pertinent(r2)
                     if ext:
                         resultats.append(formater_resultat("Colombie-Britannique",
-                            f"Hansard BC — {a.get_text(strip=True)}",
+                            f"Hansard BC — {texte_lien}",
                             lien, ext))
                 break
 
     # BC Lobbyists Registry
     r = safe_get("https://www.lobbyistsregistrar.bc.ca/app/secure/orl/lrs/do/lbrSearch")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Colombie-Britannique",
                 "Registre des lobbyistes de la C.-B.", "https://www.lobbyistsregistrar.bc.ca", ext))
@@ -255,7 +264,7 @@ def fetch_bc():
     # BC Utilities Commission (énergie/transport)
     r = safe_get("https://www.bcuc.com/OurWork/Applications")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Colombie-Britannique",
                 "BC Utilities Commission", "https://www.bcuc.com", ext))
@@ -282,7 +291,7 @@ def fetch_alberta():
     # Alberta Gazette
     r = safe_get("https://open.alberta.ca/publications?subject=alberta-gazette")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Alberta", "Alberta Gazette",
                 "https://open.alberta.ca", ext))
@@ -290,7 +299,7 @@ def fetch_alberta():
     # Alberta Legislature — Hansard
     r = safe_get("https://www.assembly.ab.ca/assembly-business/hansard")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Alberta", "Hansard de l'Assemblée de l'Alberta",
                 "https://www.assembly.ab.ca", ext))
@@ -298,7 +307,7 @@ def fetch_alberta():
     # Alberta Lobbyists Registry
     r = safe_get("https://www.lobbyists.alberta.ca/public/registrant-search")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Alberta", "Registre des lobbyistes de l'Alberta",
                 "https://www.lobbyists.alberta.ca", ext))
@@ -306,7 +315,7 @@ def fetch_alberta():
     # Alberta Utilities Commission
     r = safe_get("https://www.auc.ab.ca/regulatory-documents")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Alberta", "Alberta Utilities Commission",
                 "https://www.auc.ab.ca", ext))
@@ -333,7 +342,7 @@ def fetch_manitoba():
     # Manitoba Gazette
     r = safe_get("https://web2.gov.mb.ca/laws/gazette/index_gazette.php")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Manitoba", "Gazette du Manitoba",
                 "https://web2.gov.mb.ca", ext))
@@ -341,19 +350,16 @@ def fetch_manitoba():
     # Manitoba Legislature — Debates
     r = safe_get("https://www.gov.mb.ca/legislature/hansard/index.html")
     if r:
-        soup = BeautifulSoup(r.text, "html.parser")
-        for a in soup.find_all("a", href=True):
-            if "hansard" in a["href"].lower() or ".html" in a["href"]:
-                lien = a["href"]
+        for texte_lien, lien in Document.de_reponse(r).liens():
+            if "hansard" in lien.lower() or ".html" in lien:
                 if not lien.startswith("http"):
                     lien = "https://www.gov.mb.ca/legislature/hansard/" + lien
-                time.sleep(1)
                 r2 = safe_get(lien)
                 if r2:
-                    ext = texte_pertinent(r2.text)
+                    ext = texte_pertinent(r2)
                     if ext:
                         resultats.append(formater_resultat("Manitoba",
-                            f"Hansard Manitoba — {a.get_text(strip=True)}",
+                            f"Hansard Manitoba — {texte_lien}",
                             lien, ext))
                 break
 
@@ -378,7 +384,7 @@ def fetch_saskatchewan():
     # Saskatchewan Gazette — SPA avec routage côté client, nécessite JavaScript
     r = safe_get_js("https://publications.saskatchewan.ca/#/products?pageSize=20&keyword=gazette")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Saskatchewan", "Gazette de la Saskatchewan",
                 "https://publications.saskatchewan.ca", ext))
@@ -386,7 +392,7 @@ def fetch_saskatchewan():
     # Saskatchewan Legislature — Hansard
     r = safe_get("https://www.legassembly.sk.ca/legislative-business/hansard/")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Saskatchewan",
                 "Hansard de la Saskatchewan", "https://www.legassembly.sk.ca", ext))
@@ -414,25 +420,21 @@ def fetch_nova_scotia():
     # NS Legislature — Hansard (récupérer les débats récents, pas seulement l'index)
     r = safe_get("https://nslegislature.ca/legislative-business/hansard")
     if r:
-        soup = BeautifulSoup(r.text, "html.parser")
         # Suivre le lien vers le Hansard le plus récent
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            texte_lien = a.get_text(strip=True)
+        for texte_lien, href in Document.de_reponse(r).liens():
             if "hansard" in href.lower() and len(texte_lien) > 5:
                 if not href.startswith("http"):
                     href = "https://nslegislature.ca" + href
-                time.sleep(1)
                 r2 = safe_get(href)
                 if r2:
-                    ext = texte_pertinent(r2.text)
+                    ext = texte_pertinent(r2)
                     if ext:
                         resultats.append(formater_resultat("Nouvelle-Écosse",
                             f"Hansard N.-É. — {texte_lien}", href, ext))
                 break
         # Fallback : texte de la page d'index si aucun Hansard récent n'a été suivi
         else:
-            ext = texte_pertinent(r.text)
+            ext = texte_pertinent(r)
             if ext:
                 resultats.append(formater_resultat("Nouvelle-Écosse",
                     "Hansard de la Nouvelle-Écosse", "https://nslegislature.ca", ext))
@@ -440,7 +442,7 @@ def fetch_nova_scotia():
     # NS Utility and Review Board
     r = safe_get("https://nsuarb.novascotia.ca/hearings")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Nouvelle-Écosse",
                 "NS Utility and Review Board", "https://nsuarb.novascotia.ca", ext))
@@ -467,7 +469,7 @@ def fetch_new_brunswick():
     # NB Legislature — Hansard
     r = safe_get("https://www.gnb.ca/legis/hansard/index-f.asp")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Nouveau-Brunswick",
                 "Hansard du N.-B.", "https://www.gnb.ca/legis/hansard/", ext))
@@ -475,7 +477,7 @@ def fetch_new_brunswick():
     # Gazette royale du Nouveau-Brunswick
     r = safe_get("https://www.gnb.ca/gazette/index-f.asp")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Nouveau-Brunswick",
                 "Gazette royale du N.-B.", "https://www.gnb.ca/gazette/", ext))
@@ -500,7 +502,7 @@ def fetch_pei():
 
     r = safe_get("https://www.assembly.pe.ca/hansard")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Île-du-Prince-Édouard",
                 "Hansard de l'ÎPÉ", "https://www.assembly.pe.ca", ext))
@@ -525,7 +527,7 @@ def fetch_newfoundland():
 
     r = safe_get("https://www.assembly.nl.ca/HouseBusiness/Hansard")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Terre-Neuve-et-Labrador",
                 "Hansard de T.-N.-L.", "https://www.assembly.nl.ca", ext))
@@ -533,7 +535,7 @@ def fetch_newfoundland():
     # NL Public Utilities Board
     r = safe_get("https://pub.nl.ca/applications/")
     if r:
-        ext = texte_pertinent(r.text)
+        ext = texte_pertinent(r)
         if ext:
             resultats.append(formater_resultat("Terre-Neuve-et-Labrador",
                 "NL Public Utilities Board", "https://pub.nl.ca", ext))
@@ -568,8 +570,8 @@ def fetch_territories():
 # ---------------------------------------------------------------------------
 def fetch_interprovincial() -> str:
     """
-    Lance la surveillance de toutes les sources interprovinciales.
-    Retourne un bloc de texte formaté pour Claude.
+    Lance la surveillance de toutes les sources interprovinciales, province
+    par province en parallèle. Retourne un bloc de texte formaté pour Claude.
     """
     print("  → Surveillance interprovinciale...")
 
@@ -587,15 +589,14 @@ def fetch_interprovincial() -> str:
     ]
 
     tous_resultats = []
-    for nom_province, fn in fetchers:
-        try:
-            resultats = fn()
-            if resultats:
-                print(f"    ✓ {nom_province} : {len(resultats)} référence(s) à l'Ontario trouvée(s)")
-                tous_resultats.extend(resultats)
-            time.sleep(0.5)  # Politesse entre provinces
-        except Exception as e:
-            print(f"    ⚠ Erreur pour {nom_province} : {e}")
+    resultats_taches = executer_en_parallele(fetchers)
+    for res in resultats_taches:
+        if res.erreur:
+            print(f"    ⚠ Erreur pour {res.nom} : {res.erreur}")
+        elif res.valeur:
+            print(f"    ✓ {res.nom} : {len(res.valeur)} référence(s) à l'Ontario trouvée(s)")
+            tous_resultats.extend(res.valeur)
+    afficher_durees(resultats_taches, "sources interprovinciales")
 
     if not tous_resultats:
         return (
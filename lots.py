@@ -0,0 +1,233 @@
+"""
+lots.py — Génération différée de digests par l'API Message Batches.
+
+Pour les digests qui n'ont pas besoin d'une réponse immédiate (récapitulatifs
+hebdomadaires, rattrapages, re-synthèses d'archives), les requêtes sont mises
+en file dans un lot, à moitié prix, sans garder l'exécution ouverte :
+  1. soumettre() envoie les requêtes et inscrit l'identifiant du lot dans un
+     registre local (LOTS_FICHIER) ;
+  2. recolter(), lors d'une exécution ultérieure, relève les lots terminés et
+     transmet chaque digest à sa destination : courriel (mailer.send_email)
+     ou archive (un fichier Markdown par requête dans ARCHIVE_DIGESTS_DIR).
+
+Usage :
+  python lots.py soumettre                  # sources du jour → archive
+  python lots.py soumettre --courriel       # sources du jour → courriel
+  python lots.py soumettre variante.json …  # variantes préparées (voir ci-dessous)
+  python lots.py recolter                   # relève les lots terminés
+  python lots.py etat                       # registre des lots
+
+Une variante est un fichier JSON :
+  {"id": "recap-2026-s42", "destination": "archive" | "courriel",
+   "consigne": "Rédige un récapitulatif de la semaine…", "sources": {nom: contenu}}
+
+Variables d'environnement :
+  LOTS_FICHIER         — registre des lots soumis (défaut : .cache/lots.json)
+  ARCHIVE_DIGESTS_DIR  — dossier des digests archivés (défaut : archives/)
+  ANTHROPIC_BASE_URL   — http://127.0.0.1:8787 pour le serveur local
+                         stubs/anthropic_stub.py (tests hors ligne)
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import anthropic
+
+from digest import bloc_historique, preparer_sources, requete_digest, texte_message
+
+LOTS_FICHIER = Path(os.environ.get("LOTS_FICHIER", Path(__file__).parent / ".cache" / "lots.json"))
+ARCHIVE_DIR = Path(os.environ.get("ARCHIVE_DIGESTS_DIR", Path(__file__).parent / "archives"))
+DESTINATIONS = ("archive", "courriel")
+CONSIGNE_DEFAUT = "Génère le digest selon les consignes."
+
+
+def _lire_registre() -> dict:
+    try:
+        with open(LOTS_FICHIER, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {"lots": []}
+
+
+def _ecrire_registre(registre: dict) -> None:
+    LOTS_FICHIER.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = LOTS_FICHIER.with_suffix(".tmp")
+    with open(temporaire, "w", encoding="utf-8") as f:
+        json.dump(registre, f, ensure_ascii=False, indent=2)
+    temporaire.replace(LOTS_FICHIER)
+
+
+def identifiant_requete(texte: str) -> str:
+    """custom_id accepté par l'API : [A-Za-z0-9_-], 64 caractères au plus."""
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", texte).strip("-")[:64] or "digest"
+
+
+def soumettre(variantes: list, client=None) -> str:
+    """
+    Soumet un lot de digests. Chaque variante est un dict :
+      id, sources, destination (« archive » ou « courriel »),
+      consigne (facultative), seen_items (facultatif).
+    Retourne l'identifiant du lot, inscrit dans le registre.
+    """
+    client = client or anthropic.Anthropic()
+    today = datetime.now().strftime("%A %d %B %Y")
+    requetes = []
+    destinations = {}
+    for variante in variantes:
+        custom_id = identifiant_requete(variante["id"])
+        if custom_id in destinations:
+            raise ValueError(f"Identifiant de requête en double dans le lot : {custom_id}")
+        destination = variante.get("destination", "archive")
+        if destination not in DESTINATIONS:
+            raise ValueError(f"Destination inconnue pour {custom_id} : {destination}")
+        sources = preparer_sources(client, variante["sources"])
+        requetes.append({
+            "custom_id": custom_id,
+            "params": requete_digest(
+                sources, today, bloc_historique(variante.get("seen_items")),
+                consigne=variante.get("consigne") or CONSIGNE_DEFAUT,
+            ),
+        })
+        destinations[custom_id] = destination
+
+    lot = client.messages.batches.create(requests=requetes)
+    registre = _lire_registre()
+    registre["lots"].append({
+        "id": lot.id,
+        "soumis_le": datetime.now().isoformat(timespec="seconds"),
+        "statut": "en_cours",
+        "requetes": destinations,
+    })
+    _ecrire_registre(registre)
+    print(f"📨 Lot {lot.id} soumis : {len(requetes)} requête(s) "
+          f"({', '.join(f'{c} → {d}' for c, d in destinations.items())}).")
+    return lot.id
+
+
+def _livrer(custom_id: str, destination: str, texte: str) -> None:
+    if destination == "courriel":
+        from mailer import send_email
+        send_email(texte)
+        return
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    chemin = ARCHIVE_DIR / f"{custom_id}.md"
+    chemin.write_text(texte, encoding="utf-8")
+    print(f"    🗄️ {custom_id} archivé dans {chemin}")
+
+
+def recolter(client=None) -> int:
+    """
+    Relève les lots terminés du registre et livre leurs digests.
+    Retourne le nombre de digests livrés ; les lots encore en cours restent inscrits.
+    Chaque digest livré est noté dans le registre aussitôt : si une livraison
+    échoue, le lot reste en cours et la récolte suivante ne reprend que les
+    digests non livrés.
+    """
+    registre = _lire_registre()
+    en_cours = [lot for lot in registre["lots"] if lot["statut"] == "en_cours"]
+    if not en_cours:
+        print("📭 Aucun lot en attente.")
+        return 0
+    client = client or anthropic.Anthropic()
+    livres = 0
+    for lot in en_cours:
+        etat = client.messages.batches.retrieve(lot["id"])
+        if etat.processing_status != "ended":
+            compte = etat.request_counts
+            print(f"⏳ Lot {lot['id']} en cours ({compte.processing} requête(s) en traitement).")
+            continue
+
+        entrees = sorties = 0
+        deja_livres = lot.setdefault("livres", [])
+        for resultat in client.messages.batches.results(lot["id"]):
+            destination = lot["requetes"].get(resultat.custom_id, "archive")
+            if resultat.custom_id in deja_livres:
+                # Livré par une récolte interrompue ensuite : ne pas l'envoyer deux fois
+                continue
+            if resultat.result.type != "succeeded":
+                print(f"    ⚠ {resultat.custom_id} : {resultat.result.type}")
+                continue
+            message = resultat.result.message
+            entrees += message.usage.input_tokens
+            sorties += message.usage.output_tokens
+            texte = texte_message(message)
+            if not texte.strip():
+                print(f"    ⚠ {resultat.custom_id} : réponse vide")
+                continue
+            _livrer(resultat.custom_id, destination, texte)
+            livres += 1
+            # Enregistrer après chaque livraison : une erreur sur la suivante laisse le lot
+            # en cours, mais une nouvelle récolte ne relivre pas ce qui l'a déjà été
+            deja_livres.append(resultat.custom_id)
+            _ecrire_registre(registre)
+        lot["statut"] = "recolte"
+        lot["recolte_le"] = datetime.now().isoformat(timespec="seconds")
+        print(f"✅ Lot {lot['id']} récolté ({entrees} jetons en entrée, {sorties} en sortie, "
+              f"tarif des lots).")
+        _ecrire_registre(registre)
+    return livres
+
+
+def afficher_etat() -> None:
+    """Affiche le registre des lots soumis."""
+    lots = _lire_registre()["lots"]
+    if not lots:
+        print("📭 Registre des lots vide.")
+        return
+    for lot in lots:
+        marque = "⏳" if lot["statut"] == "en_cours" else "✓"
+        print(f"  {marque} {lot['id']}  soumis le {lot['soumis_le']}  "
+              f"{len(lot['requetes'])} requête(s)  [{lot['statut']}]")
+
+
+def _sources_du_jour() -> dict:
+    from fetchers import fetch_all
+    from interprovincial import fetch_interprovincial
+    from empreintes import SOURCE_INTERPROV
+
+    sources = fetch_all()
+    sources[SOURCE_INTERPROV] = fetch_interprovincial()
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p_soumettre = sous.add_parser("soumettre", help="soumettre un lot de digests")
+    p_soumettre.add_argument("variantes", nargs="*", help="fichiers JSON de variantes")
+    p_soumettre.add_argument("--courriel", action="store_true",
+                             help="envoyer par courriel le digest des sources du jour")
+    sous.add_parser("recolter", help="relever les lots terminés")
+    sous.add_parser("etat", help="afficher le registre des lots")
+    args = parser.parse_args()
+
+    if args.commande == "recolter":
+        recolter()
+    elif args.commande == "etat":
+        afficher_etat()
+    else:
+        if args.variantes:
+            variantes = []
+            for chemin in args.variantes:
+                with open(chemin, encoding="utf-8") as f:
+                    variantes.append({"id": Path(chemin).stem, **json.load(f)})
+        else:
+            variantes = [{
+                "id": f"digest-{datetime.now():%Y-%m-%d-%H%M}",
+                "sources": _sources_du_jour(),
+                "destination": "courriel" if args.courriel else "archive",
+            }]
+        try:
+            soumettre(variantes)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
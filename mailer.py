@@ -8,90 +8,142 @@ Variables d'environnement requises :
   RESEND_API_KEY   — clé API Resend (re_...)
   SENDER_EMAIL     — adresse expéditrice vérifiée sur Resend
                      (sur le plan gratuit : utilisez onboarding@resend.dev)
-  RECIPIENT_EMAIL  — adresse de destination
+  RECIPIENT_EMAIL  — adresse(s) de destination, séparées par des virgules
+
+Variables d'environnement optionnelles :
+  DESTINATAIRES_FICHIER — liste de diffusion, une adresse par ligne ; envoi
+                          groupé, débit et relances : voir diffusion.py
+  PROFILS_FICHIER       — profils d'abonnés recevant une édition ciblée du même
+                          digest (sections, mots-clés, provinces) : voir profils.py
 """
 
 import os
+import re
+from html import escape
+
 import resend
-from datetime import datetime
+
+from archive import maintenant
+from diffusion import EchecDiffusion, destinataires, diffuser
+from profils import DigestStructure, charger_profils
+from telemetrie import portee
+
+
+# Styles en ligne (les clients de courriel ignorent les feuilles de style) :
+# balises ouvrantes construites une fois pour toutes
+COULEUR_TITRE = "#1a3a5c"
+BALISES = {
+    "h1": f'<h1 style="color:{COULEUR_TITRE};">',
+    "h2": (f'<h2 style="color:{COULEUR_TITRE};border-bottom:2px solid #c8102e;'
+           f'padding-bottom:6px;margin-top:30px;">'),
+    "h3": f'<h3 style="color:{COULEUR_TITRE};margin-bottom:4px;">',
+    "note": '<p style="color:#888;font-style:italic;font-size:13px;">',
+    "lien": f'<a style="color:{COULEUR_TITRE};" href="',
+}
+
+# Une ligne : titre, filet, élément de liste (retrait, puce ou numéro) ou paragraphe
+_BLOC = re.compile(
+    r"[ ]{0,3}(?P<diese>#{1,3})[ \t]+(?P<titre>.*?)[ \t#]*$"
+    r"|[ ]{0,3}(?P<filet>(?:-[ \t]*){3,}|(?:\*[ \t]*){3,}|(?:_[ \t]*){3,})$"
+    r"|(?P<retrait>[ \t]*)(?:(?P<puce>[-*+])|(?P<numero>\d{1,9})[.)])[ \t]+(?P<element>.*)$"
+)
+# Ligne entière en italique (la note de fin du digest), après rendu en ligne
+_NOTE = re.compile(r"<em>((?:(?!</?em>).)*)</em>")
+
+# Jetons en ligne, reconnus en une passe sur le texte déjà échappé (les marques
+# Markdown n'y sont pas touchées). Chaque branche commence par un caractère
+# littéral, ce qui permet au moteur de sauter directement d'un « [ », « h » ou
+# « * » au suivant ; les quantificateurs possessifs évitent tout retour arrière
+# sur les longs paragraphes. Un délimiteur sans partenaire reste littéral.
+_EN_LIGNE = re.compile(
+    r"\[(?P<texte>[^\]\n]+)\]\((?P<cible>(?:https?://|mailto:)[^)\s\"*]+)\)"
+    r"|h(?<![\w/\"=>]h)(?P<url>ttps?://(?:(?!&[lg]t;)[^\s\[\]()\"*<])*(?<!['.,;:!?»&]))"
+    r"|\*\*(?![\s*])(?P<gras>(?:[^*\n]++|\*(?!\*))*+)(?<!\s)\*\*"
+    r"|\*(?<!\*\*)(?![\s*])(?P<italique>(?:[^*\n]++|\*\*[^*\n]++\*\*)*+)(?<![\s*])\*(?!\*)"
+)
+
+
+def _jeton(m: re.Match) -> str:
+    genre = m.lastgroup
+    if genre == "gras":
+        return f"<strong>{_en_ligne(m['gras'])}</strong>"
+    if genre == "italique":
+        return f"<em>{_en_ligne(m['italique'])}</em>"
+    if genre == "url":
+        return f'{BALISES["lien"]}h{m["url"]}">h{m["url"]}</a>'
+    # Pas de lien dans un lien : les URL nues du texte du lien restent du texte
+    texte = _EN_LIGNE.sub(lambda j: j[0] if j.lastgroup == "url" else _jeton(j), m["texte"])
+    return f'{BALISES["lien"]}{m["cible"]}">{texte}</a>'
+
+
+def _en_ligne(texte: str) -> str:
+    """Gras, italique, liens et URL nues d'un texte échappé (le contenu des jetons est rendu à son tour)."""
+    if "*" not in texte and "[" not in texte and "://" not in texte:
+        return texte
+    return _EN_LIGNE.sub(_jeton, texte)
 
 
 def markdown_to_html(texte: str) -> str:
-    """Conversion minimale de Markdown → HTML sans dépendance externe."""
-    lignes = texte.split("\n")
-    html_lignes = []
-    in_list = False
-
-    for ligne in lignes:
-        if ligne.startswith("## "):
-            if in_list:
-                html_lignes.append("</ul>")
-                in_list = False
-            contenu = ligne[3:].strip()
-            html_lignes.append(
-                f'<h2 style="color:#1a3a5c;border-bottom:2px solid #c8102e;'
-                f'padding-bottom:6px;margin-top:30px;">{contenu}</h2>'
-            )
-        elif ligne.startswith("# "):
-            contenu = ligne[2:].strip()
-            html_lignes.append(f'<h1 style="color:#1a3a5c;">{contenu}</h1>')
-        elif ligne.startswith("- ") or ligne.startswith("* "):
-            if not in_list:
-                html_lignes.append("<ul>")
-                in_list = True
-            html_lignes.append(f"<li>{ligne[2:].strip()}</li>")
-        elif ligne.startswith("**") and ligne.endswith("**") and len(ligne) > 4:
-            if in_list:
-                html_lignes.append("</ul>")
-                in_list = False
-            contenu = ligne[2:-2]
-            html_lignes.append(f"<p><strong>{contenu}</strong></p>")
-        elif ligne.strip().startswith("*") and ligne.strip().endswith("*") and len(ligne.strip()) > 2:
-            if in_list:
-                html_lignes.append("</ul>")
-                in_list = False
-            contenu = ligne.strip()[1:-1]
-            html_lignes.append(
-                f'<p style="color:#888;font-style:italic;font-size:13px;">{contenu}</p>'
-            )
-        elif ligne.strip() == "---":
-            if in_list:
-                html_lignes.append("</ul>")
-                in_list = False
-            html_lignes.append("<hr>")
-        elif ligne.strip() == "":
-            if in_list:
-                html_lignes.append("</ul>")
-                in_list = False
-            html_lignes.append("")
+    """
+    Conversion Markdown → HTML sans dépendance externe. Le texte est échappé,
+    ses jetons en ligne rendus en une passe, puis chaque ligne est classée par
+    une seule expression compilée.
+
+    Titres # à ###, filets, listes à puces ou numérotées imbriquées (par le
+    retrait), paragraphes d'une ligne ; en ligne : **gras**, *italique*,
+    [liens](https://…) et URL nues. Une ligne
+    entièrement en italique (la note de fin du digest) devient une note grisée.
+    """
+    sortie = []
+    listes = []  # pile (retrait, balise) des listes ouvertes ; chaque niveau a un <li> ouvert
+
+    def fermer_listes(retrait: int = -1) -> None:
+        while listes and listes[-1][0] > retrait:
+            sortie[-1] += "</li>"
+            sortie.append(f"</{listes.pop()[1]}>")
+
+    for ligne in _en_ligne(escape(texte, quote=False)).split("\n"):
+        m = _BLOC.match(ligne)
+        if m is None:
+            contenu = ligne.strip()
+            fermer_listes()
+            if not contenu:
+                sortie.append("")
+            elif _NOTE.fullmatch(contenu):
+                sortie.append(f'{BALISES["note"]}{contenu[4:-5]}</p>')
+            else:
+                sortie.append(f"<p>{contenu}</p>")
+        elif m.group("element") is not None:
+            retrait = len(m.group("retrait").expandtabs(4))
+            balise = "ul" if m.group("puce") else "ol"
+            fermer_listes(retrait)
+            if listes and retrait <= listes[-1][0]:
+                # Élément frère (un retrait incohérent est rattaché au niveau ouvert)
+                sortie[-1] += "</li>"
+                if listes[-1][1] != balise:
+                    sortie.append(f"</{listes[-1][1]}>")
+                    sortie.append(f"<{balise}>")
+                    listes[-1] = (listes[-1][0], balise)
+            else:
+                # Nouvelle liste, ou sous-liste dans le <li> ouvert
+                sortie.append(f"<{balise}>")
+                listes.append((retrait, balise))
+            sortie.append(f"<li>{m.group('element').strip()}")
         else:
-            processed = ligne.strip()
-            while "**" in processed:
-                start = processed.find("**")
-                end = processed.find("**", start + 2)
-                if end == -1:
-                    break
-                processed = (
-                    processed[:start]
-                    + "<strong>"
-                    + processed[start + 2:end]
-                    + "</strong>"
-                    + processed[end + 2:]
-                )
-            if processed:
-                if in_list:
-                    html_lignes.append("</ul>")
-                    in_list = False
-                html_lignes.append(f"<p>{processed}</p>")
-
-    if in_list:
-        html_lignes.append("</ul>")
-
-    return "\n".join(html_lignes)
-
-
-def construire_html(digest_texte: str, date_str: str) -> str:
+            fermer_listes()
+            if m.group("filet"):
+                sortie.append("<hr>")
+            else:
+                niveau = f"h{len(m.group('diese'))}"
+                sortie.append(f"{BALISES[niveau]}{m.group('titre')}</{niveau}>")
+
+    fermer_listes()
+    return "\n".join(sortie)
+
+
+def construire_html(digest_texte: str, date_str: str, edition: str = None) -> str:
     corps = markdown_to_html(digest_texte)
+    sous_titre = f"{date_str} · {escape(edition, quote=False)}" if edition else date_str
     return f"""<!DOCTYPE html>
 <html lang="fr">
 <head>
@@ -104,7 +156,7 @@ def construire_html(digest_texte: str, date_str: str) -> str:
 
   <div style="background: #1a3a5c; color: white; padding: 20px 24px; border-radius: 6px 6px 0 0;">
     <h1 style="margin: 0; font-size: 22px;">🏛️ Digest politique ontarien</h1>
-    <p style="margin: 6px 0 0 0; opacity: 0.85; font-size: 14px;">{date_str}</p>
+    <p style="margin: 6px 0 0 0; opacity: 0.85; font-size: 14px;">{sous_titre}</p>
   </div>
 
   <div style="border: 1px solid #ddd; border-top: none; padding: 24px; border-radius: 0 0 6px 6px;">
@@ -123,29 +175,58 @@ def construire_html(digest_texte: str, date_str: str) -> str:
 </html>"""
 
 
-def send_email(digest_texte: str) -> None:
-    """Envoie le digest via l'API Resend (resend.com)."""
+def send_email(digest_texte: str, mise_a_jour: bool = False) -> dict:
+    """
+    Envoie le digest via l'API Resend (resend.com) : le digest complet à
+    RECIPIENT_EMAIL et à la liste DESTINATAIRES_FICHIER, et à chaque profil
+    de PROFILS_FICHIER son édition ciblée (voir profils.py). Chaque édition
+    est rendue une fois, puis diffusée par lots (voir diffusion.py).
+    Avec `mise_a_jour` (nouveautes.py), le sujet et l'en-tête portent l'heure
+    de la mise à jour. Retourne le résultat par destinataire.
+    """
     api_key = os.environ.get("RESEND_API_KEY", "").strip()
     expediteur = os.environ.get("SENDER_EMAIL", "onboarding@resend.dev").strip()
-    destinataire = os.environ.get("RECIPIENT_EMAIL", "").strip()
+    profils = charger_profils()
+    abonnes = {a.strip().lower() for p in profils for a in p.destinataires}
+    adresses = [a for a in destinataires() if a.lower() not in abonnes]
 
     if not api_key:
         raise EnvironmentError("Variable RESEND_API_KEY manquante.")
-    if not destinataire:
-        raise EnvironmentError("Variable RECIPIENT_EMAIL manquante.")
+    if not adresses and not abonnes:
+        raise EnvironmentError("Variable RECIPIENT_EMAIL (ou DESTINATAIRES_FICHIER) manquante.")
 
     resend.api_key = api_key
 
-    date_str = datetime.now().strftime("%A %d %B %Y")
-    sujet = f"🏛️ Digest politique ontarien — {date_str}"
-    html = construire_html(digest_texte, date_str)
-
-    print(f"📧 Envoi du digest à {destinataire} via Resend...")
-    result = resend.Emails.send({
-        "from": f"Digest Ontario <{expediteur}>",
-        "to": [destinataire],
-        "subject": sujet,
-        "html": html,
-        "text": digest_texte,
-    })
-    print(f"✅ Courriel envoyé avec succès. ID : {result.get('id', 'n/a')}")
+    date_str = maintenant().strftime("%A %d %B %Y")
+    if mise_a_jour:
+        date_str += maintenant().strftime(", mise à jour de %H h %M")
+    editions = [(None, digest_texte, adresses)] if adresses else []
+    if profils:
+        with portee("éditions ciblées", "html", profils=len(profils)):
+            structure = DigestStructure(digest_texte)
+            for profil in profils:
+                texte = structure.edition(profil)
+                if texte is None:
+                    print(f"  ℹ Profil « {profil.nom} » : rien dans le digest du jour, aucun envoi.")
+                elif profil.destinataires:
+                    editions.append((profil.nom, texte, profil.destinataires))
+
+    resultats = {}
+    echecs = []
+    for edition, texte, liste in editions:
+        sujet = f"🏛️ Digest politique ontarien — {date_str}" + (f" · {edition}" if edition else "")
+        with portee("rendu HTML", "html", edition=edition or "complète") as p:
+            html = construire_html(texte, date_str, edition)
+            p.noter(octets=len(html.encode("utf-8")))
+        try:
+            resultats.update(diffuser({
+                "from": f"Digest Ontario <{expediteur}>",
+                "subject": sujet,
+                "html": html,
+                "text": texte,
+            }, liste, edition))
+        except EchecDiffusion as e:
+            echecs.append(e)
+    if echecs and len(echecs) == len(editions):
+        raise echecs[0]
+    return resultats
@@ -8,21 +8,56 @@ Variables d'environnement requises :
   ANTHROPIC_API_KEY   — clé API Anthropic (console.anthropic.com)
   GMAIL_ADDRESS       — adresse Gmail expéditrice
   GMAIL_APP_PASSWORD  — mot de passe d'application Gmail (16 caractères)
-  RECIPIENT_EMAIL     — adresse courriel destinataire
+  RECIPIENT_EMAIL     — adresse(s) courriel destinataire(s), séparées par des virgules
 
 Pour tester sans envoyer de courriel :
   DRY_RUN=1 python main.py
+
+Variables d'environnement optionnelles :
+  FETCH_WORKERS       — nombre de collecteurs lancés en parallèle (défaut : 8)
+  HTTP_TAUX_PAR_HOTE  — requêtes par seconde autorisées par hôte (défaut : 1 ;
+                        voir scheduler.py pour les autres réglages)
+  HTTP_CACHE          — « 0 » pour désactiver le cache HTTP sur disque (httpcache.py)
+  DIGEST_BUDGET_TOKENS — budget de jetons des sources dans le prompt (défaut : 30000 ;
+                        voir budget.py)
+  DIGEST_MODE         — « mapreduce » pour des extractions parallèles suivies d'une
+                        synthèse, « lot » pour une génération différée par l'API
+                        Message Batches (défaut : « unique » ; voir digest.py, lots.py)
+  DIGEST_EDITION      — « mise-a-jour » pour une édition courte ne couvrant que ce qui a
+                        paru depuis l'exécution précédente, sans courriel s'il n'y a rien
+                        de substantiel (défaut : « complete » ; voir nouveautes.py)
+  DIGEST_FLUX         — « 1 » pour afficher le digest au fil de sa génération
+  DESTINATAIRES_FICHIER — liste de diffusion (une adresse par ligne), envoyée par lots
+                        de 100 en parallèle (voir diffusion.py)
+  DISJONCTEUR         — « 0 » pour ne plus ignorer les points d'accès défaillants
+                        (bilan dans .cache/sante_endpoints.json ; voir disjoncteur.py)
+  ARCHIVE_MODE        — « capture » pour archiver tout ce que les collecteurs reçoivent,
+                        « rejeu » pour relancer une exécution archivée sans réseau
+                        (ARCHIVE_FICHIER ; voir archive.py)
+  RAPPORT_EXECUTION   — chemin du rapport JSON de l'exécution (défaut : .cache/rapports/ ;
+                        « 0 » pour ne pas l'écrire ; voir telemetrie.py)
 """
 
 import os
 import sys
+import time
 from datetime import datetime
 
 from fetchers import fetch_all
+from archive import ARCHIVE
+from disjoncteur import DISJONCTEUR
+from httpcache import CACHE
+from navigateur import fermer_navigateur
+from parallel import executer_en_parallele
+from scheduler import PLANIFICATEUR
+from telemetrie import demarrer_execution, ecrire_rapport, portee
 from interprovincial import fetch_interprovincial
-from digest import generate_digest
+import lots
+from digest import FLUX_CONSOLE, MODE, generate_digest, generer_mise_a_jour
 from mailer import send_email
-from history import get_recent_items, record_items, extract_tracked_items
+from empreintes import dedupliquer_sources, regrouper_quasi_doublons
+from history import get_recent_fingerprints, record_items
+import nouveautes
 
 
 def verifier_variables():
@@ -30,9 +65,13 @@ def verifier_variables():
     dry_run = os.environ.get("DRY_RUN", "").strip() == "1"
     requises = ["ANTHROPIC_API_KEY"]
     if not dry_run:
-        requises += ["RESEND_API_KEY", "RECIPIENT_EMAIL"]
+        requises += ["RESEND_API_KEY"]
 
     manquantes = [v for v in requises if not os.environ.get(v)]
+    # Destinataires : adresses directes, liste de diffusion ou profils d'abonnés (au moins un)
+    destinataires = ["RECIPIENT_EMAIL", "DESTINATAIRES_FICHIER", "PROFILS_FICHIER"]
+    if not dry_run and not any(os.environ.get(v, "").strip() for v in destinataires):
+        manquantes.append(" ou ".join(destinataires))
     if manquantes:
         print(f"❌ Variables d'environnement manquantes : {', '.join(manquantes)}")
         print("   Consultez le guide de configuration pour les définir.")
@@ -40,52 +79,150 @@ def verifier_variables():
 
 
 def main():
-    print(f"\n{'='*60}")
-    print(f"  DIGEST POLITIQUE ONTARIEN — {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-    print(f"{'='*60}\n")
-
-    dry_run = os.environ.get("DRY_RUN", "").strip() == "1"
-    if dry_run:
-        print("🔧 Mode DRY_RUN activé — aucun courriel ne sera envoyé.\n")
-
-    # 1. Vérifier la configuration
-    verifier_variables()
-
-    # 2. Récupérer les sources ontariennes
-    sources = fetch_all()
-
-    # 3. Récupérer les sources interprovinciales
-    sources_interprov = fetch_interprovincial()
-    sources["Ontario ailleurs au Canada (sources interprovinciales)"] = sources_interprov
-
-    # 4. Charger l'historique des éléments déjà couverts
-    seen_items = get_recent_items()
-    if seen_items:
-        print(f"📋 {len(seen_items)} élément(s) déjà couverts dans les 14 derniers jours — seront exclus du digest.")
-
-    # 5. Générer le digest avec Claude
-    digest = generate_digest(sources, seen_items=seen_items)
-
-    # 5b. Sauvegarder les éléments couverts aujourd'hui dans l'historique
-    nouveaux_items = extract_tracked_items(sources)
-    record_items(nouveaux_items)
-    if nouveaux_items:
-        print(f"💾 {len(nouveaux_items)} élément(s) enregistrés dans l'historique.")
-
-    # 6. Afficher le résultat dans la console
-    print(f"\n{'='*60}")
-    print("DIGEST GÉNÉRÉ :")
-    print(f"{'='*60}")
-    print(digest)
-    print(f"{'='*60}\n")
-
-    # 7. Envoyer par courriel (sauf en mode dry run)
-    if dry_run:
-        print("🔧 DRY_RUN : courriel non envoyé. Le digest est affiché ci-dessus.")
-    else:
-        send_email(digest)
-
-    print("\n✅ Pipeline terminé avec succès.")
+    try:
+        print(f"\n{'='*60}")
+        print(f"  DIGEST POLITIQUE ONTARIEN — {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+        print(f"{'='*60}\n")
+
+        dry_run = os.environ.get("DRY_RUN", "").strip() == "1"
+        demarrer_execution(mode=MODE, edition=nouveautes.EDITION, dry_run=dry_run,
+                           archive=ARCHIVE.mode or None)
+        if dry_run:
+            print("🔧 Mode DRY_RUN activé — aucun courriel ne sera envoyé.\n")
+        if ARCHIVE.rejeu:
+            print(f"🗄️ Rejeu de l'exécution du {ARCHIVE.debut:%Y-%m-%d %H:%M} ({ARCHIVE.fichier}) "
+                  f"— aucun accès réseau, historique non modifié.\n")
+
+        # 1. Vérifier la configuration
+        verifier_variables()
+
+        # 2-3. Récupérer les sources ontariennes et interprovinciales en parallèle
+        debut_collecte = time.perf_counter()
+        with portee("collecte"):
+            collecte_ontario, collecte_interprov = executer_en_parallele(
+                # Deux tâches au plus en parallèle, une seule avec FETCH_WORKERS=1 (parallel.py)
+                [("Sources ontariennes", fetch_all), ("Sources interprovinciales", fetch_interprovincial)],
+            )
+        for res in (collecte_ontario, collecte_interprov):
+            if res.erreur:
+                raise res.erreur
+        sources = collecte_ontario.valeur
+        sources["Ontario ailleurs au Canada (sources interprovinciales)"] = collecte_interprov.valeur
+        print(f"⏱ Collecte terminée en {time.perf_counter() - debut_collecte:.1f} s "
+              f"(Ontario : {collecte_ontario.duree:.1f} s, interprovincial : {collecte_interprov.duree:.1f} s)")
+        PLANIFICATEUR.afficher_metriques()
+        CACHE.afficher_stats()
+
+        # 3b. Édition de mise à jour : ne garder que ce qui a paru depuis l'exécution précédente
+        collecte = sources
+        etat_precedent = nouveautes.charger_etat()
+        mise_a_jour = nouveautes.MISE_A_JOUR and etat_precedent is not None
+        if nouveautes.MISE_A_JOUR and not mise_a_jour:
+            print("ℹ Aucun état de collecte précédent : édition complète.")
+        if mise_a_jour:
+            with portee("nouveautés") as p:
+                sources, delta = nouveautes.extraire_nouveautes(sources, etat_precedent)
+                p.noter(**delta)
+            print(f"🆕 Depuis le {etat_precedent['date']:%Y-%m-%d %H:%M} : {len(sources)} source(s) avec "
+                  f"du nouveau ({delta['elements']} élément(s), {delta['lignes']} ligne(s), "
+                  f"{delta['caracteres']} caractères substantiels), {delta['inchangees']} inchangée(s).")
+            if delta["caracteres"] < nouveautes.SEUIL:
+                # État non avancé : de petits ajouts successifs finiront par compter
+                print(f"\n✅ Rien de substantiel depuis la collecte précédente "
+                      f"(seuil : {nouveautes.SEUIL} caractères) — aucun courriel.")
+                return
+
+        # 4. Retirer les éléments déjà couverts dans les digests récents
+        with portee("dédoublonnage") as p:
+            # En rejeu : l'historique tel qu'il était le jour de l'exécution archivée
+            historique = get_recent_fingerprints(avant=ARCHIVE.debut if ARCHIVE.rejeu else None)
+            sources, nouveaux_items, stats = dedupliquer_sources(sources, historique)
+            p.noter(**stats)
+        if stats["exacts"] or stats["quasi"] or stats["suivis"]:
+            print(f"📋 Historique : {stats['exacts']} doublon(s) exact(s) et {stats['quasi']} "
+                  f"quasi-doublon(s) retirés, {stats['suivis']} suivi(s) signalé(s), "
+                  f"{stats['conserves']} nouvel(s) élément(s).")
+
+        # 4b. Regrouper les copies d'un même texte publiées par plusieurs sources
+        with portee("regroupement") as p:
+            sources, stats = regrouper_quasi_doublons(sources)
+            p.noter(**stats)
+        if stats["retires"]:
+            print(f"🔗 {stats['retires']} quasi-doublon(s) regroupé(s) en {stats['groupes']} groupe(s).")
+
+        # 4c. Mise à jour dont tous les éléments ont déjà été couverts : rien à envoyer
+        if mise_a_jour and not nouveaux_items and not delta["lignes"]:
+            nouveautes.sauvegarder_etat(collecte, etat_precedent)
+            print("\n✅ Nouveautés déjà couvertes par un digest récent — aucun courriel.")
+            return
+
+        # 5. Mode lot : relever les lots terminés, mettre le digest du jour en file et s'arrêter là
+        #    (une mise à jour n'attend pas : elle est toujours générée sur-le-champ)
+        if MODE == "lot" and not mise_a_jour:
+            variante = {
+                "id": f"digest-{datetime.now():%Y-%m-%d-%H%M}",
+                "sources": sources,
+                "destination": "courriel",
+            }
+            # Ni récolte (elle livre les digests « courriel » en file) ni soumission (payante)
+            if dry_run:
+                print(f"🔧 DRY_RUN : lot non soumis — aurait mis en file « {variante['id']} » "
+                      f"({len(sources)} source(s), {sum(len(c or '') for c in sources.values())} "
+                      f"caractères) ; lots terminés non récoltés.")
+                return
+            lots.recolter()
+            lots.soumettre([variante])
+            if not ARCHIVE.rejeu:
+                record_items(nouveaux_items)
+                nouveautes.sauvegarder_etat(collecte, etat_precedent)
+            print("\n✅ Digest mis en file ; il sera livré par une exécution ultérieure "
+                  "(python lots.py recolter).")
+            return
+
+        # 5. Générer le digest avec Claude
+        with portee("génération"):
+            if mise_a_jour:
+                digest = generer_mise_a_jour(sources, etat_precedent["date"])
+            else:
+                digest = generate_digest(sources)
+
+        # 5b. Sauvegarder les éléments couverts dans l'historique et l'état de la collecte
+        #     (sauf en rejeu)
+        if not ARCHIVE.rejeu:
+            record_items(nouveaux_items)
+            nouveautes.sauvegarder_etat(collecte, etat_precedent)
+            if nouveaux_items:
+                print(f"💾 {len(nouveaux_items)} élément(s) enregistrés dans l'historique.")
+
+        if digest is None:
+            print("\n✅ Rien qui mérite une mise à jour selon le modèle — aucun courriel.")
+            return
+
+        # 6. Afficher le résultat dans la console (déjà affiché au fil de l'eau avec DIGEST_FLUX=1)
+        if not FLUX_CONSOLE:
+            print(f"\n{'='*60}")
+            print("DIGEST GÉNÉRÉ :")
+            print(f"{'='*60}")
+            print(digest)
+            print(f"{'='*60}\n")
+
+        # 7. Envoyer par courriel (sauf en mode dry run)
+        if dry_run:
+            print("🔧 DRY_RUN : courriel non envoyé. Le digest est affiché ci-dessus.")
+        else:
+            send_email(digest, mise_a_jour=mise_a_jour)
+
+        print("\n✅ Pipeline terminé avec succès.")
+    finally:
+        # Fermer le navigateur partagé, qu'il ait servi ou non
+        fermer_navigateur()
+        # Manifeste de l'archive de l'exécution (ARCHIVE_MODE=capture)
+        ARCHIVE.fermer()
+        # Bilan de santé des points d'accès, conservé pour les exécutions suivantes
+        DISJONCTEUR.afficher_etat()
+        DISJONCTEUR.sauvegarder()
+        # Rapport JSON de l'exécution (telemetrie.py), erreur éventuelle comprise
+        ecrire_rapport(erreur=sys.exc_info()[1])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+"""
+mentions.py — Détection pondérée de mots-clés en une seule passe.
+
+Un DetecteurMentions compile une fois pour toutes une liste de mots-clés
+pondérés en une expression régulière unique (alternative triée du plus long
+au plus court), appliquée sur le texte « plié » : minuscules, accents retirés,
+apostrophes typographiques normalisées. Le pliage conserve la longueur du
+texte, si bien que les positions trouvées valent aussi pour le texte d'origine.
+
+Seuls les mots entiers sont reconnus (« london » ne correspond pas à
+« Londonderry »), et chaque paragraphe reçoit un score égal à la somme des
+poids de ses mentions : les mots-clés ambigus reçoivent un poids faible et
+ne suffisent pas, seuls, à rendre un passage pertinent.
+"""
+
+import re
+import unicodedata
+from collections import namedtuple
+
+Mention = namedtuple("Mention", "debut fin mot poids")
+
+
+def _table_pliage() -> dict:
+    table = {}
+    for code in range(0x00C0, 0x0250):
+        car = chr(code)
+        base = "".join(c for c in unicodedata.normalize("NFKD", car) if not unicodedata.combining(c))
+        if len(base) == 1 and base != car:
+            table[code] = base.lower()
+    for apostrophe in "\u2019\u2018\u02bc":
+        table[ord(apostrophe)] = "'"
+    for espace in "\u00a0\u2009\u202f":
+        table[ord(espace)] = " "
+    return table
+
+
+_PLIAGE = _table_pliage()
+
+
+def plier(texte: str) -> str:
+    """Minuscules sans accents, apostrophes et espaces normalisées ; longueur conservée."""
+    return texte.translate(_PLIAGE).lower()
+
+
+class DetecteurMentions:
+    """Reconnaît en une passe des mots-clés pondérés, en mots entiers."""
+
+    def __init__(self, poids: dict, seuil: float = 1.0):
+        self.seuil = seuil
+        self.poids = {}
+        for mot, valeur in poids.items():
+            cle = " ".join(plier(mot).split())
+            self.poids[cle] = max(valeur, self.poids.get(cle, 0))
+        alternatives = sorted(self.poids, key=len, reverse=True)
+        self._motif = re.compile(
+            r"(?<!\w)(?:"
+            + "|".join(r"\s+".join(re.escape(m) for m in mot.split()) for mot in alternatives)
+            + r")(?!\w)"
+        )
+
+    def trouver(self, texte: str) -> list:
+        """Liste des Mention(debut, fin, mot, poids) dans l'ordre du texte."""
+        return [
+            Mention(m.start(), m.end(), cle, self.poids[cle])
+            for m in self._motif.finditer(plier(texte))
+            for cle in (" ".join(m.group().split()),)
+        ]
+
+    def score(self, texte: str) -> float:
+        """Somme des poids des mentions trouvées dans `texte`."""
+        return sum(m.poids for m in self.trouver(texte))
+
+    def pertinent(self, texte: str) -> bool:
+        """Vrai si le score de `texte` atteint le seuil."""
+        return self.score(texte) >= self.seuil
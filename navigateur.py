@@ -0,0 +1,181 @@
+"""
+navigateur.py — Pool Playwright partagé pour toute l'exécution.
+
+Un seul processus Chromium est lancé (à la première demande) et réutilisé par
+tous les collecteurs. Il vit dans un thread dédié qui fait tourner la boucle
+asyncio de Playwright ; les collecteurs, eux-mêmes exécutés dans des threads,
+y soumettent des tâches asynchrones. Chaque tâche reçoit une page neuve dans
+un contexte isolé (cookies, cache et en-têtes propres), et le nombre de pages
+ouvertes simultanément est borné.
+
+Si Playwright n'est pas installé ou que Chromium ne démarre pas,
+disponible() retourne False et les appelants se rabattent sur HTTP simple.
+
+Une tâche identifiée par une `cle` est archivée en capture (ARCHIVE_MODE,
+voir archive.py) ; en rejeu, son résultat est relu dans l'archive et
+Chromium n'est jamais lancé.
+
+Variables d'environnement :
+  PLAYWRIGHT            — « 0 » pour ne jamais lancer Chromium (bancs d'essai hors ligne)
+  PLAYWRIGHT_MAX_PAGES  — pages ouvertes simultanément (défaut : 3)
+"""
+
+import asyncio
+import os
+import threading
+
+from archive import ARCHIVE, AbsentDeLArchive
+
+ACTIF = os.environ.get("PLAYWRIGHT", "1").strip() != "0"
+MAX_PAGES = int(os.environ.get("PLAYWRIGHT_MAX_PAGES", "3") or 3)
+
+
+class NavigateurIndisponible(RuntimeError):
+    """Playwright n'est pas installé ou Chromium n'a pas pu être lancé."""
+
+
+class PoolNavigateur:
+    """Navigateur Chromium unique distribuant des pages isolées à la demande."""
+
+    def __init__(self, max_pages: int = MAX_PAGES):
+        self.max_pages = max_pages
+        self._verrou = threading.Lock()
+        self._boucle = None
+        self._thread = None
+        self._playwright = None
+        self._navigateur = None
+        self._semaphore = None
+        self._erreur = None
+        self.lancements = 0
+        self.pages_servies = 0
+
+    def disponible(self) -> bool:
+        """Indique si des pages peuvent être servies (sans forcer le lancement)."""
+        if self._erreur is not None:
+            return False
+        if self._navigateur is not None or ARCHIVE.rejeu:
+            return True
+        if not ACTIF:
+            self._erreur = NavigateurIndisponible("Playwright désactivé (PLAYWRIGHT=0)")
+            return False
+        try:
+            import playwright.async_api  # noqa: F401
+        except ImportError:
+            self._erreur = NavigateurIndisponible("Playwright non installé")
+            return False
+        return True
+
+    def _demarrer(self) -> None:
+        with self._verrou:
+            if self._navigateur is not None:
+                return
+            if self._erreur is not None:
+                raise self._erreur
+            try:
+                from playwright.async_api import async_playwright
+            except ImportError:
+                self._erreur = NavigateurIndisponible("Playwright non installé")
+                raise self._erreur
+
+            boucle = asyncio.new_event_loop()
+            thread = threading.Thread(target=boucle.run_forever, name="navigateur", daemon=True)
+            thread.start()
+
+            async def lancer():
+                pw = await async_playwright().start()
+                try:
+                    navigateur = await pw.chromium.launch(headless=True)
+                except Exception:
+                    await pw.stop()
+                    raise
+                return pw, navigateur, asyncio.Semaphore(self.max_pages)
+
+            try:
+                self._playwright, self._navigateur, self._semaphore = (
+                    asyncio.run_coroutine_threadsafe(lancer(), boucle).result()
+                )
+            except Exception as e:
+                boucle.call_soon_threadsafe(boucle.stop)
+                thread.join()
+                boucle.close()
+                detail = (str(e).splitlines() or [type(e).__name__])[0]
+                self._erreur = NavigateurIndisponible(f"Chromium n'a pas pu être lancé : {detail}")
+                raise self._erreur from e
+
+            self._boucle, self._thread = boucle, thread
+            self.lancements += 1
+            print(f"  🌐 Chromium lancé (pool de {self.max_pages} page(s) simultanée(s))")
+
+    async def _executer(self, tache, en_tetes):
+        async with self._semaphore:
+            contexte = await self._navigateur.new_context(extra_http_headers=en_tetes or {})
+            try:
+                page = await contexte.new_page()
+                self.pages_servies += 1
+                return await tache(page)
+            finally:
+                await contexte.close()
+
+    def executer(self, tache, en_tetes: dict = None, timeout: float = None, cle: str = None):
+        """
+        Exécute `tache` — une coroutine `async def tache(page)` — sur une page
+        neuve dans un contexte isolé, et retourne son résultat.
+
+        Bloque le thread appelant jusqu'à la fin de la tâche. Lève
+        NavigateurIndisponible si Playwright ne peut pas être utilisé ;
+        les exceptions de la tâche sont propagées telles quelles.
+
+        `cle` identifie la tâche dans l'archive de l'exécution : son résultat
+        (sérialisable en JSON) y est écrit en capture et relu en rejeu.
+        """
+        if ARCHIVE.rejeu:
+            if cle is None:
+                raise NavigateurIndisponible("rejeu d'archive : tâche Playwright non archivée")
+            try:
+                return ARCHIVE.rendu(cle)
+            except AbsentDeLArchive as e:
+                raise NavigateurIndisponible(str(e)) from e
+        self._demarrer()
+        futur = asyncio.run_coroutine_threadsafe(self._executer(tache, en_tetes), self._boucle)
+        try:
+            resultat = futur.result(timeout)
+        except Exception as e:
+            # Délai dépassé : annuler la coroutine, dont le finally ferme le contexte et
+            # libère la place du sémaphore (sans effet si elle est déjà terminée)
+            futur.cancel()
+            if cle is not None:
+                ARCHIVE.noter_erreur("navigateur", cle, e)
+            raise
+        if cle is not None:
+            ARCHIVE.noter_rendu(cle, resultat)
+        return resultat
+
+    def fermer(self) -> None:
+        """Ferme le navigateur et arrête la boucle ; sans effet s'il n'a jamais été lancé."""
+        with self._verrou:
+            if self._navigateur is None:
+                return
+
+            async def arreter():
+                try:
+                    await self._navigateur.close()
+                finally:
+                    await self._playwright.stop()
+
+            try:
+                asyncio.run_coroutine_threadsafe(arreter(), self._boucle).result(30)
+            except Exception as e:
+                print(f"  ⚠ Fermeture de Chromium : {e}")
+            self._boucle.call_soon_threadsafe(self._boucle.stop)
+            self._thread.join(timeout=30)
+            self._boucle.close()
+            print(f"  🌐 Chromium fermé ({self.pages_servies} page(s) servie(s)).")
+            self._navigateur = self._playwright = self._boucle = self._thread = None
+
+
+# Pool partagé par fetchers.py et interprovincial.py
+NAVIGATEUR = PoolNavigateur()
+
+
+def fermer_navigateur() -> None:
+    NAVIGATEUR.fermer()
@@ -0,0 +1,173 @@
+"""
+nouveautes.py — Édition de mise à jour : ce qui a paru depuis la collecte précédente.
+
+Chaque exécution réussie conserve l'état de sa collecte (ETAT_FICHIER) :
+pour chaque source, l'empreinte de son contenu et celles de ses éléments
+(communiqués, décrets, extraits interprovinciaux, voir empreintes.py) ou,
+pour les pages d'un seul tenant (Hansard, Gazette, registres), celles de
+ses lignes. Les empreintes suffisent : le contenu lui-même n'est pas gardé.
+
+En édition de mise à jour (DIGEST_EDITION=mise-a-jour), extraire_nouveautes()
+compare la collecte du moment à cet état et ne garde que :
+  - les sources inconnues de l'état précédent ;
+  - les éléments dont l'empreinte est nouvelle ;
+  - les lignes nouvelles des pages d'un seul tenant, chaque suite de lignes
+    précédée de la ligne qui la précède (l'intervenant d'un Hansard, par
+    exemple), et la première ligne de la page (son titre) en tête.
+Une source inchangée, devenue indisponible ou dont seules de courtes lignes
+ont changé (date de mise à jour, menu) n'apporte rien. En deçà de SEUIL
+caractères nouveaux, il n'y a rien de substantiel : pas d'appel au modèle
+ni de courriel, et l'état n'est pas avancé, pour que de petits ajouts
+successifs finissent par compter.
+
+Variables d'environnement :
+  DIGEST_EDITION  — « complete » (défaut) ou « mise-a-jour »
+  ETAT_FICHIER    — état de la dernière collecte (défaut : .cache/etat_collecte.json)
+  DELTA_SEUIL     — caractères nouveaux en deçà desquels rien n'est envoyé (défaut : 300)
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from archive import ARCHIVE, maintenant
+from empreintes import REGLES_DECOUPAGE, decouper, elements_de, normaliser_texte
+
+EDITION = os.environ.get("DIGEST_EDITION", "complete").strip().lower()
+MISE_A_JOUR = EDITION == "mise-a-jour"
+ETAT_FICHIER = Path(os.environ.get("ETAT_FICHIER",
+                                   Path(__file__).parent / ".cache" / "etat_collecte.json"))
+SEUIL = int(os.environ.get("DELTA_SEUIL", "300") or 300)
+
+# Lignes plus courtes : titres, menus, dates de mise à jour — gardées, mais jamais substantielles
+LIGNE_MIN = 40
+ELLIPSE = "[…]"
+
+
+def _cle(texte: str) -> str:
+    return hashlib.sha1(normaliser_texte(texte).encode("utf-8")).hexdigest()[:16]
+
+
+def _decoupee(nom: str, contenu: str) -> bool:
+    """Vrai si la source se découpe en éléments (sinon, elle est comparée ligne à ligne)."""
+    return nom in REGLES_DECOUPAGE and bool(decouper(nom, contenu)[1])
+
+
+def _indisponible(nom: str, contenu: str) -> bool:
+    """Vrai pour un message d'état (« non disponible », « en recès »…) plutôt qu'un contenu."""
+    return not elements_de({nom: contenu or ""})
+
+
+def _etat_source(nom: str, contenu: str) -> dict:
+    etat = {"empreinte": _cle(contenu)}
+    if _decoupee(nom, contenu):
+        etat["elements"] = [e.empreinte[:16] for e in elements_de({nom: contenu})]
+    else:
+        etat["lignes"] = sorted({_cle(l) for l in contenu.splitlines() if l.strip()})
+    return etat
+
+
+def charger_etat():
+    """État de la collecte précédente ({date, edition, sources}), ou None."""
+    try:
+        with open(ETAT_FICHIER, encoding="utf-8") as f:
+            etat = json.load(f)
+        etat["date"] = datetime.fromisoformat(etat["date"])
+        return etat
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def sauvegarder_etat(sources: dict, precedent: dict = None) -> None:
+    """
+    Écrit l'état de la collecte `sources` (écriture atomique). Une source
+    indisponible garde son état précédent : à son retour, seul ce qui aura
+    changé entre-temps paraîtra nouveau. Rien n'est écrit en rejeu d'archive.
+    """
+    if ARCHIVE.rejeu:
+        return
+    anciennes = (precedent or {}).get("sources", {})
+    etats = {}
+    for nom, contenu in sources.items():
+        if _indisponible(nom, contenu):
+            if nom in anciennes:
+                etats[nom] = anciennes[nom]
+        else:
+            etats[nom] = _etat_source(nom, contenu)
+    donnees = {"date": maintenant().isoformat(timespec="seconds"), "edition": EDITION, "sources": etats}
+    try:
+        ETAT_FICHIER.parent.mkdir(parents=True, exist_ok=True)
+        temporaire = ETAT_FICHIER.with_suffix(".tmp")
+        with open(temporaire, "w", encoding="utf-8") as f:
+            json.dump(donnees, f, ensure_ascii=False)
+        temporaire.replace(ETAT_FICHIER)
+    except OSError as e:
+        print(f"  ⚠ État de la collecte non enregistré : {e}")
+
+
+def _lignes_nouvelles(contenu: str, connues: set) -> tuple:
+    """(texte des lignes nouvelles avec leur contexte, caractères substantiels)."""
+    lignes = [l for l in contenu.splitlines() if l.strip()]
+    sortie = []
+    contexte = None
+    dans_suite = False
+    substance = 0
+    for ligne in lignes:
+        if _cle(ligne) in connues:
+            contexte, dans_suite = ligne, False
+            continue
+        if not dans_suite:
+            if contexte is not None:
+                sortie += [ELLIPSE, contexte]
+            dans_suite = True
+        sortie.append(ligne)
+        if len(ligne.strip()) >= LIGNE_MIN:
+            substance += len(ligne.strip())
+    if not substance:
+        return "", 0
+    if sortie[0] == ELLIPSE:
+        # Première ligne de la page (titre du Hansard, de la Gazette…) en tête
+        sortie = ([lignes[0]] if sortie[1] != lignes[0] else []) + sortie
+    return "\n".join(sortie), substance
+
+
+def extraire_nouveautes(sources: dict, etat: dict) -> tuple:
+    """
+    Ne garde des sources que ce qui est absent de l'état précédent.
+    Retourne (sources_nouvelles, stats) ; stats["caracteres"] mesure la
+    matière nouvelle substantielle (comparée à SEUIL par l'appelant).
+    """
+    anciennes = etat.get("sources", {})
+    nouvelles = {}
+    stats = {"sources_nouvelles": 0, "inchangees": 0, "indisponibles": 0,
+             "elements": 0, "lignes": 0, "caracteres": 0}
+    for nom, contenu in sources.items():
+        avant = anciennes.get(nom)
+        if _indisponible(nom, contenu):
+            stats["indisponibles"] += 1
+            continue
+        if avant is None:
+            nouvelles[nom] = contenu
+            stats["sources_nouvelles"] += 1
+            stats["caracteres"] += len(contenu)
+            continue
+        if avant.get("empreinte") == _cle(contenu):
+            stats["inchangees"] += 1
+            continue
+        if "elements" in avant and _decoupee(nom, contenu):
+            entete, _, separateur = decouper(nom, contenu)
+            connus = set(avant["elements"])
+            neufs = [e.texte for e in elements_de({nom: contenu}) if e.empreinte[:16] not in connus]
+            if neufs:
+                nouvelles[nom] = entete + separateur.join(neufs)
+                stats["elements"] += len(neufs)
+                stats["caracteres"] += sum(len(t) for t in neufs)
+            continue
+        texte, substance = _lignes_nouvelles(contenu, set(avant.get("lignes", ())))
+        if texte:
+            nouvelles[nom] = texte
+            stats["lignes"] += texte.count("\n") + 1
+            stats["caracteres"] += substance
+    return nouvelles, stats
@@ -0,0 +1,75 @@
+"""
+parallel.py — Exécution concurrente des collecteurs de sources.
+
+Les collecteurs passent l'essentiel de leur temps à attendre des serveurs
+gouvernementaux lents : on les lance donc en parallèle dans un pool de threads
+borné, de sorte que la phase de collecte dure à peu près le temps de la source
+la plus lente plutôt que la somme de toutes les sources.
+
+Chaque tâche s'exécute dans une copie du contexte de l'appelant et ouvre une
+portée « tache » (telemetrie.py) : ses requêtes, rendus et analyses y sont
+rattachés dans le rapport d'exécution.
+
+Variables d'environnement :
+  FETCH_WORKERS  — nombre maximal de collecteurs simultanés (défaut : 8,
+                   1 = exécution séquentielle comme auparavant)
+"""
+
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from telemetrie import portee
+
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", "8") or 8)
+
+
+class ResultatTache:
+    """Résultat d'une tâche : valeur retournée, durée et éventuelle exception."""
+
+    __slots__ = ("nom", "valeur", "duree", "erreur")
+
+    def __init__(self, nom, valeur=None, duree=0.0, erreur=None):
+        self.nom = nom
+        self.valeur = valeur
+        self.duree = duree
+        self.erreur = erreur
+
+
+def _chronometrer(nom, fn):
+    debut = time.perf_counter()
+    try:
+        with portee(nom, "tache"):
+            valeur = fn()
+        return ResultatTache(nom, valeur, time.perf_counter() - debut)
+    except Exception as e:
+        return ResultatTache(nom, None, time.perf_counter() - debut, e)
+
+
+def executer_en_parallele(taches: list, max_workers: int = None) -> list:
+    """
+    Exécute une liste de tâches [(nom, fonction_sans_argument), ...] en parallèle.
+
+    Retourne une liste de ResultatTache dans l'ordre des tâches fournies,
+    quel que soit l'ordre de complétion. Une exception levée par une tâche
+    est capturée dans ResultatTache.erreur et n'interrompt pas les autres.
+    """
+    workers = max(1, min(max_workers or FETCH_WORKERS, len(taches) or 1))
+    if workers == 1:
+        return [_chronometrer(nom, fn) for nom, fn in taches]
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="collecte") as pool:
+        futures = [pool.submit(contextvars.copy_context().run, _chronometrer, nom, fn)
+                   for nom, fn in taches]
+        return [f.result() for f in futures]
+
+
+def afficher_durees(resultats: list, titre: str) -> None:
+    """Affiche la durée de chaque tâche, de la plus lente à la plus rapide."""
+    if not resultats:
+        return
+    print(f"  ⏱ Durées — {titre} :")
+    for res in sorted(resultats, key=lambda r: r.duree, reverse=True):
+        etat = "⚠" if res.erreur else "✓"
+        print(f"    {etat} {res.duree:6.1f} s  {res.nom}")
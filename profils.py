@@ -0,0 +1,215 @@
+"""
+profils.py — Éditions ciblées d'un même digest selon le profil de chaque abonné.
+
+Le digest Markdown est analysé une seule fois en arbre : préambule,
+sections « ## » (reconnues par leur emoji), unités de contenu (un
+paragraphe, ou un élément de liste avec ses sous-éléments) et note de fin.
+Chaque profil y applique des filtres peu coûteux, sans nouvel appel au
+modèle :
+  - sections : clés des sections retenues (dit, passe, trame, reagir, venir, canada) ;
+  - mots_cles : une unité n'est gardée que si elle contient l'un des mots
+    (début de mot, sans égard aux accents ni à la casse : « lobby » retient
+    « lobbyistes ») ;
+  - provinces : dans la section 🍁, seules les références aux provinces
+    nommées sont gardées (« **Québec** — … »).
+Une section sans unité retenue disparaît ; une ligne d'introduction
+(« … : ») ou un sous-titre « ### » n'est gardé que si du contenu qui le
+suit l'est. Un profil dont l'édition serait vide ne reçoit rien ce jour-là.
+
+Fichier des profils (PROFILS_FICHIER), en JSON :
+  {"profils": [
+    {"nom": "Lobbying et réglementation", "sections": ["trame", "venir"],
+     "mots_cles": ["lobby", "règlement"], "destinataires": ["a@exemple.ca"]},
+    {"nom": "Interprovincial", "sections": ["canada"], "provinces": ["Québec", "Manitoba"],
+     "destinataires": ["b@exemple.ca", "c@exemple.ca"]}
+  ]}
+Les destinataires d'un profil ne reçoivent que leur édition, même s'ils
+figurent aussi dans RECIPIENT_EMAIL ou DESTINATAIRES_FICHIER.
+
+Variables d'environnement :
+  PROFILS_FICHIER  — fichier des profils d'abonnés (défaut : aucun, digest complet pour tous)
+"""
+
+import json
+import os
+import re
+import unicodedata
+
+PROFILS_FICHIER = os.environ.get("PROFILS_FICHIER", "").strip()
+
+# Clé de profil → emoji du titre de section (voir digest.CONSIGNES)
+SECTIONS = {
+    "dit": "🗣️",
+    "passe": "✅",
+    "trame": "🔍",
+    "reagir": "⚡",
+    "venir": "📅",
+    "canada": "🍁",
+}
+
+_SECTION = re.compile(r"##[ \t]+(.*)")
+_SOUS_TITRE = re.compile(r"#{3,6}[ \t]")
+_FILET = re.compile(r"[ ]{0,3}(?:(?:-[ \t]*){3,}|(?:\*[ \t]*){3,}|(?:_[ \t]*){3,})")
+_NOTE = re.compile(r"\*(?![\s*])[^*]+(?<!\s)\*")
+_PROVINCE = re.compile(r"\*\*\[?([^*\]]+?)\]?\*\*")
+
+
+def normaliser(texte: str) -> str:
+    """Minuscules sans accents, pour comparer mots-clés, provinces et titres."""
+    decompose = unicodedata.normalize("NFKD", texte)
+    return "".join(c for c in decompose if not unicodedata.combining(c)).casefold()
+
+
+class Unite:
+    """Un paragraphe ou un élément de liste, avec ses lignes en retrait."""
+
+    __slots__ = ("lignes", "texte", "intro", "titre", "province")
+
+    def __init__(self, ligne: str):
+        self.lignes = [ligne]
+        self.titre = bool(_SOUS_TITRE.match(ligne))
+        self.province = None
+        m = _PROVINCE.match(ligne.strip())
+        if m:
+            self.province = normaliser(m.group(1))
+
+    def terminer(self) -> None:
+        self.texte = normaliser(" ".join(self.lignes))
+        self.intro = not self.titre and self.lignes[-1].rstrip().endswith(":")
+
+
+class Section:
+    """Une section « ## » : titre et unités, None marquant une ligne vide entre deux blocs."""
+
+    __slots__ = ("cle", "titre", "unites")
+
+    def __init__(self, titre: str):
+        self.titre = titre
+        self.cle = next((cle for cle, emoji in SECTIONS.items() if titre.startswith(emoji)),
+                        normaliser(titre))
+        self.unites = []
+
+    def filtrer(self, garder) -> list:
+        """
+        Lignes de la section dont les unités satisfont `garder`, ou [] si aucune :
+        introductions et sous-titres ne restent que devant du contenu gardé.
+        """
+        gardees = [False] * len(self.unites)
+        suite_bloc = suite_titre = False
+        for i in range(len(self.unites) - 1, -1, -1):
+            unite = self.unites[i]
+            if unite is None:
+                suite_bloc = False
+            elif unite.titre:
+                gardees[i] = suite_titre
+                suite_titre = suite_bloc = False
+            elif unite.intro:
+                gardees[i] = suite_bloc or garder(unite)
+                suite_titre = suite_titre or gardees[i]
+            elif garder(unite):
+                gardees[i] = suite_bloc = suite_titre = True
+        if not any(g for g, u in zip(gardees, self.unites) if u is not None and not u.titre):
+            return []
+        lignes = []
+        for garde, unite in zip(gardees, self.unites):
+            if unite is None:
+                if lignes and lignes[-1]:
+                    lignes.append("")
+            elif garde:
+                lignes.extend(unite.lignes)
+        return lignes
+
+
+class DigestStructure:
+    """Arbre d'un digest Markdown : préambule, sections et note de fin, analysé une fois."""
+
+    def __init__(self, texte: str):
+        self.preambule = []
+        self.sections = []
+        self.note = None
+        lignes = texte.strip().split("\n")
+        if lignes and _NOTE.fullmatch(lignes[-1].strip()):
+            self.note = lignes.pop().strip()
+        courante = None
+        unite = None
+        for ligne in lignes:
+            m = _SECTION.match(ligne)
+            if m:
+                if unite is not None:
+                    unite.terminer()
+                courante = Section(m.group(1).strip())
+                self.sections.append(courante)
+                unite = None
+                continue
+            if courante is None:
+                self.preambule.append(ligne)
+                continue
+            if not ligne.strip() or _FILET.fullmatch(ligne):
+                if unite is not None:
+                    unite.terminer()
+                    courante.unites.append(None)
+                unite = None
+            elif unite is not None and ligne[:1] in (" ", "\t") and not _SOUS_TITRE.match(ligne):
+                unite.lignes.append(ligne)
+            else:
+                if unite is not None:
+                    unite.terminer()
+                unite = Unite(ligne)
+                courante.unites.append(unite)
+        if unite is not None:
+            unite.terminer()
+
+    def edition(self, profil: "Profil"):
+        """Markdown de l'édition d'un profil, ou None si aucune section n'y reste."""
+        morceaux = []
+        for section in self.sections:
+            if profil.sections and section.cle not in profil.sections:
+                continue
+            lignes = section.filtrer(lambda u, s=section: profil.garder(s, u))
+            if lignes:
+                morceaux.append("\n".join([f"## {section.titre}", "", *lignes]).rstrip())
+        if not morceaux:
+            return None
+        preambule = "\n".join(self.preambule).strip()
+        return "\n\n".join(([preambule] if preambule else []) + morceaux
+                           + (["---", self.note] if self.note else []))
+
+
+class Profil:
+    """Filtres d'un groupe d'abonnés : sections, mots-clés et provinces."""
+
+    def __init__(self, nom: str, destinataires: list, sections: list = (), mots_cles: list = (),
+                 provinces: list = ()):
+        self.nom = nom
+        self.destinataires = list(destinataires)
+        self.sections = set()
+        for s in sections:
+            cle = next((c for c, emoji in SECTIONS.items() if normaliser(s) in (c, normaliser(emoji))), None)
+            if cle is None:
+                raise ValueError(f"Profil « {nom} » : section inconnue « {s} » "
+                                 f"(attendu : {', '.join(SECTIONS)})")
+            self.sections.add(cle)
+        mots = [normaliser(m).strip() for m in mots_cles if m.strip()]
+        self.mots_cles = re.compile(r"\b(?:" + "|".join(map(re.escape, mots)) + ")") if mots else None
+        self.provinces = [normaliser(p).strip() for p in provinces if p.strip()]
+
+    def garder(self, section: Section, unite: Unite) -> bool:
+        if self.mots_cles is not None and not self.mots_cles.search(unite.texte):
+            return False
+        if self.provinces and section.cle == "canada":
+            return unite.province is not None and any(p in unite.province for p in self.provinces)
+        return True
+
+
+def charger_profils(chemin: str = None) -> list:
+    """Profils du fichier PROFILS_FICHIER (liste vide si aucun fichier n'est configuré)."""
+    chemin = chemin or PROFILS_FICHIER
+    if not chemin:
+        return []
+    with open(chemin, encoding="utf-8") as f:
+        donnees = json.load(f)
+    return [
+        Profil(p["nom"], p.get("destinataires", []), p.get("sections", []),
+               p.get("mots_cles", []), p.get("provinces", []))
+        for p in donnees.get("profils", [])
+    ]
@@ -0,0 +1,170 @@
+"""
+scheduler.py — Planificateur de requêtes HTTP avec politesse par hôte.
+
+Chaque hôte dispose de son propre seau à jetons (token bucket) : les requêtes
+vers un même site sont espacées selon son débit autorisé, tandis que des
+requêtes vers des hôtes différents partent simultanément. Une limite globale
+de requêtes en vol protège en plus le runner.
+
+Le temps passé à attendre un jeton ou une place est mesuré par hôte afin de
+pouvoir ajuster les débits (voir afficher_metriques).
+
+Variables d'environnement :
+  HTTP_MAX_CONCURRENCE   — requêtes simultanées, tous hôtes confondus (défaut : 8)
+  HTTP_MAX_PAR_HOTE      — requêtes simultanées vers un même hôte (défaut : 2)
+  HTTP_TAUX_PAR_HOTE     — requêtes par seconde autorisées par hôte (défaut : 1 ; strictement positif)
+  HTTP_RAFALE            — nombre de requêtes pouvant partir sans attente (défaut : 1)
+  HTTP_TAUX_HOTES        — surcharges par hôte, ex. « www.ontario.ca=0.5,news.gov.bc.ca=2 »
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+def lire_surcharges(valeur: str) -> dict:
+    """Lit une liste « hôte=nombre,hôte=nombre » en dictionnaire {hôte: float}."""
+    surcharges = {}
+    for paire in valeur.split(","):
+        hote, _, taux = paire.partition("=")
+        if hote.strip() and taux.strip():
+            surcharges[hote.strip().lower()] = float(taux)
+    return surcharges
+
+
+def _taux_positif(variable: str, taux: float, hote: str = "") -> float:
+    """Vérifie un débit lu dans `variable` : un débit nul ou négatif n'espacerait rien."""
+    if not taux > 0:
+        cible = f" pour {hote}" if hote else ""
+        raise ValueError(f"{variable} : débit{cible} invalide ({taux:g}) — attendu : un nombre "
+                         f"de requêtes par seconde strictement positif (ex. 0.5)")
+    return taux
+
+
+MAX_CONCURRENCE = int(os.environ.get("HTTP_MAX_CONCURRENCE", "8") or 8)
+MAX_PAR_HOTE = int(os.environ.get("HTTP_MAX_PAR_HOTE", "2") or 2)
+TAUX_PAR_HOTE = _taux_positif("HTTP_TAUX_PAR_HOTE", float(os.environ.get("HTTP_TAUX_PAR_HOTE", "1") or 1))
+RAFALE = float(os.environ.get("HTTP_RAFALE", "1") or 1)
+TAUX_HOTES = {hote: _taux_positif("HTTP_TAUX_HOTES", taux, hote)
+              for hote, taux in lire_surcharges(os.environ.get("HTTP_TAUX_HOTES", "")).items()}
+
+
+def hote_de(url: str) -> str:
+    """Retourne le nom d'hôte (en minuscules) d'une URL."""
+    return (urlsplit(url).hostname or "").lower()
+
+
+class SeauJetons:
+    """
+    Seau à jetons à réservation : un appelant qui ne trouve pas de jeton
+    en réserve un à crédit et dort jusqu'à sa disponibilité, ce qui sert
+    les demandes dans leur ordre d'arrivée.
+    """
+
+    def __init__(self, taux: float, capacite: float):
+        self.taux = taux
+        self.capacite = capacite
+        self.jetons = capacite
+        self.dernier = time.monotonic()
+        self._verrou = threading.Lock()
+
+    def reserver(self) -> float:
+        """Consomme un jeton et retourne le délai (s) à attendre avant de l'utiliser."""
+        with self._verrou:
+            maintenant = time.monotonic()
+            self.jetons = min(self.capacite, self.jetons + (maintenant - self.dernier) * self.taux)
+            self.dernier = maintenant
+            self.jetons -= 1
+            if self.jetons >= 0:
+                return 0.0
+            return -self.jetons / self.taux
+
+
+class MetriquesHote:
+    __slots__ = ("requetes", "attente_totale", "attente_max")
+
+    def __init__(self):
+        self.requetes = 0
+        self.attente_totale = 0.0
+        self.attente_max = 0.0
+
+
+class Planificateur:
+    """Répartit les requêtes entre hôtes en respectant débits et concurrence."""
+
+    def __init__(self, max_concurrence=MAX_CONCURRENCE, max_par_hote=MAX_PAR_HOTE,
+                 taux=TAUX_PAR_HOTE, rafale=RAFALE, taux_hotes=None):
+        self.taux = taux
+        self.rafale = rafale
+        self.max_par_hote = max_par_hote
+        self.taux_hotes = dict(taux_hotes if taux_hotes is not None else TAUX_HOTES)
+        self._global = threading.BoundedSemaphore(max_concurrence)
+        self._seaux = {}
+        self._semaphores = {}
+        self._metriques = {}
+        self._verrou = threading.Lock()
+
+    def _etat_hote(self, hote: str):
+        with self._verrou:
+            if hote not in self._seaux:
+                taux = self.taux_hotes.get(hote, self.taux)
+                self._seaux[hote] = SeauJetons(taux, self.rafale)
+                self._semaphores[hote] = threading.BoundedSemaphore(self.max_par_hote)
+                self._metriques[hote] = MetriquesHote()
+            return self._seaux[hote], self._semaphores[hote], self._metriques[hote]
+
+    @contextmanager
+    def creneau(self, url: str):
+        """
+        Bloque jusqu'à ce qu'une requête vers `url` soit autorisée, puis
+        occupe une place (globale et par hôte) pendant la durée du bloc.
+        """
+        hote = hote_de(url)
+        seau, semaphore, metriques = self._etat_hote(hote)
+        debut = time.monotonic()
+        semaphore.acquire()
+        try:
+            delai = seau.reserver()
+            if delai > 0:
+                time.sleep(delai)
+            self._global.acquire()
+            try:
+                attente = time.monotonic() - debut
+                with self._verrou:
+                    metriques.requetes += 1
+                    metriques.attente_totale += attente
+                    metriques.attente_max = max(metriques.attente_max, attente)
+                yield
+            finally:
+                self._global.release()
+        finally:
+            semaphore.release()
+
+    def metriques(self) -> dict:
+        """Retourne {hôte: {requetes, attente_totale, attente_moyenne, attente_max}}."""
+        with self._verrou:
+            return {
+                hote: {
+                    "requetes": m.requetes,
+                    "attente_totale": round(m.attente_totale, 3),
+                    "attente_moyenne": round(m.attente_totale / m.requetes, 3) if m.requetes else 0.0,
+                    "attente_max": round(m.attente_max, 3),
+                }
+                for hote, m in self._metriques.items()
+            }
+
+    def afficher_metriques(self) -> None:
+        """Affiche l'attente en file par hôte, du plus pénalisé au moins pénalisé."""
+        stats = self.metriques()
+        if not stats:
+            return
+        print("⏳ Attente en file par hôte (planificateur HTTP) :")
+        for hote, m in sorted(stats.items(), key=lambda kv: kv[1]["attente_totale"], reverse=True):
+            print(f"    {m['requetes']:3d} req.  attente {m['attente_totale']:6.1f} s "
+                  f"(moy. {m['attente_moyenne']:.1f} s, max {m['attente_max']:.1f} s)  {hote}")
+
+
+# Planificateur partagé par fetchers.py et interprovincial.py
+PLANIFICATEUR = Planificateur()
@@ -0,0 +1,269 @@
+"""
+anthropic_stub.py — Serveur local imitant l'API Anthropic, pour tester hors ligne.
+
+Points d'accès simulés :
+  POST /v1/messages                        réponse complète ou flux SSE (stream=true)
+  POST /v1/messages/count_tokens           estimation à 3,5 caractères par jeton
+  POST /v1/messages/batches                création d'un lot
+  GET  /v1/messages/batches/{id}           état du lot (terminé après --delai-lot s)
+  GET  /v1/messages/batches/{id}/results   résultats JSONL
+
+Options d'injection : latence avant chaque réponse, débit du flux, et flux
+figé en cours de route pour un modèle donné (test de la relance sur blocage).
+
+La réponse générée reprend les titres « ## » des consignes système (les six
+sections du digest) et liste les sources reçues : assez pour exercer tout le
+pipeline (historique, mise en page, envoi) sans appeler l'API. Le cache de
+prompt est simulé : un préfixe déjà vu jusqu'à un point cache_control est
+compté en lecture de cache, sinon en écriture.
+
+Usage :
+  python stubs/anthropic_stub.py [--port 8787] [--latence 0.5] [--delai-lot 5]
+                                 [--debit 20] [--blocage-modele claude-opus-4-6]
+  ANTHROPIC_BASE_URL=http://127.0.0.1:8787 ANTHROPIC_API_KEY=stub DRY_RUN=1 python main.py
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CARACTERES_PAR_JETON = 3.5
+
+
+def _jetons(texte: str) -> int:
+    return max(1, math.ceil(len(texte) / CARACTERES_PAR_JETON))
+
+
+def _textes(contenu) -> list:
+    """Textes d'un champ system ou content (chaîne ou liste de blocs)."""
+    if isinstance(contenu, str):
+        return [(contenu, False)]
+    return [(b.get("text", ""), "cache_control" in b) for b in contenu or [] if isinstance(b, dict)]
+
+
+class EtatStub:
+    """Préfixes mis en cache et lots soumis, partagés entre les requêtes."""
+
+    def __init__(self, latence: float, delai_lot: float, debit: float,
+                 blocage_modele: str = "", blocage_apres: int = 0):
+        self.blocage_modele = blocage_modele
+        self.blocage_apres = blocage_apres
+        self.latence = latence
+        self.delai_lot = delai_lot
+        self.debit = debit
+        self.verrou = threading.Lock()
+        self.prefixes = set()
+        self.lots = {}
+
+    def usage(self, parametres: dict) -> dict:
+        """Jetons d'entrée répartis entre écriture de cache, lecture de cache et hors cache."""
+        blocs = _textes(parametres.get("system", ""))
+        for message in parametres.get("messages", []):
+            blocs += _textes(message.get("content", ""))
+        total = sum(_jetons(t) for t, _ in blocs)
+        empreinte = hashlib.sha256(parametres.get("model", "").encode())
+        lus = ecrits = couverts = 0
+        for texte, point_de_cache in blocs:
+            empreinte.update(texte.encode("utf-8"))
+            couverts += _jetons(texte)
+            if point_de_cache:
+                cle = empreinte.hexdigest()
+                with self.verrou:
+                    deja_vu = cle in self.prefixes
+                    self.prefixes.add(cle)
+                if deja_vu:
+                    lus, ecrits = couverts, 0
+                else:
+                    ecrits = couverts - lus
+        return {
+            "input_tokens": total - lus - ecrits,
+            "cache_creation_input_tokens": ecrits,
+            "cache_read_input_tokens": lus,
+        }
+
+
+def repondre(parametres: dict) -> str:
+    """Texte simulé : les sections « ## » demandées, avec la liste des sources reçues."""
+    systeme = "\n".join(t for t, _ in _textes(parametres.get("system", "")))
+    demande = "\n".join(
+        t for m in parametres.get("messages", []) for t, _ in _textes(m.get("content", ""))
+    )
+    sources = re.findall(r"^SOURCE : (.+)$", demande, re.M) or ["(aucune source nommée)"]
+    liste = ", ".join(dict.fromkeys(sources))
+    titres = re.findall(r"^## .+$", systeme, re.M)
+    if not titres:
+        return f"- Notes simulées à partir de : {liste}\n"
+    sections = [
+        f"{titre}\nRéponse simulée par le serveur local. Sources reçues : {liste}. "
+        f"**Aucun contenu réel** n'a été analysé.\n"
+        for titre in dict.fromkeys(titres)
+    ]
+    return "\n".join(sections) + "\n*Digest simulé (serveur local).*"
+
+
+def message(parametres: dict, etat: EtatStub) -> dict:
+    texte = repondre(parametres)
+    return {
+        "id": f"msg_stub_{uuid.uuid4().hex[:16]}",
+        "type": "message",
+        "role": "assistant",
+        "model": parametres.get("model", "stub"),
+        "content": [{"type": "text", "text": texte}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {**etat.usage(parametres), "output_tokens": _jetons(texte)},
+    }
+
+
+def _horodatage(instant: datetime) -> str:
+    return instant.isoformat().replace("+00:00", "Z")
+
+
+class Gestionnaire(BaseHTTPRequestHandler):
+    etat: EtatStub = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        print(f"  [stub] {self.command} {self.path} — " + format % args)
+
+    def _json(self, code: int, corps: dict) -> None:
+        donnees = json.dumps(corps).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(donnees)))
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def _corps(self) -> dict:
+        longueur = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(longueur) or b"{}")
+
+    def _lot(self, identifiant: str) -> dict:
+        lot = self.etat.lots[identifiant]
+        termine = time.time() - lot["cree"] >= self.etat.delai_lot
+        cree = datetime.fromtimestamp(lot["cree"], timezone.utc)
+        base = f"http://{self.headers.get('Host')}"
+        n = len(lot["requetes"])
+        return {
+            "id": identifiant,
+            "type": "message_batch",
+            "processing_status": "ended" if termine else "in_progress",
+            "request_counts": {
+                "processing": 0 if termine else n, "succeeded": n if termine else 0,
+                "errored": 0, "canceled": 0, "expired": 0,
+            },
+            "created_at": _horodatage(cree),
+            "expires_at": _horodatage(cree + timedelta(hours=24)),
+            "ended_at": _horodatage(cree + timedelta(seconds=self.etat.delai_lot)) if termine else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"{base}/v1/messages/batches/{identifiant}/results" if termine else None,
+        }
+
+    def do_POST(self):
+        parametres = self._corps()
+        time.sleep(self.etat.latence)
+        if self.path.startswith("/v1/messages/count_tokens"):
+            blocs = _textes(parametres.get("system", ""))
+            for m in parametres.get("messages", []):
+                blocs += _textes(m.get("content", ""))
+            return self._json(200, {"input_tokens": sum(_jetons(t) for t, _ in blocs)})
+        if self.path.startswith("/v1/messages/batches"):
+            identifiant = f"msgbatch_stub_{uuid.uuid4().hex[:16]}"
+            self.etat.lots[identifiant] = {"cree": time.time(), "requetes": parametres.get("requests", [])}
+            return self._json(200, self._lot(identifiant))
+        if not self.path.startswith("/v1/messages"):
+            return self._json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+        reponse = message(parametres, self.etat)
+        if not parametres.get("stream"):
+            return self._json(200, reponse)
+        self._flux(reponse)
+
+    def _flux(self, reponse: dict) -> None:
+        """Réponse en flux SSE, texte découpé en morceaux de quelques mots."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def evenement(nom, donnees):
+            self.wfile.write(f"event: {nom}\ndata: {json.dumps(donnees)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        texte = reponse["content"][0]["text"]
+        debut = {**reponse, "content": [], "stop_reason": None,
+                 "usage": {**reponse["usage"], "output_tokens": 1}}
+        evenement("message_start", {"type": "message_start", "message": debut})
+        evenement("content_block_start", {"type": "content_block_start", "index": 0,
+                                          "content_block": {"type": "text", "text": ""}})
+        bloque = self.etat.blocage_modele and reponse["model"] == self.etat.blocage_modele
+        for numero, morceau in enumerate(m for m in re.findall(r"\S*\s*", texte) if m):
+            if bloque and numero == self.etat.blocage_apres:
+                time.sleep(3600)  # flux muet : le client doit abandonner de lui-même
+                return
+            evenement("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                              "delta": {"type": "text_delta", "text": morceau}})
+            if self.etat.debit:
+                time.sleep(1 / self.etat.debit)
+        evenement("content_block_stop", {"type": "content_block_stop", "index": 0})
+        evenement("message_delta", {"type": "message_delta",
+                                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                    "usage": {"output_tokens": reponse["usage"]["output_tokens"]}})
+        evenement("message_stop", {"type": "message_stop"})
+        self.close_connection = True
+
+    def do_GET(self):
+        m = re.match(r"^/v1/messages/batches/([\w-]+)(/results)?$", self.path.split("?")[0])
+        if not m or m.group(1) not in self.etat.lots:
+            return self._json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+        identifiant, resultats = m.groups()
+        if not resultats:
+            return self._json(200, self._lot(identifiant))
+        lignes = [
+            json.dumps({"custom_id": r["custom_id"],
+                        "result": {"type": "succeeded", "message": message(r["params"], self.etat)}})
+            for r in self.etat.lots[identifiant]["requetes"]
+        ]
+        donnees = ("\n".join(lignes) + "\n").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/binary")
+        self.send_header("Content-Length", str(len(donnees)))
+        self.end_headers()
+        self.wfile.write(donnees)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latence", type=float, default=0.0,
+                        help="délai (s) avant chaque réponse")
+    parser.add_argument("--debit", type=float, default=0.0,
+                        help="morceaux de texte par seconde en flux (0 = sans limite)")
+    parser.add_argument("--delai-lot", type=float, default=0.0,
+                        help="durée (s) avant qu'un lot soit terminé")
+    parser.add_argument("--blocage-modele", default="",
+                        help="modèle dont les flux se figent (test de relance)")
+    parser.add_argument("--blocage-apres", type=int, default=3,
+                        help="nombre de morceaux envoyés avant de figer le flux")
+    args = parser.parse_args()
+
+    Gestionnaire.etat = EtatStub(args.latence, args.delai_lot, args.debit,
+                                 args.blocage_modele, args.blocage_apres)
+    serveur = ThreadingHTTPServer(("127.0.0.1", args.port), Gestionnaire)
+    print(f"Serveur Anthropic simulé sur http://127.0.0.1:{args.port}")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
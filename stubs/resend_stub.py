@@ -0,0 +1,250 @@
+"""
+resend_stub.py — Serveur local imitant l'API Resend, pour tester l'envoi groupé hors ligne.
+
+Points d'accès simulés :
+  POST /emails          un courriel
+  POST /emails/batch    jusqu'à 100 courriels (validation « strict » ou « permissive »)
+  GET  /__compteurs     compteurs du serveur (requêtes, courriels, 429, doublons…)
+
+Comportements reproduits : limite de débit par seau à jetons (429
+rate_limit_exceeded avec retry-after et ratelimit-*), quota total de
+courriels (429 daily_quota_exceeded), adresses invalides rejetées, et clés
+d'idempotence (même clé et même contenu : réponse d'origine rejouée sans
+nouvel envoi ; même clé et autre contenu : 409).
+
+Injection de défauts : latence, réponses 500 et connexions coupées après
+l'envoi (réponse perdue), pour vérifier qu'une relance n'envoie rien deux
+fois : le compteur « doublons » compte les destinataires ayant reçu deux
+fois le même sujet.
+
+Usage :
+  python stubs/resend_stub.py [--port 8791] [--taux 2] [--latence 0.1]
+                              [--taux-erreur 0.05] [--taux-coupure 0.02] [--quota 0]
+  RESEND_API_URL=http://127.0.0.1:8791 RESEND_API_KEY=stub RECIPIENT_EMAIL=a@exemple.ca python main.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ADRESSE = re.compile(r"^(?:.*<)?[^@\s<>]+@[^@\s<>]+\.[^@\s<>]+>?$")
+TAILLE_LOT_MAX = 100
+
+
+class ErreurApi(Exception):
+    def __init__(self, code: int, nom: str, message: str, en_tetes: dict = None):
+        super().__init__(message)
+        self.code = code
+        self.nom = nom
+        self.en_tetes = en_tetes or {}
+
+
+class EtatStub:
+    """Seau de débit, quota, clés d'idempotence et courriels reçus, partagés entre les requêtes."""
+
+    def __init__(self, taux: float, latence: float, taux_erreur: float, taux_coupure: float,
+                 quota: int, graine: int):
+        self.taux = taux
+        self.latence = latence
+        self.taux_erreur = taux_erreur
+        self.taux_coupure = taux_coupure
+        self.quota = quota
+        self.alea = random.Random(graine)
+        self.verrou = threading.Lock()
+        self.jetons = max(1.0, taux)
+        self.dernier = time.monotonic()
+        self.idempotence = {}
+        self.recus = Counter()
+        self.compteurs = Counter()
+
+    def limiter(self) -> None:
+        """Consomme un jeton du seau ; lève une 429 si le débit est dépassé."""
+        if self.taux <= 0:
+            return
+        with self.verrou:
+            maintenant = time.monotonic()
+            self.jetons = min(max(1.0, self.taux), self.jetons + (maintenant - self.dernier) * self.taux)
+            self.dernier = maintenant
+            if self.jetons >= 1:
+                self.jetons -= 1
+                return
+            reset = (1 - self.jetons) / self.taux
+        self.compter("limites")
+        raise ErreurApi(429, "rate_limit_exceeded", "Too many requests. You can only make "
+                        f"{self.taux:g} requests per second.", {
+                            "retry-after": f"{reset:.2f}",
+                            "ratelimit-limit": f"{self.taux:g}",
+                            "ratelimit-remaining": "0",
+                            "ratelimit-reset": f"{reset:.2f}",
+                        })
+
+    def tirage(self) -> tuple:
+        with self.verrou:
+            return self.alea.random(), self.alea.random()
+
+    def compter(self, cle: str, n: int = 1) -> None:
+        with self.verrou:
+            self.compteurs[cle] += n
+
+    def livrer(self, courriels: list) -> list:
+        """Enregistre les courriels envoyés ; retourne leurs identifiants."""
+        with self.verrou:
+            if self.quota and self.compteurs["courriels"] + len(courriels) > self.quota:
+                raise ErreurApi(429, "daily_quota_exceeded", "You have reached your daily email quota.")
+            identifiants = []
+            for courriel in courriels:
+                for adresse in courriel["to"]:
+                    cle = (adresse.lower(), courriel.get("subject", ""))
+                    self.recus[cle] += 1
+                    if self.recus[cle] == 2:
+                        self.compteurs["doublons"] += 1
+                self.compteurs["courriels"] += 1
+                identifiants.append({"id": str(uuid.uuid4())})
+            return identifiants
+
+
+def _erreur_courriel(courriel: dict):
+    """Motif de rejet d'un courriel, ou None."""
+    for champ in ("from", "to", "subject"):
+        if not courriel.get(champ):
+            return f"The `{champ}` field is missing."
+    if not (courriel.get("html") or courriel.get("text")):
+        return "Either `html` or `text` must be provided."
+    destinataires = courriel["to"] if isinstance(courriel["to"], list) else [courriel["to"]]
+    if len(destinataires) > 50:
+        return "The `to` field must contain at most 50 addresses."
+    for adresse in [courriel["from"], *destinataires]:
+        if not ADRESSE.match(str(adresse)):
+            return f"Invalid `to` field. The email address needs to follow the `email@example.com` " \
+                   f"or `Name <email@example.com>` format: {adresse}"
+    return None
+
+
+class Gestionnaire(BaseHTTPRequestHandler):
+    etat: EtatStub = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, code: int, corps, en_tetes: dict = None) -> None:
+        donnees = json.dumps(corps).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(donnees)))
+        for cle, valeur in (en_tetes or {}).items():
+            self.send_header(cle, valeur)
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def _envoyer(self, corps) -> dict:
+        etat = self.etat
+        if self.path.startswith("/emails/batch"):
+            if not isinstance(corps, list) or not corps:
+                raise ErreurApi(422, "validation_error", "The request body must be a non-empty array.")
+            if len(corps) > TAILLE_LOT_MAX:
+                raise ErreurApi(422, "validation_error",
+                                f"Batch size exceeds the maximum of {TAILLE_LOT_MAX} emails.")
+            permissif = self.headers.get("x-batch-validation", "strict") == "permissive"
+            courriels = [dict(c, to=c["to"] if isinstance(c.get("to"), list) else [c.get("to")])
+                         for c in corps]
+            erreurs = [{"index": i, "message": m}
+                       for i, m in ((i, _erreur_courriel(c)) for i, c in enumerate(courriels)) if m]
+            if erreurs and not permissif:
+                raise ErreurApi(422, "validation_error", f"emails[{erreurs[0]['index']}]: "
+                                f"{erreurs[0]['message']}")
+            rejetes = {e["index"] for e in erreurs}
+            etat.compter("rejets", len(rejetes))
+            reponse = {"data": etat.livrer([c for i, c in enumerate(courriels) if i not in rejetes])}
+            if permissif:
+                reponse["errors"] = erreurs
+            return reponse
+        motif = _erreur_courriel(corps)
+        if motif:
+            raise ErreurApi(422, "validation_error", motif)
+        corps["to"] = corps["to"] if isinstance(corps["to"], list) else [corps["to"]]
+        return etat.livrer([corps])[0]
+
+    def do_POST(self):
+        etat = self.etat
+        longueur = int(self.headers.get("Content-Length") or 0)
+        brut = self.rfile.read(longueur) or b"{}"
+        etat.compter("requetes")
+        time.sleep(etat.latence)
+        if self.path.rstrip("/") not in ("/emails", "/emails/batch"):
+            return self._json(404, {"statusCode": 404, "name": "not_found", "message": self.path})
+        try:
+            etat.limiter()
+            erreur, coupure = etat.tirage()
+            if erreur < etat.taux_erreur:
+                etat.compter("erreurs")
+                raise ErreurApi(500, "application_error", "Internal server error (injection).")
+
+            cle = self.headers.get("Idempotency-Key")
+            empreinte = hashlib.sha1(brut).hexdigest()
+            if cle:
+                with etat.verrou:
+                    deja = etat.idempotence.get(cle)
+                if deja is not None:
+                    if deja[0] != empreinte:
+                        raise ErreurApi(409, "invalid_idempotent_request",
+                                        "Same idempotency key used with a different request payload.")
+                    etat.compter("rejouees")
+                    return self._json(200, deja[1])
+
+            reponse = self._envoyer(json.loads(brut))
+            if cle:
+                with etat.verrou:
+                    etat.idempotence[cle] = (empreinte, reponse)
+            if coupure < etat.taux_coupure:
+                # Envoi effectué, réponse perdue : seul l'idempotence évite un second envoi
+                etat.compter("coupures")
+                self.close_connection = True
+                return
+            self._json(200, reponse)
+        except ErreurApi as e:
+            self._json(e.code, {"statusCode": e.code, "name": e.nom, "message": str(e)}, e.en_tetes)
+        except (ValueError, KeyError, TypeError) as e:
+            self._json(422, {"statusCode": 422, "name": "validation_error", "message": str(e)})
+
+    def do_GET(self):
+        if self.path == "/__compteurs":
+            with self.etat.verrou:
+                compteurs = dict(self.etat.compteurs)
+            return self._json(200, compteurs)
+        self._json(404, {"statusCode": 404, "name": "not_found", "message": self.path})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--taux", type=float, default=2.0,
+                        help="requêtes par seconde avant 429 (0 = sans limite)")
+    parser.add_argument("--latence", type=float, default=0.0, help="délai (s) avant chaque réponse")
+    parser.add_argument("--taux-erreur", type=float, default=0.0, help="part de réponses 500")
+    parser.add_argument("--taux-coupure", type=float, default=0.0,
+                        help="part d'envois dont la réponse est perdue (connexion coupée)")
+    parser.add_argument("--quota", type=int, default=0, help="courriels acceptés au total (0 = illimité)")
+    parser.add_argument("--graine", type=int, default=1)
+    args = parser.parse_args()
+
+    Gestionnaire.etat = EtatStub(args.taux, args.latence, args.taux_erreur, args.taux_coupure,
+                                 args.quota, args.graine)
+    serveur = ThreadingHTTPServer(("127.0.0.1", args.port), Gestionnaire)
+    serveur.daemon_threads = True
+    print(f"Serveur Resend simulé sur http://127.0.0.1:{args.port}", flush=True)
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
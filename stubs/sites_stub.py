@@ -0,0 +1,268 @@
+"""
+sites_stub.py — Serveur local rejouant les sites gouvernementaux, pour les bancs d'essai.
+
+Le pipeline y est branché par HTTP_REDIRECTION (transport.py) : l'URL
+https://hote/chemin?q est demandée à http://127.0.0.1:PORT/https/hote/chemin?q.
+Le serveur répond :
+  1. depuis les fixtures enregistrées (benchmarks/bench_collecte.py enregistrer) :
+     index.json {url: {"corps", "statut", "type"}} et fichiers de corps ;
+  2. sinon, avec --synthetique, par une page générée à partir de l'URL (HTML,
+     flux RSS ou JSON selon le chemin), déterministe pour une même graine :
+     liens de communiqués, de Hansard et de décrets, noms en gras et mentions
+     de l'Ontario, pour exercer les mêmes extracteurs que les vraies pages ;
+  3. sinon, 404.
+
+Injection de défauts : latence (avec gigue) avant chaque réponse, réponses
+503 et connexions coupées sans réponse, selon des taux donnés.
+
+Usage :
+  python stubs/sites_stub.py [--port 8790] [--fixtures benchmarks/fixtures]
+                             [--synthetique] [--latence 0.2] [--gigue 0.1]
+                             [--taux-erreur 0.05] [--taux-coupure 0.02] [--graine 1]
+  HTTP_REDIRECTION=http://127.0.0.1:8790 PLAYWRIGHT=0 HTTP_CACHE=0 DRY_RUN=1 python main.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+MOTS = (
+    "budget santé éducation infrastructure logement énergie transport emploi "
+    "agriculture environnement justice finances municipalités programme fonds "
+    "annonce investissement consultation règlement projet communauté région "
+    "ministre député comité rapport entente partenariat secteur service"
+).split()
+NOMS = ["Jean Tremblay", "Marie Gagnon", "Sarah Chen", "David Singh", "Amélie Roy",
+        "Robert MacLeod", "Priya Patel", "Luc Bouchard", "Emily Wong", "Omar Haddad"]
+MENTIONS = ["Ontario", "le gouvernement Ford", "Queen's Park", "Toronto", "Doug Ford",
+            "les Ontariens", "Brampton"]
+
+
+def normaliser(url: str) -> str:
+    """Clé d'index : paramètres de requête triés, sans fragment."""
+    morceaux = urlsplit(url)
+    requete = urlencode(sorted(parse_qsl(morceaux.query, keep_blank_values=True)))
+    return f"{morceaux.scheme}://{morceaux.netloc.lower()}{morceaux.path or '/'}" + (
+        f"?{requete}" if requete else "")
+
+
+class Fixtures:
+    """Réponses enregistrées : index.json et fichiers de corps relatifs au dossier."""
+
+    def __init__(self, dossier: Path):
+        self.dossier = dossier
+        self.index = {}
+        try:
+            with open(dossier / "index.json", encoding="utf-8") as f:
+                self.index = {normaliser(u): e for u, e in json.load(f).items()}
+        except (OSError, ValueError):
+            pass
+
+    def reponse(self, url: str):
+        entree = self.index.get(normaliser(url))
+        if entree is None:
+            return None
+        corps = (self.dossier / entree["corps"]).read_bytes()
+        return entree.get("statut", 200), entree.get("type", "text/html"), corps
+
+
+# ---------------------------------------------------------------------------
+# Pages synthétiques
+# ---------------------------------------------------------------------------
+def _phrase(alea: random.Random, mention: bool = False) -> str:
+    mots = alea.choices(MOTS, k=alea.randint(10, 22))
+    if mention:
+        mots.insert(alea.randrange(len(mots)), alea.choice(MENTIONS))
+    return " ".join(mots).capitalize() + "."
+
+
+def _titre(alea: random.Random) -> str:
+    return " ".join(alea.choices(MOTS, k=alea.randint(5, 9))).capitalize()
+
+
+def page_html(url: str, alea: random.Random, paragraphes: int) -> str:
+    morceaux = urlsplit(url)
+    annee = datetime.now().year
+    base = f"{morceaux.scheme}://{morceaux.netloc}"
+    liens = []
+    for i in range(12):
+        liens.append((f"{_titre(alea)} — communiqué {i + 1}", f"/en/release/{annee}/{alea.randrange(10**6)}"))
+    for i in range(4):
+        liens.append((f"Hansard {annee} — séance {i + 1}",
+                      f"/en/legislative-business/house-documents/hansard/{annee}-{i + 1:02d}"))
+    for i in range(6):
+        liens.append((f"Décret {annee}-{alea.randrange(1000, 2000)}",
+                      f"/orders-in-council/oc-{annee}-{alea.randrange(1000, 2000)}"))
+    articles = "\n".join(
+        f'<article class="news-item"><h3><a href="{href}">{escape(texte)}</a></h3>'
+        f"<p>{_phrase(alea, mention=alea.random() < 0.3)}</p></article>"
+        for texte, href in liens
+    )
+    corps = "\n".join(
+        f"<p>{'<b>' + alea.choice(NOMS) + '</b> — ' if alea.random() < 0.15 else ''}"
+        + " ".join(_phrase(alea, mention=alea.random() < 0.2) for _ in range(alea.randint(2, 5)))
+        + "</p>"
+        for _ in range(paragraphes)
+    )
+    navigation = "".join(f'<li><a href="{base}/page/{m}">{m}</a></li>' for m in MOTS[:15])
+    return f"""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>{escape(_titre(alea))}</title>
+<style>body {{ font-family: sans-serif; }}</style>
+<script>window.dataLayer = window.dataLayer || [];</script></head>
+<body><header><nav><ul>{navigation}</ul></nav></header>
+<main id="content"><h1>{escape(_titre(alea))}</h1>
+{articles}
+{corps}
+</main>
+<footer><p>© Imprimeur du Roi — page synthétique ({escape(url)})</p></footer></body></html>"""
+
+
+def flux_rss(url: str, alea: random.Random, elements: int = 15) -> str:
+    morceaux = urlsplit(url)
+    maintenant = datetime.now().astimezone()
+    items = "\n".join(
+        f"<item><title>{escape(_titre(alea))}</title>"
+        f"<link>{morceaux.scheme}://{morceaux.netloc}/news/{alea.randrange(10**6)}</link>"
+        f"<description>{escape(' '.join(_phrase(alea, mention=alea.random() < 0.4) for _ in range(3)))}"
+        f"</description><pubDate>{format_datetime(maintenant - timedelta(hours=3 * i))}</pubDate></item>"
+        for i in range(elements)
+    )
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>'
+            f"<title>Nouvelles — {escape(morceaux.netloc)}</title><link>{escape(url)}</link>"
+            f"<description>Flux synthétique</description>\n{items}\n</channel></rss>")
+
+
+def document_json(url: str, alea: random.Random) -> str:
+    annee = datetime.now().year
+    return json.dumps({"results": [
+        {"title": f"Décret {annee}-{n}", "url": f"/orders-in-council/oc-{annee}-{n}"}
+        for n in alea.sample(range(1000, 2000), 10)
+    ]})
+
+
+def synthetique(url: str, graine: int, paragraphes: int) -> tuple:
+    """(statut, type, corps) d'une page générée pour `url`, identique d'un appel à l'autre."""
+    alea = random.Random(hashlib.sha1(f"{graine}|{url}".encode()).hexdigest())
+    chemin = urlsplit(url).path.lower()
+    if any(m in chemin for m in ("rss", "feed", "atom", ".xml")):
+        return 200, "application/rss+xml; charset=utf-8", flux_rss(url, alea).encode("utf-8")
+    if chemin.endswith(".json") or "/api/" in chemin:
+        return 200, "application/json", document_json(url, alea).encode("utf-8")
+    return 200, "text/html; charset=utf-8", page_html(url, alea, paragraphes).encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Serveur
+# ---------------------------------------------------------------------------
+class Reglages:
+    def __init__(self, fixtures: Fixtures, synthetique: bool, latence: float, gigue: float,
+                 taux_erreur: float, taux_coupure: float, graine: int, paragraphes: int):
+        self.fixtures = fixtures
+        self.synthetique = synthetique
+        self.latence = latence
+        self.gigue = gigue
+        self.taux_erreur = taux_erreur
+        self.taux_coupure = taux_coupure
+        self.graine = graine
+        self.paragraphes = paragraphes
+        self.alea = random.Random(graine)
+        self.verrou = threading.Lock()
+        self.compteurs = {"servies": 0, "synthetiques": 0, "absentes": 0, "erreurs": 0, "coupures": 0}
+
+    def tirage(self) -> tuple:
+        with self.verrou:
+            return self.alea.random(), self.alea.random(), self.alea.uniform(-1, 1)
+
+    def compter(self, cle: str) -> None:
+        with self.verrou:
+            self.compteurs[cle] += 1
+
+
+class Gestionnaire(BaseHTTPRequestHandler):
+    reglages: Reglages = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _repondre(self, statut: int, type_contenu: str, corps: bytes) -> None:
+        self.send_response(statut)
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(corps)
+
+    def do_GET(self):
+        r = self.reglages
+        if self.path == "/__compteurs":
+            return self._repondre(200, "application/json", json.dumps(r.compteurs).encode())
+        erreur, coupure, gigue = r.tirage()
+        time.sleep(max(0.0, r.latence + gigue * r.gigue))
+        if coupure < r.taux_coupure:
+            r.compter("coupures")
+            self.close_connection = True
+            return
+        if erreur < r.taux_erreur:
+            r.compter("erreurs")
+            return self._repondre(503, "text/plain", b"Service Unavailable (injection)")
+
+        schema, _, reste = self.path.lstrip("/").partition("/")
+        url = f"{schema}://{reste}"
+        reponse = r.fixtures.reponse(url)
+        if reponse is not None:
+            r.compter("servies")
+        elif r.synthetique:
+            reponse = synthetique(url, r.graine, r.paragraphes)
+            r.compter("synthetiques")
+        else:
+            r.compter("absentes")
+            reponse = (404, "text/plain", f"Aucune fixture pour {url}".encode("utf-8"))
+        self._repondre(*reponse)
+
+    do_HEAD = do_GET
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--fixtures", default=str(Path(__file__).resolve().parent.parent
+                                                  / "benchmarks" / "fixtures"))
+    parser.add_argument("--synthetique", action="store_true",
+                        help="générer une page pour les URL sans fixture")
+    parser.add_argument("--paragraphes", type=int, default=60,
+                        help="paragraphes par page HTML synthétique")
+    parser.add_argument("--latence", type=float, default=0.0, help="délai (s) avant chaque réponse")
+    parser.add_argument("--gigue", type=float, default=0.0, help="variation (± s) de la latence")
+    parser.add_argument("--taux-erreur", type=float, default=0.0, help="part de réponses 503")
+    parser.add_argument("--taux-coupure", type=float, default=0.0,
+                        help="part de connexions coupées sans réponse")
+    parser.add_argument("--graine", type=int, default=1)
+    args = parser.parse_args()
+
+    fixtures = Fixtures(Path(args.fixtures))
+    Gestionnaire.reglages = Reglages(fixtures, args.synthetique, args.latence, args.gigue,
+                                     args.taux_erreur, args.taux_coupure, args.graine,
+                                     args.paragraphes)
+    serveur = ThreadingHTTPServer(("127.0.0.1", args.port), Gestionnaire)
+    serveur.daemon_threads = True
+    print(f"Serveur de rejeu sur http://127.0.0.1:{args.port} "
+          f"({len(fixtures.index)} fixture(s){', pages synthétiques' if args.synthetique else ''})",
+          flush=True)
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
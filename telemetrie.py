@@ -0,0 +1,212 @@
+"""
+telemetrie.py — Traçage léger des étapes d'une exécution et rapport JSON.
+
+Chaque étape ouvre une portée : `with portee("GET", "fetch", url=url) as p:`.
+Les portées s'imbriquent d'elles-mêmes (contextvars), y compris dans les
+threads de parallel.executer_en_parallele et de fetchers.sonder_flux, qui
+copient le contexte à la soumission. Une portée porte sa durée, ses
+attributs (octets, cache, jetons…) et la classe de l'exception qui l'a
+interrompue ; hors exécution suivie (modules utilisés seuls, bancs d'essai),
+les portées ne sont rattachées à rien et ne coûtent presque rien.
+
+Catégories utilisées : execution, etape, tache (une tâche parallèle, ex. une
+source), fetch (requête HTTP), render (page rendue par Playwright), parse
+(analyse HTML ou RSS), prompt, llm, html, email.
+
+main() ouvre l'exécution (demarrer_execution) et écrit le rapport à la fin
+(ecrire_rapport) : arbre des portées, totaux par catégorie, bilan par tâche
+(octets, accès au cache, temps d'analyse, erreurs) et jetons consommés.
+
+Variables d'environnement :
+  RAPPORT_EXECUTION — chemin du rapport JSON (défaut :
+                      .cache/rapports/execution-AAAAMMJJ-HHMMSS.json ; « 0 » pour ne pas l'écrire)
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+RAPPORT = os.environ.get("RAPPORT_EXECUTION", "").strip()
+RAPPORTS_DIR = Path(__file__).parent / ".cache" / "rapports"
+
+# Attributs numériques additionnés dans les totaux et les bilans par tâche
+CHAMPS_JETONS = ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens",
+                 "output_tokens", "jetons_reflexion_estimes")
+
+_COURANTE = contextvars.ContextVar("portee_courante", default=None)
+_VERROU = threading.Lock()
+_execution = None
+
+
+class Portee:
+    """Une étape chronométrée, ses attributs et ses portées enfants."""
+
+    __slots__ = ("nom", "categorie", "debut", "duree", "attributs", "erreur", "enfants", "_t0")
+
+    def __init__(self, nom: str, categorie: str, attributs: dict):
+        self.nom = nom
+        self.categorie = categorie
+        self.debut = time.time()
+        self.duree = None
+        self.attributs = attributs
+        self.erreur = None
+        self.enfants = []
+        self._t0 = time.perf_counter()
+
+    def noter(self, **attributs) -> None:
+        self.attributs.update(attributs)
+
+    def ajouter(self, **compteurs) -> None:
+        """Incrémente des compteurs numériques (plusieurs appels dans une même portée)."""
+        with _VERROU:
+            for cle, n in compteurs.items():
+                self.attributs[cle] = self.attributs.get(cle, 0) + n
+
+    def fermer(self) -> None:
+        if self.duree is None:
+            self.duree = time.perf_counter() - self._t0
+
+    def en_dict(self, origine: float) -> dict:
+        d = {
+            "nom": self.nom,
+            "categorie": self.categorie,
+            "debut_s": round(self.debut - origine, 4),
+            "duree_s": round(self.duree if self.duree is not None
+                             else time.perf_counter() - self._t0, 4),
+        }
+        if self.attributs:
+            d["attributs"] = self.attributs
+        if self.erreur:
+            d["erreur"] = self.erreur
+        with _VERROU:
+            enfants = list(self.enfants)
+        if enfants:
+            d["enfants"] = [e.en_dict(origine) for e in sorted(enfants, key=lambda e: e.debut)]
+        return d
+
+    def descendants(self):
+        with _VERROU:
+            enfants = list(self.enfants)
+        for enfant in enfants:
+            yield enfant
+            yield from enfant.descendants()
+
+
+@contextmanager
+def portee(nom: str, categorie: str = "etape", **attributs):
+    """Ouvre une portée enfant de la portée courante ; l'exception éventuelle est notée puis relancée."""
+    p = Portee(nom, categorie, attributs)
+    parent = _COURANTE.get()
+    if parent is not None:
+        with _VERROU:
+            parent.enfants.append(p)
+    jeton = _COURANTE.set(p)
+    try:
+        yield p
+    except BaseException as e:
+        p.erreur = type(e).__name__
+        raise
+    finally:
+        p.fermer()
+        _COURANTE.reset(jeton)
+
+
+def noter(**attributs) -> None:
+    """Ajoute des attributs à la portée courante (sans effet hors portée)."""
+    p = _COURANTE.get()
+    if p is not None:
+        p.noter(**attributs)
+
+
+def demarrer_execution(**attributs) -> Portee:
+    """Ouvre la portée racine de l'exécution dans le contexte courant."""
+    global _execution
+    _execution = Portee("execution", "execution", attributs)
+    _COURANTE.set(_execution)
+    return _execution
+
+
+def _bilan_tache(tache: Portee) -> dict:
+    bilan = Counter()
+    erreurs = Counter()
+    for p in tache.descendants():
+        if p.erreur:
+            erreurs[p.erreur] += 1
+        if p.categorie == "fetch":
+            bilan["requetes"] += 1
+            bilan["octets"] += p.attributs.get("octets", 0)
+            cache = p.attributs.get("cache")
+            if cache in ("frais", "revalide"):
+                bilan[f"cache_{cache}"] += 1
+        elif p.categorie == "render":
+            bilan["rendus"] += 1
+            bilan["octets_rendus"] += p.attributs.get("octets", 0)
+        elif p.categorie == "parse":
+            bilan["analyses"] += 1
+            bilan["duree_analyse_s"] += p.duree or 0
+    bilan = dict(bilan)
+    if "duree_analyse_s" in bilan:
+        bilan["duree_analyse_s"] = round(bilan["duree_analyse_s"], 4)
+    return {"duree_s": round(tache.duree or 0, 4), **bilan,
+            **({"erreurs": dict(erreurs)} if erreurs else {}),
+            **({"erreur": tache.erreur} if tache.erreur else {})}
+
+
+def rapport(execution: Portee = None) -> dict:
+    """Rapport de l'exécution : arbre des portées, totaux, bilans par tâche, jetons, erreurs."""
+    execution = execution or _execution
+    if execution is None:
+        return {}
+    portees = list(execution.descendants())
+    totaux = {}
+    for p in portees:
+        t = totaux.setdefault(p.categorie, {"nombre": 0, "duree_s": 0.0, "octets": 0, "erreurs": 0})
+        t["nombre"] += 1
+        t["duree_s"] += p.duree or 0
+        t["octets"] += p.attributs.get("octets", 0)
+        t["erreurs"] += bool(p.erreur)
+    for t in totaux.values():
+        t["duree_s"] = round(t["duree_s"], 4)
+    jetons = Counter()
+    for p in portees:
+        if p.categorie == "llm":
+            jetons.update({c: p.attributs.get(c) or 0 for c in CHAMPS_JETONS})
+    return {
+        "debut": datetime.fromtimestamp(execution.debut).isoformat(timespec="seconds"),
+        "duree_s": round(execution.duree or time.perf_counter() - execution._t0, 3),
+        "attributs": execution.attributs,
+        "totaux": totaux,
+        "taches": {p.nom: _bilan_tache(p) for p in portees if p.categorie == "tache"},
+        "jetons": dict(jetons),
+        "erreurs": dict(Counter(p.erreur for p in portees if p.erreur)),
+        "portees": execution.en_dict(execution.debut),
+    }
+
+
+def ecrire_rapport(chemin: str = None, erreur: BaseException = None):
+    """
+    Ferme l'exécution et écrit son rapport JSON ; retourne le chemin écrit,
+    ou None (rapport désactivé, aucune exécution ouverte, écriture impossible).
+    """
+    if _execution is None or (chemin or RAPPORT) == "0":
+        return None
+    if erreur is not None:
+        _execution.erreur = type(erreur).__name__
+    _execution.fermer()
+    chemin = Path(chemin or RAPPORT or
+                  RAPPORTS_DIR / f"execution-{datetime.fromtimestamp(_execution.debut):%Y%m%d-%H%M%S}.json")
+    try:
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(rapport(_execution), f, ensure_ascii=False, indent=1, default=str)
+    except OSError as e:
+        print(f"  ⚠ Rapport d'exécution non écrit : {e}")
+        return None
+    print(f"🧾 Rapport d'exécution : {chemin}")
+    return chemin
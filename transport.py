@@ -0,0 +1,151 @@
+"""
+transport.py — Couche HTTP commune à tous les collecteurs.
+
+Toutes les pages HTML et tous les flux passent par une seule session
+requests dont les connexions sont réutilisées (keep-alive, reprise de
+session TLS) d'un appel à l'autre. Chaque requête traverse, dans l'ordre :
+  1. le cache HTTP sur disque (httpcache.py) ;
+  2. le disjoncteur du point d'accès (disjoncteur.py), qui ignore les
+     points d'accès défaillants de façon chronique ou raccourcit leur délai ;
+  3. le planificateur par hôte (scheduler.py) ;
+  4. la session partagée, avec un pool de connexions par hôte et des
+     reprises automatiques sur les erreurs transitoires.
+
+Variables d'environnement :
+  HTTP_POOL_HOTES   — taille de pool par hôte, ex. « www.ontario.ca=4 »
+                      (défaut : HTTP_MAX_PAR_HOTE pour tous les hôtes)
+  HTTP_REPRISES     — nombre de reprises sur erreur transitoire (défaut : 2)
+  ARCHIVE_MODE      — « capture » : chaque réponse est aussi écrite dans l'archive de
+                      l'exécution ; « rejeu » : les réponses sont lues dans l'archive,
+                      sans réseau ni cache (voir archive.py)
+  HTTP_REDIRECTION  — base d'un serveur de rejeu, ex. « http://127.0.0.1:8790 » :
+                      https://hote/chemin?q est demandé à {base}/https/hote/chemin?q
+                      (stubs/sites_stub.py, benchmarks/bench_collecte.py) ; le cache,
+                      le planificateur et le disjoncteur voient toujours l'URL d'origine
+"""
+
+import os
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from archive import ARCHIVE
+from disjoncteur import DISJONCTEUR
+from httpcache import CACHE, url_complete
+from scheduler import MAX_PAR_HOTE, PLANIFICATEUR, lire_surcharges
+from telemetrie import portee
+
+REPRISES = int(os.environ.get("HTTP_REPRISES", "2") or 2)
+REDIRECTION = os.environ.get("HTTP_REDIRECTION", "").strip().rstrip("/")
+POOL_HOTES = {h: int(n) for h, n in lire_surcharges(os.environ.get("HTTP_POOL_HOTES", "")).items()}
+
+# Nombre d'hôtes distincts dont les pools restent ouverts (≈ 40 hôtes provinciaux)
+NB_POOLS = 64
+
+EN_TETES_DEFAUT = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/121.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-CA,en;q=0.9,fr-CA;q=0.8",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+
+def _adaptateur(taille_pool: int) -> HTTPAdapter:
+    reprises = Retry(
+        total=REPRISES,
+        connect=REPRISES,
+        read=1,
+        status=REPRISES,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=NB_POOLS, pool_maxsize=taille_pool, max_retries=reprises)
+
+
+def creer_session() -> requests.Session:
+    """Crée la session partagée : en-têtes par défaut, pools par hôte et reprises."""
+    session = requests.Session()
+    session.headers.update(EN_TETES_DEFAUT)
+    adaptateur = _adaptateur(MAX_PAR_HOTE)
+    session.mount("https://", adaptateur)
+    session.mount("http://", adaptateur)
+    for hote, taille in POOL_HOTES.items():
+        adaptateur_hote = _adaptateur(taille)
+        session.mount(f"https://{hote}/", adaptateur_hote)
+        session.mount(f"http://{hote}/", adaptateur_hote)
+    return session
+
+
+SESSION = creer_session()
+
+# Fonctions appelées avec (url_complete, réponse) après chaque réponse du réseau
+OBSERVATEURS = []
+
+
+def url_reseau(url: str) -> str:
+    """URL réellement demandée : l'URL d'origine, ou son équivalent sur HTTP_REDIRECTION."""
+    if not REDIRECTION:
+        return url
+    morceaux = urlsplit(url)
+    requete = f"?{morceaux.query}" if morceaux.query else ""
+    return f"{REDIRECTION}/{morceaux.scheme}/{morceaux.netloc}{morceaux.path or '/'}{requete}"
+
+
+def telecharger(url: str, timeout: float = 20, params: dict = None, en_tetes: dict = None,
+                ttl: int = None) -> requests.Response:
+    """
+    Effectue un GET via le cache, le planificateur et la session partagée.
+    Lève une exception en cas d'erreur réseau ou de statut HTTP 4xx/5xx,
+    ou DisjoncteurOuvert si le point d'accès est ignoré pour cette exécution.
+    """
+    def requeter(en_tetes_conditionnels):
+        # Les réponses fraîches du cache n'atteignent pas ce point : seul le réseau est jugé
+        delai = DISJONCTEUR.autoriser(url, timeout)
+        with PLANIFICATEUR.creneau(url):
+            debut = time.perf_counter()
+            try:
+                r = SESSION.get(
+                    url_reseau(url), timeout=delai, params=params,
+                    headers={**(en_tetes or {}), **en_tetes_conditionnels},
+                    allow_redirects=True,
+                )
+            except requests.RequestException as e:
+                DISJONCTEUR.echec(url, e, time.perf_counter() - debut)
+                raise
+        duree = time.perf_counter() - debut
+        if r.status_code >= 400:
+            # Un 404 ou un 410 ne dit rien de la santé de l'hôte : seul un 5xx pèse sur lui
+            DISJONCTEUR.echec(url, f"HTTP {r.status_code}", duree, hote_joignable=r.status_code < 500)
+        else:
+            DISJONCTEUR.succes(url, duree)
+        for observateur in OBSERVATEURS:
+            observateur(url_complete(url, params), r)
+        return r
+
+    cle = url_complete(url, params)
+    with portee("GET", "fetch", url=url) as p:
+        if ARCHIVE.rejeu:
+            r = ARCHIVE.reponse(cle)
+        else:
+            try:
+                r = CACHE.get(cle, requeter, ttl=ttl)
+            except requests.RequestException as e:
+                ARCHIVE.noter_erreur("http", cle, e)
+                raise
+            ARCHIVE.noter_reponse(cle, r)
+        p.noter(statut=r.status_code, octets=len(r.content),
+                cache="archive" if ARCHIVE.rejeu else getattr(r, "depuis_cache", None) or "reseau")
+        r.raise_for_status()
+    return r